@@ -154,7 +154,6 @@ export default function FinancialAdviceScreen({ navigation }: any) {
   const [aiLoading, setAiLoading] = useState(false);
   const [aiAnswer, setAiAnswer] = useState<string>("");
   const [aiError, setAiError] = useState<string>("");
-  const [aiDebug, setAiDebug] = useState<any[] | null>(null);
   const lastPromptHashRef = useRef<string>("");
   const hasAutoRunRef = useRef(false);
 
@@ -415,10 +414,24 @@ Output format (strict):
 Keep it <= 180 words.`;
   }, [analysis]);
 
+  // v2 request: the same numbers typed, so the server does not scrape the prompt
+  const buildAiSummary = useCallback(
+    () => ({
+      transactionsCount: analysis.last30Count,
+      income: analysis.income30,
+      expenses: analysis.expense30,
+      cashflow: analysis.cashflow,
+      savingsRate: analysis.savingsRate,
+      topAccount: analysis.topAcc || null,
+      topCategory: analysis.topCat,
+      smallPurchasesCount: analysis.smallExpenseCount,
+    }),
+    [analysis]
+  );
+
   const runAiCoach = useCallback(async () => {
     setAiError("");
     setAiAnswer("");
-    setAiDebug(null);
     setCopyMsg("");
 
     const host = normalizeHost(ragHost);
@@ -438,7 +451,8 @@ Keep it <= 180 words.`;
           method: "POST",
           headers: { "Content-Type": "application/json" },
           body: JSON.stringify({
-            text: prompt,
+            version: 2,
+            summary: buildAiSummary(),
             n_results: 3,
             model: DEFAULT_LLM_MODEL,
           }),
@@ -453,7 +467,6 @@ Keep it <= 180 words.`;
 
       const data = await resp.json();
       const answer = (data?.model_answer || "").toString().trim();
-      const results = Array.isArray(data?.results) ? data.results : null;
       const ollamaError = (data?.ollama_error || "").toString().trim();
 
       if (ollamaError) throw new Error(`Ollama error: ${ollamaError}`);
@@ -463,7 +476,6 @@ Keep it <= 180 words.`;
         );
 
       setAiAnswer(answer);
-      setAiDebug(results);
     } catch (e: any) {
       const msg =
         e?.name === "AbortError"
@@ -473,7 +485,7 @@ Keep it <= 180 words.`;
     } finally {
       setAiLoading(false);
     }
-  }, [ragHost, buildAiPrompt, analysis, aiAnswer]);
+  }, [ragHost, buildAiPrompt, buildAiSummary, analysis, aiAnswer]);
 
   useEffect(() => {
     if (loading) return;
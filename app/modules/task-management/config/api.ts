@@ -1,8 +1,9 @@
 // src/config/localRag.ts
 import { Platform } from "react-native";
 
-// Task AI backend (fastapi_chroma_fixed) – use a different port from Money AI
-// so you can run both at the same time.
+// Task AI backend (fastapi_chroma_task) – use a different port from Money AI
+// so you can run both at the same time, or run fastapi_chroma_all (task +
+// money in one process) and point both hosts at its port.
 export const RAG_API_HOST =
   Platform.OS === "web"
     ? "http://127.0.0.1:8001" // Task FastAPI on your PC
@@ -1,3 +1,5 @@
+import os
+
 import chromadb
 
 """
@@ -6,7 +8,7 @@ Insert (or reset + insert) ONLY task-assistant rule documents into ChromaDB.
 Run this once whenever you want to reset your vector DB content.
 """
 
-PERSIST_PATH = "./vectordb"
+PERSIST_PATH = os.getenv("TASK_VECTORDB_PATH", "./vectordb")  # same store as api.py
 COLLECTION_NAME = "my_data"
 
 # Set True to remove any old/demo content (Obama/Trump/etc.)
@@ -1,4 +1,11 @@
-import chromadb
+import os
+import sys
+
+# fastapi_chroma_shared/ (repo root): helpers shared with the money service
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "..")))
+
+from fastapi_chroma_shared.shards import MODULE_TASKS, rules_collection_name, sharded
+from fastapi_chroma_shared.vector_store import make_client
 
 """
 Insert (or reset + insert) ONLY task-assistant rule documents into ChromaDB.
@@ -6,8 +13,9 @@ Insert (or reset + insert) ONLY task-assistant rule documents into ChromaDB.
 Run this once whenever you want to reset your vector DB content.
 """
 
-PERSIST_PATH = "./vectordb"
-COLLECTION_NAME = "my_data"
+PERSIST_PATH = os.getenv("TASK_VECTORDB_PATH", "./vectordb")  # same store as api.py
+# VECTOR_LAYOUT=sharded: task rules live in their own collection (see shards.py)
+COLLECTION_NAME = rules_collection_name(MODULE_TASKS) if sharded() else "my_data"
 
 # Set True to remove any old/demo content (Obama/Trump/etc.)
 RESET_COLLECTION = True
@@ -17,7 +25,7 @@ RULE_USER_ID = "__global__"
 
 
 def main() -> None:
-    chroma_client = chromadb.PersistentClient(path=PERSIST_PATH)
+    chroma_client = make_client(PERSIST_PATH)  # CHROMA_MODE=http -> the running Chroma server
 
     if RESET_COLLECTION:
         try:
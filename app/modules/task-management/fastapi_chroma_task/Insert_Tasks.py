@@ -0,0 +1,126 @@
+"""
+Bulk insert / update / delete task documents (type=task) in ChromaDB.
+
+Input: NDJSON, one task per line
+  {"userId": "...", "id": "...", "title": "...", "details": "...", "priority": 80,
+   "startDate": "2025-12-01", "dueDate": "2025-12-05", "completed": false}
+completed=true deletes the task document. Every line is validated as a
+TaskDocRecord (task_docs.py, same rules as the HTTP path); in direct mode bad
+lines are skipped and listed, and the script exits 1 if there were any.
+
+Direct (writes TASK_VECTORDB_PATH, default ./vectordb; do NOT run while api.py has it open;
+with CHROMA_MODE=http it writes through the Chroma server instead):
+    python Insert_Tasks.py tasks.jsonl
+Through the running service (POST /tasks/bulk_upsert, body streamed):
+    python Insert_Tasks.py tasks.jsonl --url http://localhost:8001
+"""
+import argparse
+import os
+import sys
+from typing import Any, Dict, Iterator, List, TextIO, Tuple
+
+PERSIST_PATH = os.getenv("TASK_VECTORDB_PATH", "./vectordb")  # same store as api.py
+COLLECTION_NAME = "my_data"
+MAX_INVALID_SHOWN = 20  # bad lines listed after a direct load
+
+# fastapi_chroma_shared/ (repo root): helpers shared with the money service
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", ".."))
+
+
+def read_records(f: TextIO, invalid: List[Tuple[int, str]]) -> Iterator[Dict[str, Any]]:
+    """Validated records; (line number, error) of every bad line goes to `invalid`."""
+    from task_docs import parse_record
+
+    for line_no, line in enumerate(f, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield parse_record(line)
+        except (ValueError, TypeError) as e:
+            invalid.append((line_no, " ".join(str(e).split())))
+
+
+def load_direct(f: TextIO, batch_size: int) -> Dict[str, Any]:
+    from chromadb.utils import embedding_functions
+
+    sys.path.insert(0, REPO_ROOT)
+    from fastapi_chroma_shared.shards import ShardRouter, sharded
+    from fastapi_chroma_shared.vector_store import make_client
+    from task_docs import TaskDocLoader
+    from task_index import TaskIndex
+
+    chroma_client = make_client(PERSIST_PATH)
+    collection = chroma_client.get_or_create_collection(name=COLLECTION_NAME)
+    loader = TaskDocLoader(
+        collection=collection,
+        embed_fn=embedding_functions.DefaultEmbeddingFunction(),
+        batch_size=batch_size,
+        collection_for=ShardRouter(chroma_client).tasks if sharded() else None,  # VECTOR_LAYOUT=sharded
+    )
+    user_ids = set()
+    invalid: List[Tuple[int, str]] = []
+
+    def records() -> Iterator[Dict[str, Any]]:
+        for record in read_records(f, invalid):
+            user_ids.add(record["userId"])
+            yield record
+
+    try:
+        stats = loader.load(records()).as_dict()
+        stats["invalid"] = invalid
+        return stats
+    finally:
+        # a running api.py reloads these users' exact-search matrices
+        TaskIndex(path=os.getenv("TASK_INDEX_PATH", "./task_index.sqlite3")).bump_doc_versions(user_ids)
+
+
+def load_via_api(f: TextIO, url: str) -> Dict[str, Any]:
+    import requests
+
+    def body() -> Iterator[bytes]:
+        for line in f:
+            if line.strip():
+                yield line.rstrip("\n").encode("utf-8") + b"\n"
+
+    r = requests.post(
+        url.rstrip("/") + "/tasks/bulk_upsert",
+        data=body(),
+        headers={"Content-Type": "application/x-ndjson"},
+        timeout=600,
+    )
+    r.raise_for_status()
+    return r.json()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bulk upsert task documents into ChromaDB")
+    parser.add_argument("path", nargs="?", default="-", help="NDJSON file ('-' = stdin)")
+    parser.add_argument("--url", help="task service base URL (use the API instead of TASK_VECTORDB_PATH)")
+    parser.add_argument("--batch-size", type=int, default=128)
+    args = parser.parse_args()
+
+    f = sys.stdin if args.path == "-" else open(args.path, "r", encoding="utf-8")
+    try:
+        stats = load_via_api(f, args.url) if args.url else load_direct(f, args.batch_size)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+    print(
+        f"✅ {stats['received']} record(s): {stats['upserted']} upserted, "
+        f"{stats['unchanged']} unchanged (not re-embedded), {stats['deleted']} deleted"
+    )
+    print(f"   {stats['batches']} batch(es) in {stats['seconds']}s -> {stats['docs_per_sec']} docs/sec")
+    invalid = stats.get("invalid") or []
+    if invalid:
+        print(f"❌ {len(invalid)} invalid record(s) skipped:")
+        for line_no, error in invalid[:MAX_INVALID_SHOWN]:
+            print(f"   line {line_no}: {error}")
+        if len(invalid) > MAX_INVALID_SHOWN:
+            print(f"   ... and {len(invalid) - MAX_INVALID_SHOWN} more")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
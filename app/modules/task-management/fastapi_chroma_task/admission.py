@@ -0,0 +1,142 @@
+import asyncio
+import heapq
+import math
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# =========================
+# LLM admission control
+# At most max_concurrent generations run at once; up to max_queue more wait.
+# Waiters are served by weighted fair queueing on userId: each waiter gets a
+# virtual finish tag = max(virtual clock, user's last tag) + 1 / weight and the
+# smallest tag goes next, so one user's burst cannot starve other users.
+# A full queue raises QueueFull right away (-> 429 + Retry-After).
+# =========================
+
+
+class QueueFull(Exception):
+    def __init__(self, retry_after_s: int):
+        super().__init__(f"LLM queue is full, retry in {retry_after_s}s")
+        self.retry_after_s = retry_after_s
+
+
+class _Waiter:
+    __slots__ = ("future", "cancelled")
+
+    def __init__(self, future: "asyncio.Future[None]"):
+        self.future = future
+        self.cancelled = False
+
+
+class Ticket:
+    """One admitted slot; release() is idempotent."""
+
+    def __init__(self, controller: "AdmissionController", wait_s: float):
+        self._controller = controller
+        self.wait_s = wait_s
+        self._t0 = time.perf_counter()
+        self._released = False
+
+    def release(self) -> None:
+        if self._released:
+            return
+        self._released = True
+        self._controller._release(time.perf_counter() - self._t0)
+
+    async def __aenter__(self) -> "Ticket":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        self.release()
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_queue: int,
+        weight_fn: Optional[Callable[[str], float]] = None,
+    ):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max_queue
+        self._weight_fn = weight_fn or (lambda _user_id: 1.0)
+
+        self._active = 0
+        self._queued = 0
+        self._heap: List[Tuple[float, int, _Waiter]] = []
+        self._seq = 0
+        self._virtual = 0.0
+        self._last_tag: Dict[str, float] = {}
+        self._avg_hold_s = 10.0  # EWMA of slot hold time, used for Retry-After
+
+        self.admitted = 0
+        self.rejected = 0
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    def retry_after_s(self) -> int:
+        rounds = (self._queued + 1) / self.max_concurrent
+        return int(min(60, max(1, math.ceil(rounds * self._avg_hold_s))))
+
+    async def acquire(self, user_id: str) -> Ticket:
+        t0 = time.perf_counter()
+        if self._active < self.max_concurrent and self._queued == 0:
+            self._active += 1
+            self.admitted += 1
+            return Ticket(self, 0.0)
+
+        if self._queued >= self.max_queue:
+            self.rejected += 1
+            raise QueueFull(self.retry_after_s())
+
+        weight = max(self._weight_fn(user_id), 1e-6)
+        tag = max(self._virtual, self._last_tag.get(user_id, 0.0)) + 1.0 / weight
+        self._last_tag[user_id] = tag
+        if len(self._last_tag) > 4096:
+            self._last_tag = {u: t for u, t in self._last_tag.items() if t > self._virtual}
+
+        waiter = _Waiter(asyncio.get_running_loop().create_future())
+        self._seq += 1
+        heapq.heappush(self._heap, (tag, self._seq, waiter))
+        self._queued += 1
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                self._release(None)  # slot was granted just before the cancel
+            else:
+                waiter.cancelled = True
+                self._queued -= 1
+            raise
+        self.admitted += 1
+        return Ticket(self, time.perf_counter() - t0)
+
+    def _release(self, held_s: Optional[float]) -> None:
+        if held_s is not None:
+            self._avg_hold_s = 0.8 * self._avg_hold_s + 0.2 * held_s
+        self._active -= 1
+        while self._active < self.max_concurrent and self._heap:
+            tag, _seq, waiter = heapq.heappop(self._heap)
+            if waiter.cancelled:
+                continue
+            self._queued -= 1
+            self._virtual = tag
+            self._active += 1
+            waiter.future.set_result(None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self._active,
+            "queued": self._queued,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "avg_generation_s": round(self._avg_hold_s, 3),
+        }
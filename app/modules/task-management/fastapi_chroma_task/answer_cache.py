@@ -0,0 +1,79 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Hashable, List, Optional, Tuple
+
+from tasks_context import ParsedTask
+
+# =========================
+# LRU + TTL cache for the deterministic intents
+# answer_by_intent(intent, tasks) is pure, but DaysUntilDue is relative to
+# "today", so every entry also dies at the next local midnight.
+# =========================
+
+
+def tasks_fingerprint(tasks: List[ParsedTask]) -> str:
+    """Stable hash of the normalized task list (raw text is ignored)."""
+    norm = tuple(
+        (
+            t.get("title"),
+            t.get("details"),
+            t.get("priority", 0),
+            t.get("daysUntilDue"),
+            t.get("start"),
+            t.get("due"),
+            bool(t.get("overdue")),
+        )
+        for t in tasks
+    )
+    return hashlib.blake2b(repr(norm).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def answer_etag(intent: str, fingerprint: str, day: str) -> str:
+    digest = hashlib.blake2b(f"{intent}|{fingerprint}|{day}".encode("utf-8"), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def _next_midnight(now: float) -> float:
+    dt = datetime.fromtimestamp(now)
+    midnight = (dt + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return midnight.timestamp()
+
+
+class AnswerCache:
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 600.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if now >= expires_at:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        now = time.time()
+        expires_at = min(now + self.ttl_seconds, _next_midnight(now))
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -1,32 +1,241 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import APIRouter, FastAPI, Header, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
-import chromadb
-import requests
-from typing import List, Dict, Any, Optional, Tuple
-import re
-from datetime import datetime, timedelta
+from starlette.concurrency import run_in_threadpool
+import httpx
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
+import asyncio
+import time
+import json
+import logging
+from contextlib import asynccontextmanager
+from datetime import date
+import os
+import random
+import sys
+
+# fastapi_chroma_shared/ (repo root): helpers shared with the money service
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "..", "..")))
+
+from admission import AdmissionController, QueueFull, Ticket
+from answer_cache import AnswerCache, answer_etag, tasks_fingerprint
+from fastapi_chroma_shared.embedding_cache import shared_cache
+from intent_answers import answer_by_intent
+from fastapi_chroma_shared.metrics import CONTENT_TYPE, Registry
+from intent_classifier import (
+    DEFAULT_INTENT_EXAMPLES,
+    DEFAULT_INTENT_TABLE,
+    INTENT_CAN_DELAY,
+    INTENT_CLEAR_OVERDUE,
+    INTENT_COUNT_OVERDUE,
+    INTENT_OTHER,
+    INTENT_PLAN_WEEK,
+    INTENT_TOP_TODAY,
+    IntentClassifier,
+)
+from model_router import ModelRouter
+from prompt_packer import pack_prompt, prompt_budget, split_task_blocks
+from fastapi_chroma_shared.rules_snapshot import RulesSnapshot
+from fastapi_chroma_shared.shards import MODULE_TASKS, VECTOR_LAYOUT, ShardRouter, rules_collection_name, sharded
+from single_flight import SingleFlight, request_key
+from task_docs import BulkStats, TaskDocLoader, parse_record
+from task_index import TaskIndex, VersionConflict
+from tasks_context import ParsedTask, format_task_block, parse_tasks_context, tasks_from_items
+from user_vectors import MISS, UserVectors
+from fastapi_chroma_shared.vector_store import EMBEDDING_MODEL, VectorStore, embed_texts
 
 # =========================
 # App setup
 # =========================
-app = FastAPI()
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # ok for dev
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+OLLAMA_CHAT_URL = os.getenv("OLLAMA_CHAT_URL", "http://localhost:11434/api/chat")
+
+# One keep-alive connection pool to Ollama for the whole process (opened/closed in lifespan)
+OLLAMA_MAX_CONNECTIONS = 64
+OLLAMA_TIMEOUT = httpx.Timeout(60.0, connect=5.0)
+ollama_http: Optional[httpx.AsyncClient] = None
+
+# Model routing: requested model is downgraded (largest -> smallest) when its
+# predicted p95 would break MODEL_SLO_P95_S (see model_router.py)
+ROUTED_MODELS = [m.strip() for m in os.getenv("OLLAMA_MODELS", "deepseek-r1:7b,deepseek-r1:1.5b").split(",") if m.strip()]
+MODEL_SLO_P95_S = float(os.getenv("MODEL_SLO_P95_S", "20"))
+OLLAMA_NUM_PARALLEL = int(os.getenv("OLLAMA_NUM_PARALLEL", "1"))
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+# LLM admission: global concurrency limit + bounded fair queue per userId (see admission.py)
+LLM_MAX_CONCURRENT = int(os.getenv("LLM_MAX_CONCURRENT", str(OLLAMA_NUM_PARALLEL)))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "16"))
+llm_admission = AdmissionController(max_concurrent=LLM_MAX_CONCURRENT, max_queue=LLM_MAX_QUEUE)
+
+# every request ahead in the (global) admission queue delays a new one, whatever its model
+model_router = ModelRouter(
+    models=ROUTED_MODELS,
+    slo_p95_s=MODEL_SLO_P95_S,
+    queue_depth=lambda: llm_admission.active + llm_admission.queued,
+    parallel=llm_admission.max_concurrent,
 )
 
-PERSIST_PATH = "./vectordb"
+
+async def _warm_models() -> None:
+    # empty chat = Ollama only loads the model and keeps it for OLLAMA_KEEP_ALIVE
+    for model in ROUTED_MODELS:
+        try:
+            resp = await ollama_http.post(
+                OLLAMA_CHAT_URL,
+                json={"model": model, "messages": [], "keep_alive": OLLAMA_KEEP_ALIVE},
+                timeout=httpx.Timeout(300.0, connect=5.0),
+            )
+            resp.raise_for_status()
+            print(f"✅ Warmed {model}")
+        except httpx.HTTPError as e:
+            print(f"(ok) Could not warm {model}: {e}")
+
+
+async def _init_vector_store() -> None:
+    global task_doc_loader, shard_router
+    await vector_store.start()
+    if not vector_store.ready:
+        print(f"❌ Vector store failed after {vector_store.init_s:.2f}s: {vector_store.error}")
+        return
+    if VECTOR_SHARDED:
+        shard_router = ShardRouter(vector_store.client)
+    task_doc_loader = TaskDocLoader(
+        collection=vector_store.collection,
+        embed_fn=vector_store.embed,
+        collection_for=shard_router.tasks if shard_router is not None else None,
+    )
+    try:
+        await run_in_threadpool(rules_snapshot.refresh, True)
+    except Exception as e:
+        print(f"(ok) Rules snapshot not built yet: {e}")
+    print(f"✅ Vector store ready in {vector_store.init_s:.2f}s")
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    global ollama_http
+    ollama_http = httpx.AsyncClient(
+        timeout=OLLAMA_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=OLLAMA_MAX_CONNECTIONS,
+            max_keepalive_connections=OLLAMA_MAX_CONNECTIONS,
+        ),
+    )
+    # both in the background: startup does not wait, deterministic intents answer right away
+    store_task = asyncio.create_task(_init_vector_store())
+    warm_task = asyncio.create_task(_warm_models())
+    try:
+        yield
+    finally:
+        warm_task.cancel()
+        store_task.cancel()
+        await ollama_http.aclose()
+        ollama_http = None
+        embedding_cache.flush()
+
+
+# Routes live on `router`; `app` (end of file) serves them standalone and
+# fastapi_chroma_all mounts the same router + lifespan next to the money service
+router = APIRouter()
+
+PERSIST_PATH = os.getenv("TASK_VECTORDB_PATH", "./vectordb")
 COLLECTION_NAME = "my_data"
 RULE_USER_ID = "__global__"
 
-chroma_client = chromadb.PersistentClient(path=PERSIST_PATH)
-collection = chroma_client.get_or_create_collection(name=COLLECTION_NAME)
+# VECTOR_LAYOUT=sharded: rules_task-management + tasks_<bucket> collections instead of
+# $and filters on my_data (see shards.py, migrate_shards.py); router set once the store is ready
+VECTOR_SHARDED = sharded()
+shard_router: Optional[ShardRouter] = None
+
+# Chroma + the embedding model load in a worker thread started by lifespan (see vector_store.py);
+# retrieval waits up to VECTOR_STORE_WAIT_S for it, GET /ready reports it.
+# Several workers (uvicorn --workers N): set CHROMA_MODE=http and run one Chroma server
+vector_store = VectorStore(path=PERSIST_PATH, collection_name=COLLECTION_NAME)
+VECTOR_STORE_WAIT_S = float(os.getenv("VECTOR_STORE_WAIT_S", "5"))
+embedding_cache = shared_cache(
+    embed_fn=embed_texts,
+    path=os.getenv("EMBEDDING_CACHE_DIR", "./embedding_cache"),
+    model=EMBEDDING_MODEL,
+)
+
+RULES_QUERY_TEXT = "task assistant rules / prioritization / scheduling / safety"
+RULES_MAX_RESULTS = 5
+RULES_SNAPSHOT_CHECK_S = 30.0
+TASKS_QUERY_TIMEOUT_S = 10.0
+
+# Ollama prompt budget = min(num_ctx * ratio, num_ctx - num_predict) estimated tokens
+PROMPT_BUDGET_RATIO = float(os.getenv("PROMPT_BUDGET_RATIO", "0.75"))
+
+# Deterministic-intent answers (see answer_cache.py)
+ANSWER_CACHE_MAX_ENTRIES = 512
+ANSWER_CACHE_TTL_SECONDS = 600
+answer_cache = AnswerCache(max_entries=ANSWER_CACHE_MAX_ENTRIES, ttl_seconds=ANSWER_CACHE_TTL_SECONDS)
+
+# Per-user task index pushed by the app as deltas (see task_index.py)
+task_index = TaskIndex(path=os.getenv("TASK_INDEX_PATH", "./task_index.sqlite3"))
+
+# type=task documents for _query_tasks (documents are not queries -> no embedding cache);
+# created once the vector store is ready
+task_doc_loader: Optional[TaskDocLoader] = None
+
+# _query_tasks: exact NumPy top-k over a cached matrix of the user's task docs,
+# the filtered HNSW query only for users with more than EXACT_SEARCH_MAX_DOCS docs
+# (see user_vectors.py). The 10000 default is a memory cap, not a measured
+# crossover: exact_vs_ann.py found exact faster at every size it tried (up to
+# 10000), and a 10000-doc 384-d float32 matrix is ~15 MB, so the 64 MB
+# USER_VECTORS_MAX_MB budget still holds ~4 such users. Raise both together.
+# A matrix is reloaded when task_index.doc_version(user) moves; concurrent
+# misses for one user share one collection.get.
+EXACT_SEARCH_MAX_DOCS = int(os.getenv("EXACT_SEARCH_MAX_DOCS", "10000"))
+user_vectors = UserVectors(
+    max_docs=EXACT_SEARCH_MAX_DOCS,
+    max_bytes=int(os.getenv("USER_VECTORS_MAX_MB", "64")) * 1024 * 1024,
+)
+user_vectors_loads = SingleFlight()
+
+# =========================
+# Metrics (GET /metrics, Prometheus text format; see metrics.py)
+# =========================
+metrics = Registry()
+STAGE_SECONDS = metrics.histogram(
+    "task_assistant_stage_seconds",
+    "Time per chat_rag pipeline stage",
+    ("stage",),
+)
+REQUESTS_TOTAL = metrics.counter(
+    "task_assistant_requests_total",
+    "chat_rag requests by intent and answer path (local, not_modified, llm, stream_local, stream_llm)",
+    ("intent", "path"),
+)
+FALLBACKS_TOTAL = metrics.counter(
+    "task_assistant_fallbacks_total",
+    "Fallback / error paths taken",
+    ("kind",),
+)
+metrics.gauge("task_assistant_llm_in_flight", "Ollama generations running", lambda: llm_admission.active)
+metrics.gauge("task_assistant_llm_queued", "Requests waiting for an Ollama slot", lambda: llm_admission.queued)
+metrics.gauge("task_assistant_vector_store_ready", "1 once Chroma + embedding model are loaded", lambda: int(vector_store.ready))
+TASK_SEARCH_TOTAL = metrics.counter(
+    "task_assistant_task_search_total",
+    "Task retrievals by engine (exact = NumPy over the user's docs, ann = Chroma HNSW)",
+    ("engine",),
+)
 
-OLLAMA_CHAT_URL = "http://localhost:11434/api/chat"
+# Request logs: one JSON line for a sampled fraction of requests (never the prompt itself)
+LOG_SAMPLE_RATE = float(os.getenv("TASK_LOG_SAMPLE_RATE", "0.01"))
+log = logging.getLogger("task_api")
+if not log.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(_handler)
+    log.setLevel(logging.INFO)
+    log.propagate = False
+
+
+def _log_sampled(event: str, **fields: Any) -> None:
+    if LOG_SAMPLE_RATE > 0 and random.random() < LOG_SAMPLE_RATE:
+        log.info(json.dumps({"event": event, "ts": round(time.time(), 3), **fields}, ensure_ascii=False))
 
 
 # =========================
@@ -37,6 +246,16 @@ class ChatMessage(BaseModel):
     content: str
 
 
+class TaskItem(BaseModel):
+    title: str
+    priority: int = 0
+    daysUntilDue: Optional[int] = None
+    start: Optional[str] = None
+    due: Optional[str] = None
+    overdue: Optional[bool] = None
+    details: Optional[str] = None
+
+
 class ChatRequest(BaseModel):
     model: str = "deepseek-r1:7b"  # you can change to 1.5b if needed
     text: str
@@ -46,7 +265,28 @@ class ChatRequest(BaseModel):
     temperature: float = 0.2
     num_ctx: int = 4096
     num_predict: int = 260
-    tasksContext: str = ""  # from your TaskDashboard buildTasksContextForAI()
+    tasksContext: str = ""  # v1: text from buildTasksContextForAI() (old clients)
+    version: int = 1  # 2 = typed `tasks` list below, tasksContext is not parsed
+    tasks: Optional[List[TaskItem]] = None
+    taskIndexVersion: Optional[int] = None  # set => tasks come from the server index (POST /tasks/sync)
+
+
+class TaskDelta(BaseModel):
+    id: str
+    title: str
+    priority: int = 0
+    startDate: Optional[str] = None  # YYYY-MM-DD
+    dueDate: Optional[str] = None  # YYYY-MM-DD
+    details: Optional[str] = None
+    position: int = 0  # order in the app's active list
+
+
+class TaskSyncRequest(BaseModel):
+    userId: str
+    baseVersion: int  # version the client last got back (0 = never synced)
+    upserts: List[TaskDelta] = []
+    deletes: List[str] = []
+    reset: bool = False  # True = full snapshot, replaces the user's index whatever its version
 
 
 # =========================
@@ -79,363 +319,232 @@ def _where_and(*clauses: Dict[str, Any]) -> Dict[str, Any]:
     return {"$and": list(clauses)}
 
 
-def _query_rules(n_results: int) -> Dict[str, Any]:
-    return collection.query(
-        query_texts=["task assistant rules / prioritization / scheduling / safety"],
-        n_results=min(n_results, 5),
-        where=_where_and(
-            {"module": {"$eq": "task-management"}},
-            {"type": {"$eq": "rule"}},
-            {"userId": {"$eq": RULE_USER_ID}},
-        ),
-    )
-
-
-def _query_tasks(user_id: str, text: str, n_results: int) -> Dict[str, Any]:
-    return collection.query(
-        query_texts=[text],
-        n_results=n_results,
-        where=_where_and(
-            {"module": {"$eq": "task-management"}},
-            {"type": {"$eq": "task"}},
-            {"userId": {"$eq": user_id}},
-        ),
-    )
-
+def _embed(texts: List[str]) -> List[Any]:
+    # Same default model the collection uses, so query_embeddings match query_texts
+    return embedding_cache.embed(texts)
 
-# =========================
-# Intent detection (THIS is the key)
-# =========================
-INTENT_TOP_TODAY = "top_today"
-INTENT_PLAN_WEEK = "plan_week"
-INTENT_CLEAR_OVERDUE = "clear_overdue"
-INTENT_COUNT_OVERDUE = "count_overdue"
-INTENT_CAN_DELAY = "can_delay"
-INTENT_OTHER = "other"
 
+# task rule docs inside my_data (the sharded rules collection holds nothing else)
+RULES_WHERE = _where_and(
+    {"module": {"$eq": "task-management"}},
+    {"type": {"$eq": "rule"}},
+    {"userId": {"$eq": RULE_USER_ID}},
+)
 
-def detect_intent(user_text: str) -> str:
-    t = (user_text or "").strip().lower()
 
-    # count overdue
-    if ("how many" in t or "count" in t) and "overdue" in t:
-        return INTENT_COUNT_OVERDUE
+def _query_rules(n_results: int, query_embedding: Any, coll: Any) -> Dict[str, Any]:
+    if VECTOR_SHARDED:
+        # the module's own rules collection: nothing to filter
+        return coll.query(query_embeddings=[query_embedding], n_results=min(n_results, RULES_MAX_RESULTS))
+    return coll.query(
+        query_embeddings=[query_embedding],
+        n_results=min(n_results, RULES_MAX_RESULTS),
+        where=RULES_WHERE,
+    )
 
-    # overdue first
-    if "overdue" in t and ("clear" in t or "finish" in t or "first" in t or "which" in t):
-        return INTENT_CLEAR_OVERDUE
 
-    # plan week
-    if ("next 7 days" in t) or ("plan my week" in t) or ("schedule over the next" in t) or ("weekly schedule" in t):
-        return INTENT_PLAN_WEEK
+def _rules_collection() -> Any:
+    if VECTOR_SHARDED:
+        vector_store.require()
+        return vector_store.client.get_collection(name=rules_collection_name(MODULE_TASKS))
+    return vector_store.get_collection()
 
-    # which tasks can I delay / postpone
-    if ("can i delay" in t) or ("which tasks can i delay" in t) or ("what can i delay" in t) or ("postpone" in t) or ("can wait" in t):
-        return INTENT_CAN_DELAY
 
-    # top today
-    if ("top" in t and "today" in t) or ("what should i do today" in t) or ("most urgent today" in t):
-        return INTENT_TOP_TODAY
+def _load_rules_snapshot(coll: Any) -> Tuple[Dict[str, Any], ...]:
+    results = _query_rules(RULES_MAX_RESULTS, _embed([RULES_QUERY_TEXT])[0], coll)
+    return tuple(_build_retrieved_payload(results, preview_len=900))
 
-    return INTENT_OTHER
 
+# Constant query + constant filter -> computed at startup, rebuilt when the rule docs change
+rules_snapshot = RulesSnapshot(
+    get_collection=_rules_collection,
+    loader=_load_rules_snapshot,
+    select={} if VECTOR_SHARDED else {"where": RULES_WHERE},
+    check_interval_s=RULES_SNAPSHOT_CHECK_S,
+)
 
-# =========================
-# Parse tasksContext -> structured tasks (MOST IMPORTANT)
-# Your TaskDashboard already sends tasksContext with:
-#  Title: ...
-#  PriorityScore: ...
-#  DaysUntilDue: ...
-#  Start/Due etc.
-# =========================
-class ParsedTask(Dict[str, Any]):
-    pass
-
-
-def parse_tasks_context(tasks_context: str) -> List[ParsedTask]:
-    s = (tasks_context or "").strip()
-    if not s or "No active tasks" in s:
-        return []
-
-    # Split blocks by "#<num>"
-    blocks = re.split(r"(?m)^\s*#\d+\s*$", s)
-    tasks: List[ParsedTask] = []
-
-    for b in blocks:
-        b = b.strip()
-        if not b:
-            continue
-
-        def grab(pattern: str) -> Optional[str]:
-            m = re.search(pattern, b, flags=re.MULTILINE)
-            return m.group(1).strip() if m else None
-
-        title = grab(r"(?m)^\s*Title:\s*(.+)\s*$") or "Untitled"
-        details = grab(r"(?m)^\s*Details:\s*(.+)\s*$")
-        prio_raw = grab(r"(?m)^\s*PriorityScore:\s*(\d+)")
-        days_raw = grab(r"(?m)^\s*DaysUntilDue:\s*([-\d]+|null)\s*$")
-        start_raw = grab(r"(?m)^\s*Start:\s*(.+?)\s*\|\s*Due:\s*(.+)\s*$")
-        overdue_raw = grab(r"(?m)^\s*Overdue:\s*(yes|no)\s*$")
-
-        start_date = None
-        due_date = None
-        if start_raw:
-            # start_raw captured "Start: <x> | Due: <y>" as groups is hard;
-            # easier: re-find both
-            m2 = re.search(r"(?m)^\s*Start:\s*(.+?)\s*\|\s*Due:\s*(.+)\s*$", b)
-            if m2:
-                start_date = m2.group(1).strip()
-                due_date = m2.group(2).strip()
 
+async def _current_rules(n_results: int) -> List[Dict[str, Any]]:
+    if vector_store.ready and rules_snapshot.needs_check():
         try:
-            prio = int(prio_raw) if prio_raw is not None else 0
-        except:
-            prio = 0
+            await run_in_threadpool(rules_snapshot.refresh)
+        except Exception:
+            pass  # keep serving the last good snapshot (or no rules)
+    return list(rules_snapshot.value[:min(n_results, RULES_MAX_RESULTS)])
 
-        days_until_due: Optional[int] = None
-        if days_raw and days_raw != "null":
-            try:
-                days_until_due = int(days_raw)
-            except:
-                days_until_due = None
 
-        overdue = (overdue_raw == "yes") if overdue_raw else (days_until_due is not None and days_until_due < 0)
+async def _query_tasks(user_id: str, query_embedding: Any, n_results: int) -> Dict[str, Any]:
+    if shard_router is not None:
+        # the user's bucket only holds type=task docs of the users hashed to it
+        coll = shard_router.tasks(user_id)
+        where: Dict[str, Any] = {"userId": user_id}
+    else:
+        coll = vector_store.require()
+        where = _where_and(
+            {"module": {"$eq": "task-management"}},
+            {"type": {"$eq": "task"}},
+            {"userId": {"$eq": user_id}},
+        )
 
-        tasks.append(ParsedTask(
-            title=title,
-            details=details,
-            priority=prio,
-            daysUntilDue=days_until_due,
-            start=start_date,
-            due=due_date,
-            overdue=overdue,
-            raw=b
-        ))
+    version = task_index.doc_version(user_id)
+    entry = user_vectors.get(user_id, version)
+    if entry is MISS:
+        space = (coll.metadata or {}).get("hnsw:space", "l2")
 
-    # keep only tasks that have at least title
-    return tasks
+        def fetch(limit: int) -> Dict[str, Any]:
+            return coll.get(where=where, limit=limit, include=["documents", "metadatas", "embeddings"])
+
+        entry = await user_vectors_loads.do(
+            request_key(user_id, version),
+            lambda: run_in_threadpool(user_vectors.load, user_id, version, fetch, space),
+        )
+    exact = user_vectors.top_k(entry, query_embedding, n_results)
+    if exact is not None:
+        TASK_SEARCH_TOTAL.inc("exact")
+        return exact
+    TASK_SEARCH_TOTAL.inc("ann")
+    return await run_in_threadpool(coll.query, query_embeddings=[query_embedding], n_results=n_results, where=where)
 
 
 # =========================
-# Local “AI-like” reasoning (deterministic, no Ollama needed)
-# This is what makes it "intelligent but safe".
+# Intent detection (THIS is the key)
 # =========================
-def _sort_by_urgency(tasks: List[ParsedTask]) -> List[ParsedTask]:
-    # overdue first by most overdue, then due soon, then priority
-    def key(t: ParsedTask):
-        d = t.get("daysUntilDue", None)
-        pr = t.get("priority", 0)
-        # treat None due as far future
-        if d is None:
-            return (2, 9999, -pr)
-        if d < 0:
-            return (0, d, -pr)     # more negative = more overdue => earlier
-        return (1, d, -pr)
-    return sorted(tasks, key=key)
-
-
-def _pick_top3(tasks: List[ParsedTask]) -> List[ParsedTask]:
-    return _sort_by_urgency(tasks)[:3]
-
-
-def _reason_for_task(t: ParsedTask) -> str:
-    d = t.get("daysUntilDue", None)
-    pr = t.get("priority", 0)
-    overdue = t.get("overdue", False)
+# Phrase table + its one-pass regex live in intent_classifier.py; the embedding
+# nearest-neighbour fallback only runs for questions the table calls "other".
+# The fallback is off until benchmarks/bench_intent_classifier.py has measured
+# its accuracy column (needs the embedding model); INTENT_EMBEDDING_FALLBACK=1 turns it on.
+INTENT_EMBEDDING_FALLBACK = os.getenv("INTENT_EMBEDDING_FALLBACK", "0") == "1"
+INTENT_MIN_SIMILARITY = float(os.getenv("INTENT_MIN_SIMILARITY", "0.8"))
+
+intent_classifier = IntentClassifier(
+    table=DEFAULT_INTENT_TABLE,
+    examples=DEFAULT_INTENT_EXAMPLES,
+    embed_fn=lambda texts: _embed(texts),
+    min_similarity=INTENT_MIN_SIMILARITY,
+)
 
-    if d is None:
-        return "No due date set — set/confirm due date to avoid surprise deadlines."
-    if d < 0:
-        return f"Overdue by {abs(d)} day(s) — clearing it reduces backlog pressure."
-    if d == 0:
-        return "Due today — finish it to avoid becoming overdue."
-    if 1 <= d <= 3:
-        return f"Due in {d} day(s) — do early to keep buffer for unexpected issues."
-    if 4 <= d <= 7:
-        return f"Due in {d} day(s) — schedule a focused block this week."
-    return f"Due in {d} day(s) — lower urgency right now; plan ahead."
-
-
-def _suggested_plan(intent: str, selected: List[ParsedTask], all_tasks: List[ParsedTask]) -> List[str]:
-    overdue_tasks = [t for t in all_tasks if t.get("daysUntilDue") is not None and t["daysUntilDue"] < 0]
-    due_week = [t for t in all_tasks if t.get("daysUntilDue") is not None and 0 <= t["daysUntilDue"] <= 7]
-    later_tasks = [t for t in all_tasks if t.get("daysUntilDue") is not None and t["daysUntilDue"] > 7]
-
-    plan: List[str] = []
-    if intent == INTENT_CLEAR_OVERDUE:
-        if overdue_tasks:
-            plan.append(f"Finish **{overdue_tasks[0]['title']}** today (it’s the most overdue).")
-            if len(overdue_tasks) > 1:
-                plan.append("If time remains, start the next overdue item to stop backlog growing.")
-        else:
-            plan.append("No overdue tasks — use today to pre-finish the nearest due task.")
-        return plan
-
-    if intent == INTENT_PLAN_WEEK:
-        if overdue_tasks:
-            plan.append(f"Day 1: clear **{overdue_tasks[0]['title']}** first (overdue tasks come first).")
-        if due_week:
-            # pick 1-2 due soon
-            sorted_week = _sort_by_urgency(due_week)
-            if sorted_week:
-                plan.append(f"Book 1 focused block for **{sorted_week[0]['title']}** within the next 2–3 days.")
-            if len(sorted_week) > 1:
-                plan.append(f"Reserve another block later this week for **{sorted_week[1]['title']}**.")
-        else:
-            plan.append("No tasks due within 7 days — use this week to clear overdue work or set due dates/steps.")
-        return plan
-
-    if intent == INTENT_CAN_DELAY:
-        # tasks with due date > 7 days away or no due date + low priority
-        safe: List[ParsedTask] = []
-        for t in all_tasks:
-            d = t.get("daysUntilDue")
-            pr = t.get("priority", 0)
-            if d is None:
-                # no due date but very low priority
-                if pr <= 40:
-                    safe.append(t)
-            elif d > 7 and pr <= 80:
-                safe.append(t)
-        if not safe:
-            plan.append("Right now, there are no clearly safe tasks to delay — most items are close in due date or important.")
-        else:
-            safe_sorted = sorted(safe, key=lambda x: (x.get("daysUntilDue") or 9999, x.get("priority", 0)))
-            top_safe = safe_sorted[:5]
-            names = ", ".join([s['title'] for s in top_safe])
-            plan.append("You can consider delaying these lower‑impact tasks: " + names + ".")
-            plan.append("If you need more time this week, move them to later dates or keep them in a 'Later / Someday' list.")
-        return plan
-
-    # top today
-    if selected:
-        plan.append(f"Do **{selected[0]['title']}** first, then move to the next item if time allows.")
-        if len(selected) >= 2:
-            plan.append(f"If you finish early, start **{selected[1]['title']}** to reduce future pressure.")
-    else:
-        plan.append("No active tasks — add tasks with due dates so the assistant can prioritize accurately.")
-    return plan
-
-
-def answer_by_intent(intent: str, user_text: str, tasks: List[ParsedTask]) -> str:
-    total_active = len(tasks)
-    overdue_tasks = [t for t in tasks if t.get("daysUntilDue") is not None and t["daysUntilDue"] < 0]
-    due_week = [t for t in tasks if t.get("daysUntilDue") is not None and 0 <= t["daysUntilDue"] <= 7]
-    later_tasks = [t for t in tasks if t.get("daysUntilDue") is not None and t["daysUntilDue"] > 7]
-
-    if total_active == 0:
-        return "No active tasks found. Add tasks (with due dates) and ask again."
-
-    # Special: count overdue question
-    if intent == INTENT_COUNT_OVERDUE:
-        if overdue_tasks:
-            names = ", ".join([t["title"] for t in overdue_tasks[:3]])
-            return f"You have {len(overdue_tasks)} overdue task(s) out of {total_active} active task(s): {names}. Please do it ASAP."
-        return f"You have 0 overdue task(s) out of {total_active} active task(s). You're on track."
-
-    # For the main intents, use same safe format
-    top = _pick_top3(tasks)
-
-    lines: List[str] = []
-    # Immediate focus block (overdue + due today)
-    immediate = [t for t in tasks if t.get("daysUntilDue") is not None and t["daysUntilDue"] <= 0]
-    immediate = _sort_by_urgency(immediate)
-
-    lines.append("Immediate focus:")
-    if immediate:
-        t1 = immediate[0]
-        d = t1.get("daysUntilDue")
-        due = t1.get("due") or "-"
-        if d is not None and d < 0:
-            lines.append(f"1. {t1['title']} — overdue by {abs(d)} day(s) due on {due}. {_reason_for_task(t1)}")
-        elif d == 0:
-            lines.append(f"1. {t1['title']} — due today ({due}). {_reason_for_task(t1)}")
-        else:
-            lines.append(f"1. {t1['title']} — {_reason_for_task(t1)}")
-    else:
-        # if no overdue/due today, use top task as #1
-        t1 = top[0]
-        d = t1.get("daysUntilDue")
-        due = t1.get("due") or "-"
-        if d is None:
-            lines.append(f"1. {t1['title']} — no due date. {_reason_for_task(t1)}")
-        else:
-            lines.append(f"1. {t1['title']} — due in {d} day(s) due on {due}. {_reason_for_task(t1)}")
-
-    # This week block (also used for weekly schedule intent)
-    lines.append("")
-    if intent == INTENT_PLAN_WEEK:
-        lines.append("This week (suggested schedule):")
-    else:
-        lines.append("This week:")
-
-    week_sorted = _sort_by_urgency(due_week)
-    # exclude tasks already used as #1
-    used_title = immediate[0]["title"] if immediate else top[0]["title"]
-    week_sorted = [t for t in week_sorted if t["title"] != used_title]
-
-    if week_sorted:
-        # output up to 3 items (#2, #3, #4) with clearer schedule wording
-        for idx, t in enumerate(week_sorted[:3], start=2):
-            d = t.get("daysUntilDue")
-            due = t.get("due") or "-"
-            if d is None:
-                lines.append(f"{idx}. {t['title']} — no due date. {_reason_for_task(t)}")
-            else:
-                if intent == INTENT_PLAN_WEEK:
-                    when = "today" if d == 0 else f"in ~{d} day(s)"
-                    lines.append(
-                        f"{idx}. {t['title']} — schedule one focused block {when} (due on {due}). {_reason_for_task(t)}"
-                    )
-                else:
-                    lines.append(f"{idx}. {t['title']} — due in {d} day(s) due on {due}. {_reason_for_task(t)}")
-    else:
-        lines.append("No tasks due within the next 7 days. Use this time to clear overdue work or prepare ahead.")
 
-    # Suggested plan
-    plan = _suggested_plan(intent, top, tasks)
-    lines.append("")
-    lines.append("Suggested plan:")
-    for p in plan[:2]:
-        # keep it short and stable
-        lines.append(f"- {p}")
+def detect_intent(user_text: str) -> str:
+    return intent_classifier.classify(user_text).intent
+
 
-    return "\n".join(lines).strip()
+async def _detect_intent_with_fallback(user_text: str) -> str:
+    t0 = time.perf_counter()
+    intent = detect_intent(user_text)
+    # no waiting on the vector store here: while it loads, "other" goes to the LLM path as before
+    if intent == INTENT_OTHER and INTENT_EMBEDDING_FALLBACK and intent_classifier.has_fallback and vector_store.ready:
+        try:
+            intent = (await run_in_threadpool(intent_classifier.nearest, user_text)).intent
+            if intent != INTENT_OTHER:
+                FALLBACKS_TOTAL.inc("intent_embedding")
+        except Exception:
+            intent = INTENT_OTHER  # embedding model unavailable -> LLM path as before
+            FALLBACKS_TOTAL.inc("intent_embedding_error")
+    STAGE_SECONDS.observe(time.perf_counter() - t0, "intent")
+    return intent
 
 
 # =========================
 # Optional: fallback to Ollama for “other” questions
 # =========================
-def call_ollama(model: str, messages: List[Dict[str, str]], temperature: float, num_ctx: int, num_predict: int) -> str:
-    resp = requests.post(
-        OLLAMA_CHAT_URL,
-        json={
-            "model": model,
-            "messages": messages,
-            "options": {
-                "temperature": temperature,
-                "num_ctx": num_ctx,
-                "num_predict": num_predict,
-            },
-            "stream": False,
+def _ollama_body(model: str, messages: List[Dict[str, str]], temperature: float, num_ctx: int, num_predict: int, stream: bool) -> Dict[str, Any]:
+    return {
+        "model": model,
+        "messages": messages,
+        "options": {
+            "temperature": temperature,
+            "num_ctx": num_ctx,
+            "num_predict": num_predict,
         },
-        timeout=60,
-    )
-    resp.raise_for_status()
-    data = resp.json()
+        "stream": stream,
+        "keep_alive": OLLAMA_KEEP_ALIVE,
+    }
+
+
+async def _ollama_generate(body: Dict[str, Any]) -> str:
+    if ollama_http is None:
+        raise httpx.HTTPError("Ollama HTTP client is not started")
+    with model_router.track(body["model"]):
+        resp = await ollama_http.post(OLLAMA_CHAT_URL, json=body)
+        resp.raise_for_status()
+        data = resp.json()
     return ((data.get("message") or {}).get("content") or "").strip()
 
 
+def _timings(ticket: Ticket, generation_s: float) -> Dict[str, float]:
+    return {"queue_wait_ms": round(ticket.wait_s * 1000, 1), "generation_ms": round(generation_s * 1000, 1)}
+
+
+async def _admitted_generate(user_id: str, body: Dict[str, Any]) -> Tuple[str, Dict[str, float]]:
+    async with await llm_admission.acquire(user_id) as ticket:
+        STAGE_SECONDS.observe(ticket.wait_s, "llm_queue")
+        t0 = time.perf_counter()
+        answer = await _ollama_generate(body)
+    generation_s = time.perf_counter() - t0
+    STAGE_SECONDS.observe(generation_s, "llm_generation")
+    return answer, _timings(ticket, generation_s)
+
+
+# Identical concurrent generations (same model + options + messages) share one Ollama call
+# (and one admission slot, queued under the first caller's userId)
+ollama_single_flight = SingleFlight()
+
+
+async def call_ollama(
+    user_id: str, model: str, messages: List[Dict[str, str]], temperature: float, num_ctx: int, num_predict: int
+) -> Tuple[str, Dict[str, float]]:
+    """-> (answer, {"queue_wait_ms", "generation_ms"}); raises QueueFull if the LLM queue is full."""
+    body = _ollama_body(model, messages, temperature, num_ctx, num_predict, stream=False)
+    key = request_key(body["model"], body["options"], body["messages"])
+    return await ollama_single_flight.do(key, lambda: _admitted_generate(user_id, body))
+
+
+async def call_ollama_stream(model: str, messages: List[Dict[str, str]], temperature: float, num_ctx: int, num_predict: int) -> AsyncIterator[str]:
+    """Yield content deltas from Ollama's chunked (one JSON object per line) reply."""
+    if ollama_http is None:
+        raise httpx.HTTPError("Ollama HTTP client is not started")
+    with model_router.track(model):
+        async with ollama_http.stream(
+            "POST",
+            OLLAMA_CHAT_URL,
+            json=_ollama_body(model, messages, temperature, num_ctx, num_predict, stream=True),
+        ) as resp:
+            resp.raise_for_status()
+            async for line in resp.aiter_lines():
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                piece = (data.get("message") or {}).get("content") or ""
+                if piece:
+                    yield piece
+                if data.get("done"):
+                    break
+
+
 # =========================
-# Routes
+# chat_rag pipeline (shared by /chat_rag and /chat_rag/stream)
 # =========================
-@app.get("/health")
-def health():
-    return {"ok": True}
+LOCAL_INTENTS = (
+    INTENT_TOP_TODAY,
+    INTENT_PLAN_WEEK,
+    INTENT_CLEAR_OVERDUE,
+    INTENT_COUNT_OVERDUE,
+    INTENT_CAN_DELAY,
+)
+
+EMPTY_ANSWER_FALLBACK = "I couldn’t generate a reply. Try again with a more specific question."
+
+
+def _queue_full(e: QueueFull) -> HTTPException:
+    FALLBACKS_TOTAL.inc("queue_full")
+    return HTTPException(
+        status_code=429,
+        detail="AI assistant is busy, please retry shortly.",
+        headers={"Retry-After": str(e.retry_after_s)},
+    )
 
 
-@app.post("/chat_rag")
-def chat_rag(request: ChatRequest):
+def _validate_request(request: ChatRequest) -> Tuple[str, str]:
     if not request.userId or not request.userId.strip():
         raise HTTPException(status_code=400, detail="userId is required")
 
@@ -443,46 +552,100 @@ def chat_rag(request: ChatRequest):
     user_text = (request.text or "").strip()
     if not user_text:
         raise HTTPException(status_code=400, detail="text is required")
+    return user_id, user_text
 
-    # Parse tasksContext first (most reliable)
-    tasks = parse_tasks_context(request.tasksContext)
 
-    # Intent detection
-    intent = detect_intent(user_text)
+def _resync(server_version: int) -> HTTPException:
+    return HTTPException(status_code=409, detail={"resync": True, "serverVersion": server_version})
 
-    # If it's one of your main questions (or overdue count / can delay), answer locally (NO LLM needed)
-    if intent in (
-        INTENT_TOP_TODAY,
-        INTENT_PLAN_WEEK,
-        INTENT_CLEAR_OVERDUE,
-        INTENT_COUNT_OVERDUE,
-        INTENT_CAN_DELAY,
-    ):
+
+def _load_tasks(request: ChatRequest) -> List[ParsedTask]:
+    # Synced clients only send a version; v2 clients send typed tasks (no text round-trip);
+    # v1 clients send tasksContext text
+    t0 = time.perf_counter()
+    try:
+        if request.taskIndexVersion is not None:
+            try:
+                return task_index.tasks(request.userId.strip(), request.taskIndexVersion)
+            except VersionConflict as e:
+                FALLBACKS_TOTAL.inc("task_index_resync")
+                raise _resync(e.server_version)
+        if request.version >= 2 and request.tasks is not None:
+            return tasks_from_items(request.tasks)
+        return parse_tasks_context(request.tasksContext)
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - t0, "parse_tasks")
+
+
+def _local_cache_key(intent: str, tasks: List[ParsedTask]) -> Tuple[Tuple[str, str, str], str]:
+    """Same intent + same tasks on the same day => same answer -> (cache key, ETag)."""
+    today = date.today().isoformat()
+    fingerprint = tasks_fingerprint(tasks)
+    return (intent, fingerprint, today), answer_etag(intent, fingerprint, today)
+
+
+def _local_answer(intent: str, user_text: str, tasks: List[ParsedTask], cache_key: Tuple[str, str, str]) -> Dict[str, Any]:
+    payload = answer_cache.get(cache_key)
+    if payload is None:
         answer = answer_by_intent(intent, user_text, tasks)
-        return {
+        payload = {
             "intent": intent,
             "rules_results": [],
             "task_results": [],
             "model_answer": answer,
         }
+        answer_cache.put(cache_key, payload)
+    return payload
 
-    # Otherwise: keep your RAG + Ollama behavior (optional)
-    try:
-        rule_results = _query_rules(request.n_results)
-    except Exception:
-        rule_results = {"documents": [[]], "metadatas": [[]], "distances": [[]]}
 
-    try:
-        task_results = _query_tasks(user_id, user_text, request.n_results)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Chroma query failed: {e}")
+def _task_urgency(t: ParsedTask) -> Tuple[int, int, int]:
+    # same order as the local answers: overdue (most overdue first), then due soon, then no due date
+    d = t.get("daysUntilDue")
+    pr = t.get("priority", 0)
+    if d is None:
+        return (2, 9999, -pr)
+    return (0 if d < 0 else 1, d, -pr)
+
+
+async def _build_llm_context(
+    request: ChatRequest, user_id: str, user_text: str, tasks: List[ParsedTask]
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, str]]]:
+    """Chroma retrieval + prompt build for the Ollama path -> (rules, tasks, messages)."""
+    with STAGE_SECONDS.time("vector_store_wait"):
+        store_ready = await vector_store.wait(VECTOR_STORE_WAIT_S)
+
+    # Rules come from the in-memory snapshot (optional context -> "no rules" if unavailable)
+    with STAGE_SECONDS.time("chroma_rules"):
+        retrieved_rules = await _current_rules(request.n_results)
+
+    task_results: Dict[str, Any] = {}
+    if not store_ready:
+        # still loading (or failed): the prompt is built from the app's task list only
+        FALLBACKS_TOTAL.inc("vector_store_not_ready")
+    else:
+        try:
+            with STAGE_SECONDS.time("embed_query"):
+                text_emb = (await run_in_threadpool(_embed, [user_text]))[0]
+            with STAGE_SECONDS.time("chroma_tasks"):
+                task_results = await asyncio.wait_for(
+                    _query_tasks(user_id, text_emb, request.n_results),
+                    TASKS_QUERY_TIMEOUT_S,
+                )
+        except asyncio.TimeoutError:
+            FALLBACKS_TOTAL.inc("chroma_timeout")
+            raise HTTPException(status_code=504, detail="Chroma query timed out")
+        except Exception as e:
+            FALLBACKS_TOTAL.inc("chroma_error")
+            raise HTTPException(status_code=500, detail=f"Chroma query failed: {e}")
+
+    t0 = time.perf_counter()
 
-    retrieved_rules = _build_retrieved_payload(rule_results, preview_len=900)
     retrieved_tasks = _build_retrieved_payload(task_results, preview_len=1200)
 
-    rules_text = "\n".join([f"- {r['text_preview']}".strip() for r in retrieved_rules if r.get("text_preview")]) or "No rules found."
-    tasks_text = "\n\n".join([f"- {t['text_preview']}".strip() for t in retrieved_tasks if t.get("text_preview")]) or "No tasks found."
-    tasks_context_block = (request.tasksContext or "").strip() or "No TASKS_CONTEXT provided."
+    if request.taskIndexVersion is not None or (request.version >= 2 and request.tasks is not None):
+        task_blocks = [(_task_urgency(t), format_task_block(i, t)) for i, t in enumerate(tasks, start=1)]
+    else:
+        task_blocks = [((i,), b) for i, b in enumerate(split_task_blocks(request.tasksContext))]
 
     system = (
         "You are the in-app AI assistant for a task management module.\n"
@@ -492,41 +655,317 @@ def chat_rag(request: ChatRequest):
         "Return plain text.\n"
     )
 
-    messages = [{"role": "system", "content": system}]
     trimmed_history = request.history[-8:] if request.history else []
-    for m in trimmed_history:
-        if m.role in ("user", "assistant", "system") and m.content:
-            messages.append({"role": m.role, "content": m.content})
-
-    user_payload = (
-        "RULES:\n"
-        f"{rules_text}\n\n"
-        "TASKS_CONTEXT:\n"
-        f"{tasks_context_block}\n\n"
-        "TASKS (retrieved from Chroma):\n"
-        f"{tasks_text}\n\n"
-        "USER QUESTION:\n"
-        f"{user_text}\n"
+    history = [
+        {"role": m.role, "content": m.content}
+        for m in trimmed_history
+        if m.role in ("user", "assistant", "system") and m.content
+    ]
+
+    packed = pack_prompt(
+        system=system,
+        user_text=user_text,
+        rules=[r["text_preview"].strip() for r in retrieved_rules if r.get("text_preview")],
+        task_blocks=task_blocks,
+        retrieved=retrieved_tasks,
+        history=history,
+        budget=prompt_budget(request.num_ctx, request.num_predict, PROMPT_BUDGET_RATIO),
+    )
+    _log_sampled(
+        "prompt_packed",
+        tokens_before=packed.tokens_before,
+        tokens_after=packed.tokens_after,
+        budget=packed.budget,
+        num_ctx=request.num_ctx,
+        dropped=packed.dropped,
     )
-    messages.append({"role": "user", "content": user_payload})
+    messages = packed.messages
+    STAGE_SECONDS.observe(time.perf_counter() - t0, "prompt_build")
+    return retrieved_rules, retrieved_tasks, messages
+
+
+# =========================
+# Routes
+# =========================
+@router.get("/health")
+def health():
+    return {"ok": True}
+
+
+@router.get("/ready")
+def ready():
+    """Readiness: 200 once Chroma + the embedding model are loaded, 503 while starting or after a failed init."""
+    return JSONResponse({**vector_store.stats(), "layout": VECTOR_LAYOUT}, status_code=200 if vector_store.ready else 503)
+
+
+@router.get("/embedding_cache/stats")
+def embedding_cache_stats():
+    return embedding_cache.stats()
+
+
+@router.get("/user_vectors/stats")
+def user_vectors_stats():
+    return user_vectors.stats()
+
+
+@router.get("/ollama/single_flight/stats")
+def ollama_single_flight_stats():
+    return ollama_single_flight.stats()
+
+
+@router.get("/ollama/models/stats")
+def ollama_models_stats():
+    return model_router.stats()
+
+
+@router.get("/metrics")
+def metrics_endpoint():
+    return Response(content=metrics.render(), media_type=CONTENT_TYPE)
 
+
+@router.get("/ollama/admission/stats")
+def ollama_admission_stats():
+    return llm_admission.stats()
+
+
+@router.post("/tasks/sync")
+def tasks_sync(request: TaskSyncRequest):
+    """
+    Apply add/update/delete deltas to the user's task index.
+    baseVersion must be the server's current version (unless reset=True),
+    otherwise 409 {"resync": true, "serverVersion": n} -> client sends a full snapshot.
+    """
+    user_id = (request.userId or "").strip()
+    if not user_id:
+        raise HTTPException(status_code=400, detail="userId is required")
+    try:
+        version = task_index.apply(
+            user_id,
+            request.baseVersion,
+            upserts=[u.dict() for u in request.upserts],
+            deletes=request.deletes,
+            reset=request.reset,
+        )
+    except VersionConflict as e:
+        raise _resync(e.server_version)
+    return {"version": version}
+
+
+async def _ndjson_records(request: Request) -> AsyncIterator[Dict[str, Any]]:
+    """Validated TaskDocRecord dicts as the request body streams in."""
+    buf = b""
+    line_no = 0
+    async for chunk in request.stream():
+        buf += chunk
+        *lines, buf = buf.split(b"\n")
+        for line in lines:
+            line_no += 1
+            if line.strip():
+                yield _parse_record(line, line_no)
+    if buf.strip():
+        yield _parse_record(buf, line_no + 1)
+
+
+def _parse_record(line: bytes, line_no: int) -> Dict[str, Any]:
+    try:
+        return parse_record(line)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid task record on line {line_no}: {e}")
+
+
+def _load_task_docs(batch: List[Dict[str, Any]], stats: BulkStats) -> None:
+    try:
+        task_doc_loader.load_batch(batch, stats)
+    finally:
+        # even a half-written batch makes those users' cached matrices stale
+        task_index.bump_doc_versions(r["userId"] for r in batch)
+
+
+@router.post("/tasks/bulk_upsert")
+async def tasks_bulk_upsert(request: Request):
+    """
+    Body: NDJSON, one TaskDocRecord per line (task_docs.py; see Insert_Tasks.py).
+    Records are loaded in batches while the body is still streaming; unchanged
+    documents (same content hash) are not re-embedded, completed ones are deleted.
+    """
+    if not await vector_store.wait(VECTOR_STORE_WAIT_S) or task_doc_loader is None:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Vector store is {vector_store.status}",
+            headers={"Retry-After": "5"},
+        )
+    stats = BulkStats()
+    batch: List[Dict[str, Any]] = []
     try:
-        answer = call_ollama(
-            model=request.model,
+        async for record in _ndjson_records(request):
+            batch.append(record)
+            if len(batch) >= task_doc_loader.batch_size:
+                await run_in_threadpool(_load_task_docs, batch, stats)
+                batch = []
+        if batch:
+            await run_in_threadpool(_load_task_docs, batch, stats)
+    except HTTPException as e:
+        raise HTTPException(status_code=e.status_code, detail={"error": e.detail, **stats.as_dict()})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail={"error": f"Chroma upsert failed: {e}", **stats.as_dict()})
+    return stats.as_dict()
+
+
+def _json_response(payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> Response:
+    # serialized here (not by FastAPI) so the "serialize" stage can be measured
+    t0 = time.perf_counter()
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    STAGE_SECONDS.observe(time.perf_counter() - t0, "serialize")
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.post("/chat_rag")
+async def chat_rag(request: ChatRequest, if_none_match: Optional[str] = Header(None)):
+    user_id, user_text = _validate_request(request)
+
+    # Parse tasks first (most reliable)
+    tasks = _load_tasks(request)
+
+    # Intent detection
+    intent = await _detect_intent_with_fallback(user_text)
+
+    # If it's one of your main questions (or overdue count / can delay), answer locally (NO LLM needed)
+    if intent in LOCAL_INTENTS:
+        cache_key, etag = _local_cache_key(intent, tasks)
+        if if_none_match and etag in [v.strip() for v in if_none_match.split(",")]:
+            REQUESTS_TOTAL.inc(intent, "not_modified")
+            return Response(status_code=304, headers={"ETag": etag})
+        REQUESTS_TOTAL.inc(intent, "local")
+        return _json_response(_local_answer(intent, user_text, tasks, cache_key), headers={"ETag": etag})
+
+    # Otherwise: keep your RAG + Ollama behavior (optional)
+    REQUESTS_TOTAL.inc(intent, "llm")
+    retrieved_rules, retrieved_tasks, messages = await _build_llm_context(request, user_id, user_text, tasks)
+    model = model_router.choose(request.model)
+
+    try:
+        answer, timings = await call_ollama(
+            user_id=user_id,
+            model=model,
             messages=messages,
             temperature=request.temperature,
             num_ctx=request.num_ctx,
             num_predict=request.num_predict,
         )
-    except requests.RequestException as e:
+    except QueueFull as e:
+        raise _queue_full(e)
+    except httpx.HTTPError as e:
+        FALLBACKS_TOTAL.inc("ollama_error")
         raise HTTPException(status_code=502, detail=f"Ollama call failed: {e}")
 
     if not answer or len(answer) < 10:
-        answer = "I couldn’t generate a reply. Try again with a more specific question."
+        FALLBACKS_TOTAL.inc("empty_answer")
+        answer = EMPTY_ANSWER_FALLBACK
 
-    return {
+    return _json_response({
         "intent": intent,
         "rules_results": retrieved_rules,
         "task_results": retrieved_tasks,
         "model_answer": answer,
-    }
+        "model": model,
+        "timings": timings,
+    })
+
+
+def _ndjson(event: Dict[str, Any]) -> str:
+    return json.dumps(event, ensure_ascii=False) + "\n"
+
+
+@router.post("/chat_rag/stream")
+async def chat_rag_stream(request: ChatRequest):
+    """
+    Same pipeline as /chat_rag, streamed as NDJSON (one JSON event per line):
+      {"type": "meta", "intent", "rules_results", "task_results", "model"}
+      {"type": "delta", "content": "..."}   (repeated, Ollama tokens as they arrive)
+      {"type": "done", "intent", "model_answer", "model", "timings"}
+    ("model"/"timings" only on the Ollama path: the model that actually answered,
+    queue wait and generation time). A full LLM queue answers 429 before streaming.
+    or {"type": "error", "detail": "..."} if Ollama fails mid-stream.
+    """
+    user_id, user_text = _validate_request(request)
+    tasks = _load_tasks(request)
+    intent = await _detect_intent_with_fallback(user_text)
+
+    if intent in LOCAL_INTENTS:
+        cache_key, _etag = _local_cache_key(intent, tasks)
+        payload = _local_answer(intent, user_text, tasks, cache_key)
+        REQUESTS_TOTAL.inc(intent, "stream_local")
+
+        async def local_events():
+            yield _ndjson({"type": "meta", "intent": intent, "rules_results": [], "task_results": []})
+            yield _ndjson({"type": "delta", "content": payload["model_answer"]})
+            yield _ndjson({"type": "done", "intent": intent, "model_answer": payload["model_answer"]})
+
+        return StreamingResponse(local_events(), media_type="application/x-ndjson")
+
+    retrieved_rules, retrieved_tasks, messages = await _build_llm_context(request, user_id, user_text, tasks)
+    REQUESTS_TOTAL.inc(intent, "stream_llm")
+    model = model_router.choose(request.model)
+    try:
+        ticket = await llm_admission.acquire(user_id)
+    except QueueFull as e:
+        raise _queue_full(e)
+    STAGE_SECONDS.observe(ticket.wait_s, "llm_queue")
+
+    async def llm_events():
+        yield _ndjson({
+            "type": "meta",
+            "intent": intent,
+            "rules_results": retrieved_rules,
+            "task_results": retrieved_tasks,
+            "model": model,
+        })
+        parts: List[str] = []
+        t0 = time.perf_counter()
+        try:
+            async for piece in call_ollama_stream(
+                model=model,
+                messages=messages,
+                temperature=request.temperature,
+                num_ctx=request.num_ctx,
+                num_predict=request.num_predict,
+            ):
+                parts.append(piece)
+                yield _ndjson({"type": "delta", "content": piece})
+        except (httpx.HTTPError, ValueError) as e:
+            FALLBACKS_TOTAL.inc("ollama_error")
+            yield _ndjson({"type": "error", "detail": f"Ollama call failed: {e}"})
+            return
+        finally:
+            ticket.release()
+        generation_s = time.perf_counter() - t0
+        STAGE_SECONDS.observe(generation_s, "llm_generation")
+        timings = _timings(ticket, generation_s)
+
+        answer = "".join(parts).strip()
+        if not answer or len(answer) < 10:
+            FALLBACKS_TOTAL.inc("empty_answer")
+            answer = EMPTY_ANSWER_FALLBACK
+        yield _ndjson({"type": "done", "intent": intent, "model_answer": answer, "model": model, "timings": timings})
+
+    async def release_slot():
+        # async so it runs on the event loop (admission state is not thread-safe);
+        # covers a client that disconnects before the body starts
+        ticket.release()
+
+    return StreamingResponse(llm_events(), media_type="application/x-ndjson", background=BackgroundTask(release_slot))
+
+
+# =========================
+# Standalone app: uvicorn api:app --port 8001
+# =========================
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],  # ok for dev
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=["ETag"],
+)
+app.include_router(router)
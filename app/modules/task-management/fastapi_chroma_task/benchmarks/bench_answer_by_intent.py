@@ -0,0 +1,272 @@
+"""
+Benchmark: TaskTable-based answer_by_intent vs the old filter/sort implementation.
+
+Run from the fastapi_chroma_task folder:
+    python benchmarks/bench_answer_by_intent.py
+
+For 10k / 50k / 100k generated tasks and every local intent it checks the
+answer is byte-identical to the old implementation, then prints timings.
+"""
+import os
+import random
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from intent_answers import answer_by_intent  # noqa: E402
+from intent_classifier import (  # noqa: E402
+    INTENT_CAN_DELAY,
+    INTENT_CLEAR_OVERDUE,
+    INTENT_COUNT_OVERDUE,
+    INTENT_PLAN_WEEK,
+    INTENT_TOP_TODAY,
+)
+from tasks_context import ParsedTask  # noqa: E402
+
+SIZES = [10_000, 50_000, 100_000]
+INTENTS = [INTENT_TOP_TODAY, INTENT_PLAN_WEEK, INTENT_CLEAR_OVERDUE, INTENT_COUNT_OVERDUE, INTENT_CAN_DELAY]
+REPEATS = 3
+
+
+# =========================
+# Old implementation (reference for byte-identical output)
+# =========================
+def legacy_sort_by_urgency(tasks: List[ParsedTask]) -> List[ParsedTask]:
+    # overdue first by most overdue, then due soon, then priority
+    def key(t: ParsedTask):
+        d = t.get("daysUntilDue", None)
+        pr = t.get("priority", 0)
+        # treat None due as far future
+        if d is None:
+            return (2, 9999, -pr)
+        if d < 0:
+            return (0, d, -pr)     # more negative = more overdue => earlier
+        return (1, d, -pr)
+    return sorted(tasks, key=key)
+
+
+def legacy_pick_top3(tasks: List[ParsedTask]) -> List[ParsedTask]:
+    return legacy_sort_by_urgency(tasks)[:3]
+
+
+def legacy_reason_for_task(t: ParsedTask) -> str:
+    d = t.get("daysUntilDue", None)
+    pr = t.get("priority", 0)
+    overdue = t.get("overdue", False)
+
+    if d is None:
+        return "No due date set — set/confirm due date to avoid surprise deadlines."
+    if d < 0:
+        return f"Overdue by {abs(d)} day(s) — clearing it reduces backlog pressure."
+    if d == 0:
+        return "Due today — finish it to avoid becoming overdue."
+    if 1 <= d <= 3:
+        return f"Due in {d} day(s) — do early to keep buffer for unexpected issues."
+    if 4 <= d <= 7:
+        return f"Due in {d} day(s) — schedule a focused block this week."
+    return f"Due in {d} day(s) — lower urgency right now; plan ahead."
+
+
+def legacy_suggested_plan(intent: str, selected: List[ParsedTask], all_tasks: List[ParsedTask]) -> List[str]:
+    overdue_tasks = [t for t in all_tasks if t.get("daysUntilDue") is not None and t["daysUntilDue"] < 0]
+    due_week = [t for t in all_tasks if t.get("daysUntilDue") is not None and 0 <= t["daysUntilDue"] <= 7]
+    later_tasks = [t for t in all_tasks if t.get("daysUntilDue") is not None and t["daysUntilDue"] > 7]
+
+    plan: List[str] = []
+    if intent == INTENT_CLEAR_OVERDUE:
+        if overdue_tasks:
+            plan.append(f"Finish **{overdue_tasks[0]['title']}** today (it’s the most overdue).")
+            if len(overdue_tasks) > 1:
+                plan.append("If time remains, start the next overdue item to stop backlog growing.")
+        else:
+            plan.append("No overdue tasks — use today to pre-finish the nearest due task.")
+        return plan
+
+    if intent == INTENT_PLAN_WEEK:
+        if overdue_tasks:
+            plan.append(f"Day 1: clear **{overdue_tasks[0]['title']}** first (overdue tasks come first).")
+        if due_week:
+            # pick 1-2 due soon
+            sorted_week = legacy_sort_by_urgency(due_week)
+            if sorted_week:
+                plan.append(f"Book 1 focused block for **{sorted_week[0]['title']}** within the next 2–3 days.")
+            if len(sorted_week) > 1:
+                plan.append(f"Reserve another block later this week for **{sorted_week[1]['title']}**.")
+        else:
+            plan.append("No tasks due within 7 days — use this week to clear overdue work or set due dates/steps.")
+        return plan
+
+    if intent == INTENT_CAN_DELAY:
+        # tasks with due date > 7 days away or no due date + low priority
+        safe: List[ParsedTask] = []
+        for t in all_tasks:
+            d = t.get("daysUntilDue")
+            pr = t.get("priority", 0)
+            if d is None:
+                # no due date but very low priority
+                if pr <= 40:
+                    safe.append(t)
+            elif d > 7 and pr <= 80:
+                safe.append(t)
+        if not safe:
+            plan.append("Right now, there are no clearly safe tasks to delay — most items are close in due date or important.")
+        else:
+            safe_sorted = sorted(safe, key=lambda x: (x.get("daysUntilDue") or 9999, x.get("priority", 0)))
+            top_safe = safe_sorted[:5]
+            names = ", ".join([s['title'] for s in top_safe])
+            plan.append("You can consider delaying these lower‑impact tasks: " + names + ".")
+            plan.append("If you need more time this week, move them to later dates or keep them in a 'Later / Someday' list.")
+        return plan
+
+    # top today
+    if selected:
+        plan.append(f"Do **{selected[0]['title']}** first, then move to the next item if time allows.")
+        if len(selected) >= 2:
+            plan.append(f"If you finish early, start **{selected[1]['title']}** to reduce future pressure.")
+    else:
+        plan.append("No active tasks — add tasks with due dates so the assistant can prioritize accurately.")
+    return plan
+
+
+def legacy_answer_by_intent(intent: str, user_text: str, tasks: List[ParsedTask]) -> str:
+    total_active = len(tasks)
+    overdue_tasks = [t for t in tasks if t.get("daysUntilDue") is not None and t["daysUntilDue"] < 0]
+    due_week = [t for t in tasks if t.get("daysUntilDue") is not None and 0 <= t["daysUntilDue"] <= 7]
+    later_tasks = [t for t in tasks if t.get("daysUntilDue") is not None and t["daysUntilDue"] > 7]
+
+    if total_active == 0:
+        return "No active tasks found. Add tasks (with due dates) and ask again."
+
+    # Special: count overdue question
+    if intent == INTENT_COUNT_OVERDUE:
+        if overdue_tasks:
+            names = ", ".join([t["title"] for t in overdue_tasks[:3]])
+            return f"You have {len(overdue_tasks)} overdue task(s) out of {total_active} active task(s): {names}. Please do it ASAP."
+        return f"You have 0 overdue task(s) out of {total_active} active task(s). You're on track."
+
+    # For the main intents, use same safe format
+    top = legacy_pick_top3(tasks)
+
+    lines: List[str] = []
+    # Immediate focus block (overdue + due today)
+    immediate = [t for t in tasks if t.get("daysUntilDue") is not None and t["daysUntilDue"] <= 0]
+    immediate = legacy_sort_by_urgency(immediate)
+
+    lines.append("Immediate focus:")
+    if immediate:
+        t1 = immediate[0]
+        d = t1.get("daysUntilDue")
+        due = t1.get("due") or "-"
+        if d is not None and d < 0:
+            lines.append(f"1. {t1['title']} — overdue by {abs(d)} day(s) due on {due}. {legacy_reason_for_task(t1)}")
+        elif d == 0:
+            lines.append(f"1. {t1['title']} — due today ({due}). {legacy_reason_for_task(t1)}")
+        else:
+            lines.append(f"1. {t1['title']} — {legacy_reason_for_task(t1)}")
+    else:
+        # if no overdue/due today, use top task as #1
+        t1 = top[0]
+        d = t1.get("daysUntilDue")
+        due = t1.get("due") or "-"
+        if d is None:
+            lines.append(f"1. {t1['title']} — no due date. {legacy_reason_for_task(t1)}")
+        else:
+            lines.append(f"1. {t1['title']} — due in {d} day(s) due on {due}. {legacy_reason_for_task(t1)}")
+
+    # This week block (also used for weekly schedule intent)
+    lines.append("")
+    if intent == INTENT_PLAN_WEEK:
+        lines.append("This week (suggested schedule):")
+    else:
+        lines.append("This week:")
+
+    week_sorted = legacy_sort_by_urgency(due_week)
+    # exclude tasks already used as #1
+    used_title = immediate[0]["title"] if immediate else top[0]["title"]
+    week_sorted = [t for t in week_sorted if t["title"] != used_title]
+
+    if week_sorted:
+        # output up to 3 items (#2, #3, #4) with clearer schedule wording
+        for idx, t in enumerate(week_sorted[:3], start=2):
+            d = t.get("daysUntilDue")
+            due = t.get("due") or "-"
+            if d is None:
+                lines.append(f"{idx}. {t['title']} — no due date. {legacy_reason_for_task(t)}")
+            else:
+                if intent == INTENT_PLAN_WEEK:
+                    when = "today" if d == 0 else f"in ~{d} day(s)"
+                    lines.append(
+                        f"{idx}. {t['title']} — schedule one focused block {when} (due on {due}). {legacy_reason_for_task(t)}"
+                    )
+                else:
+                    lines.append(f"{idx}. {t['title']} — due in {d} day(s) due on {due}. {legacy_reason_for_task(t)}")
+    else:
+        lines.append("No tasks due within the next 7 days. Use this time to clear overdue work or prepare ahead.")
+
+    # Suggested plan
+    plan = legacy_suggested_plan(intent, top, tasks)
+    lines.append("")
+    lines.append("Suggested plan:")
+    for p in plan[:2]:
+        # keep it short and stable
+        lines.append(f"- {p}")
+
+    return "\n".join(lines).strip()
+
+
+def make_tasks(n: int, seed: int = 3) -> List[ParsedTask]:
+    rnd = random.Random(seed)
+    tasks = []
+    for i in range(n):
+        days = rnd.choice([None, rnd.randint(-20, 40)])
+        tasks.append(ParsedTask(
+            title=f"Task {rnd.randint(0, n // 2)}",  # duplicate titles on purpose
+            details=None,
+            priority=rnd.randint(0, 100),
+            daysUntilDue=days,
+            start=None,
+            due=None if rnd.random() < 0.1 else f"{rnd.randint(1, 28):02d}/12/2025",
+            overdue=days is not None and days < 0,
+            raw=None,
+        ))
+    return tasks
+
+
+def _best_of(fn, *args) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def _check_small_cases() -> None:
+    # edge cases: empty, all without due date, only overdue, only this week
+    rnd = random.Random(11)
+    for n in range(0, 40):
+        for _ in range(30):
+            tasks = make_tasks(n, seed=rnd.randint(0, 10**6))
+            for intent in INTENTS:
+                if answer_by_intent(intent, "", tasks) != legacy_answer_by_intent(intent, "", tasks):
+                    raise SystemExit(f"❌ Output mismatch for {n} tasks, intent {intent}")
+
+
+def main() -> None:
+    _check_small_cases()
+    print(f"{'tasks':>8} {'intent':<14} {'old ms':>9} {'table ms':>9} {'speedup':>8}")
+    for n in SIZES:
+        tasks = make_tasks(n)
+        for intent in INTENTS:
+            if answer_by_intent(intent, "", tasks) != legacy_answer_by_intent(intent, "", tasks):
+                raise SystemExit(f"❌ Output mismatch at {n} tasks, intent {intent}")
+            old_s = _best_of(legacy_answer_by_intent, intent, "", tasks)
+            new_s = _best_of(answer_by_intent, intent, "", tasks)
+            print(f"{n:>8} {intent:<14} {old_s * 1000:>9.2f} {new_s * 1000:>9.2f} {old_s / new_s:>7.1f}x")
+    print("✅ Byte-identical answers for all sizes and intents")
+
+
+if __name__ == "__main__":
+    main()
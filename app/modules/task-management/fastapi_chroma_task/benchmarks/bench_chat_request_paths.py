@@ -0,0 +1,107 @@
+"""
+Benchmark: /chat_rag with v1 text tasksContext vs v2 typed `tasks` payload.
+
+Run from the fastapi_chroma_task folder (needs fastapi + chromadb installed):
+    python benchmarks/bench_chat_request_paths.py
+
+Both bodies describe the same tasks and use a deterministic intent, so the
+request goes through JSON decode, validation, task loading and
+answer_by_intent end to end (no Chroma / Ollama involved).
+v1 carries the "TASK" block text the app builds (buildTasksContextForAI in
+useAIAssistant.ts). Both bodies are serialized the same way, compact like the
+app's JSON.stringify, so the byte columns compare payload shape only.
+The answer cache is cleared before every request (outside the timing), so
+each one pays for the full path, not a cache hit.
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, HERE)
+
+# api.py opens ./vectordb at import time -> keep the benchmark away from the real DB
+os.chdir(tempfile.mkdtemp(prefix="bench_vectordb_"))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import api  # noqa: E402
+
+SIZES = [30, 300, 3_000]
+REQUESTS = 50
+QUESTION = "What are the top 3 tasks I should do today?"
+
+
+def make_task_items(n: int, seed: int = 7):
+    rnd = random.Random(seed)
+    items = []
+    for i in range(1, n + 1):
+        days = rnd.choice([None, rnd.randint(-10, 30)])
+        items.append({
+            "title": f"Task {i} {rnd.choice(['essay', 'lab report', 'quiz prep'])}",
+            "priority": rnd.randint(0, 100),
+            "daysUntilDue": days,
+            "start": f"0{rnd.randint(1, 9)}/12/2025",
+            "due": f"{rnd.randint(10, 28)}/12/2025",
+            "overdue": days is not None and days < 0,
+        })
+    return items
+
+
+def client_tasks_context(items) -> str:
+    """buildTasksContextForAI() of useAIAssistant.ts for the same items."""
+    return "\n".join(
+        "TASK\n"
+        f"Title: {it['title']}\n"
+        f"Details: {it.get('details') or '-'}\n"
+        f"DaysUntilDue: {'null' if it['daysUntilDue'] is None else it['daysUntilDue']}\n"
+        f"PriorityScore: {it['priority']}\n"
+        f"Start: {it['start'] or '-'}\n"
+        f"Due: {it['due'] or '-'}\n"
+        for it in items
+    )
+
+
+def _run(client: TestClient, body: bytes):
+    best = float("inf")
+    answer = None
+    for _ in range(REQUESTS):
+        api.answer_cache.clear()
+        t0 = time.perf_counter()
+        resp = client.post("/chat_rag", content=body, headers={"Content-Type": "application/json"})
+        best = min(best, time.perf_counter() - t0)
+        resp.raise_for_status()
+        answer = resp.json()["model_answer"]
+    return best, answer
+
+
+def main() -> None:
+    client = TestClient(api.app)
+    print(f"{'tasks':>7} {'v1 bytes':>10} {'v2 bytes':>10} {'v1 ms':>8} {'v2 ms':>8}")
+    for n in SIZES:
+        items = make_task_items(n)
+        base = {"text": QUESTION, "userId": "bench-user"}
+
+        v1 = dict(base, tasksContext=client_tasks_context(items))
+        v2 = dict(base, version=2, tasks=items)
+        v1_body = json.dumps(v1, separators=(",", ":")).encode("utf-8")
+        v2_body = json.dumps(v2, separators=(",", ":")).encode("utf-8")
+
+        v1_s, v1_answer = _run(client, v1_body)
+        v2_s, v2_answer = _run(client, v2_body)
+        if v1_answer != v2_answer:
+            raise SystemExit(f"❌ Answers differ at {n} tasks")
+        parsed = len(api.parse_tasks_context(v1["tasksContext"]))
+        if parsed != n:
+            raise SystemExit(f"❌ v1 text parsed as {parsed} task(s) of {n}")
+
+        print(f"{n:>7} {len(v1_body):>10} {len(v2_body):>10} {v1_s * 1000:>8.2f} {v2_s * 1000:>8.2f}")
+
+    print("✅ Same model_answer for both request shapes")
+
+
+if __name__ == "__main__":
+    main()
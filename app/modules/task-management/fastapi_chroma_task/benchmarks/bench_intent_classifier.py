@@ -0,0 +1,201 @@
+"""
+Benchmark + accuracy table: old detect_intent if-chain vs the table-driven
+IntentClassifier (with and without the embedding nearest-neighbour fallback).
+
+Run from the fastapi_chroma_task folder:
+    python benchmarks/bench_intent_classifier.py
+
+The embedding column needs chromadb and its default ONNX model; it is
+skipped (with the reason) if either is missing. api.py keeps the fallback
+off (INTENT_EMBEDDING_FALLBACK) until this column has been measured.
+
+Also checks that the one-pass matcher decides exactly like the if-chain on
+random phrase mixes (overlapping / nested phrases included), and times it
+against a linear `in` scan as the phrase table grows.
+"""
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from intent_classifier import (  # noqa: E402
+    DEFAULT_INTENT_EXAMPLES,
+    INTENT_CAN_DELAY,
+    INTENT_CLEAR_OVERDUE,
+    INTENT_COUNT_OVERDUE,
+    INTENT_OTHER,
+    INTENT_PLAN_WEEK,
+    INTENT_TOP_TODAY,
+    IntentClassifier,
+    IntentRule,
+)
+
+LOOPS = 20_000
+FUZZ = 50_000
+TABLE_SIZES = [100, 400, 1_600]  # extra phrases on top of the default table
+
+# Hand-labelled questions (not the fallback examples)
+LABELLED = [
+    ("What are the top 3 tasks I should do today?", INTENT_TOP_TODAY),
+    ("What should I do today?", INTENT_TOP_TODAY),
+    ("Most urgent today?", INTENT_TOP_TODAY),
+    ("Top priorities for today please", INTENT_TOP_TODAY),
+    ("What do I need to focus on right now?", INTENT_TOP_TODAY),
+    ("Which task matters most this morning?", INTENT_TOP_TODAY),
+    ("Plan my week", INTENT_PLAN_WEEK),
+    ("Give me a weekly schedule", INTENT_PLAN_WEEK),
+    ("How should I schedule over the next 7 days?", INTENT_PLAN_WEEK),
+    ("Can you build a plan for this week?", INTENT_PLAN_WEEK),
+    ("Organise the coming days for me", INTENT_PLAN_WEEK),
+    ("Which overdue tasks should I clear first?", INTENT_CLEAR_OVERDUE),
+    ("Help me finish my overdue work", INTENT_CLEAR_OVERDUE),
+    ("I am behind on deadlines, what do I fix first?", INTENT_CLEAR_OVERDUE),
+    ("Which late tasks should I do first?", INTENT_CLEAR_OVERDUE),
+    ("How many tasks are overdue?", INTENT_COUNT_OVERDUE),
+    ("Count my overdue tasks", INTENT_COUNT_OVERDUE),
+    ("How many tasks are late?", INTENT_COUNT_OVERDUE),
+    ("Number of tasks past due?", INTENT_COUNT_OVERDUE),
+    ("Which tasks can I delay?", INTENT_CAN_DELAY),
+    ("What can I postpone?", INTENT_CAN_DELAY),
+    ("Which tasks can wait?", INTENT_CAN_DELAY),
+    ("What can I push back to next week?", INTENT_CAN_DELAY),
+    ("Anything I can leave for later?", INTENT_CAN_DELAY),
+    ("Summarise how my semester is going", INTENT_OTHER),
+    ("Explain what PriorityScore means", INTENT_OTHER),
+    ("Write a motivational quote", INTENT_OTHER),
+    ("How do I add a new task?", INTENT_OTHER),
+]
+
+
+def old_detect_intent(user_text: str) -> str:
+    t = (user_text or "").strip().lower()
+    if ("how many" in t or "count" in t) and "overdue" in t:
+        return INTENT_COUNT_OVERDUE
+    if "overdue" in t and ("clear" in t or "finish" in t or "first" in t or "which" in t):
+        return INTENT_CLEAR_OVERDUE
+    if ("next 7 days" in t) or ("plan my week" in t) or ("schedule over the next" in t) or ("weekly schedule" in t):
+        return INTENT_PLAN_WEEK
+    if ("can i delay" in t) or ("which tasks can i delay" in t) or ("what can i delay" in t) or ("postpone" in t) or ("can wait" in t):
+        return INTENT_CAN_DELAY
+    if ("top" in t and "today" in t) or ("what should i do today" in t) or ("most urgent today" in t):
+        return INTENT_TOP_TODAY
+    return INTENT_OTHER
+
+
+def linear_classify(table, user_text: str) -> str:
+    """The table walked with one `in` test per phrase (what classify did before the one-pass regex)."""
+    t = (user_text or "").strip().lower()
+    for rule in table:
+        for group in rule.groups:
+            if not any(p in t for p in group):
+                break
+        else:
+            return rule.intent
+    return INTENT_OTHER
+
+
+def _time_us(fn) -> float:
+    texts = [q for q, _ in LABELLED]
+    best = float("inf")
+    for _ in range(5):
+        t0 = time.perf_counter()
+        for i in range(LOOPS):
+            fn(texts[i % len(texts)])
+        best = min(best, (time.perf_counter() - t0) / LOOPS * 1e6)
+    return best
+
+
+def _fuzz_mismatches(classifier: IntentClassifier, seed: int = 7) -> int:
+    rnd = random.Random(seed)
+    phrases = sorted({p for rule in classifier.table for group in rule.groups for p in group})
+    pool = phrases + ["s", "t", "o", "h", " ", "x", "to", "ow", "?"]
+    bad = 0
+    for _ in range(FUZZ):
+        text = "".join(rnd.choice(pool) for _ in range(rnd.randint(1, 6)))
+        bad += classifier.classify(text).intent != old_detect_intent(text)
+    return bad
+
+
+def _bigger_table(extra: int, seed: int = 3):
+    """Default rules + `extra` phrases that never occur in the questions (worst case for a linear scan)."""
+    rnd = random.Random(seed)
+    words = ["".join(rnd.choice("bcdfgjkqvxz") for _ in range(rnd.randint(4, 9))) for _ in range(extra)]
+    rules = list(IntentClassifier().table)
+    for i in range(0, extra, 4):
+        rules.append(IntentRule(f"extra_{i}", 100 + i, (tuple(words[i:i + 4]),)))
+    return rules
+
+
+def _embedding_classifier():
+    """(classifier, None) or (None, why the embedding column is skipped)."""
+    try:
+        from chromadb.utils import embedding_functions
+    except ImportError:
+        return None, "chromadb not installed"
+    ef = embedding_functions.DefaultEmbeddingFunction()
+    try:
+        ef(["warm up"])  # loads (or downloads) the ONNX model
+    except Exception as e:
+        return None, f"embedding model unavailable: {type(e).__name__}: {e}"
+    return IntentClassifier(examples=DEFAULT_INTENT_EXAMPLES, embed_fn=ef), None
+
+
+def main() -> None:
+    table = IntentClassifier()
+    with_emb, skipped = _embedding_classifier()
+
+    def table_then_embedding(q: str) -> str:
+        intent = table.classify(q).intent
+        if intent == INTENT_OTHER and with_emb is not None:
+            intent = with_emb.nearest(q).intent
+        return intent
+
+    columns = [("if-chain", old_detect_intent), ("table", lambda q: table.classify(q).intent)]
+    if with_emb is not None:
+        columns.append(("table+emb", table_then_embedding))
+
+    # ---- accuracy table ----
+    per_intent = defaultdict(lambda: defaultdict(int))
+    totals = defaultdict(int)
+    for q, expected in LABELLED:
+        per_intent[expected]["n"] += 1
+        for name, fn in columns:
+            ok = fn(q) == expected
+            per_intent[expected][name] += ok
+            totals[name] += ok
+
+    header = f"{'intent':<15} {'n':>3} " + " ".join(f"{name:>10}" for name, _ in columns)
+    print(header)
+    print("-" * len(header))
+    for intent, row in per_intent.items():
+        print(f"{intent:<15} {row['n']:>3} " + " ".join(f"{row[name]:>10}" for name, _ in columns))
+    print("-" * len(header))
+    n = len(LABELLED)
+    print(f"{'accuracy':<15} {n:>3} " + " ".join(f"{totals[name] / n:>10.0%}" for name, _ in columns))
+    if with_emb is None:
+        print(f"({skipped} -> embedding fallback column skipped)")
+
+    # ---- same decisions as the if-chain ----
+    bad = _fuzz_mismatches(table)
+    print(("✅" if not bad else "❌") + f" one-pass vs if-chain on {FUZZ} random phrase mixes: {bad} differ")
+
+    # ---- speed (table path only, the per-request cost) ----
+    print()
+    print(f"if-chain:        {_time_us(old_detect_intent):.2f} µs/question")
+    print(f"linear `in`:     {_time_us(lambda q: linear_classify(table.table, q)):.2f} µs/question")
+    print(f"one-pass regex:  {_time_us(table.classify):.2f} µs/question")
+
+    print()
+    print(f"{'phrases':>8} {'linear_us':>10} {'one_pass_us':>12}")
+    for extra in TABLE_SIZES:
+        big = IntentClassifier(table=_bigger_table(extra))
+        n_phrases = len({p for rule in big.table for group in rule.groups for p in group})
+        linear_us = _time_us(lambda q: linear_classify(big.table, q))
+        print(f"{n_phrases:>8} {linear_us:>10.2f} {_time_us(big.classify):>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
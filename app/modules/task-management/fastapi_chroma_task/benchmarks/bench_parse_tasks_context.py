@@ -0,0 +1,171 @@
+"""
+Benchmark: parse_tasks_context (single-pass) vs the old split + re.search parser.
+
+Run from the fastapi_chroma_task folder:
+    python benchmarks/bench_parse_tasks_context.py
+
+It generates tasksContext strings with 100 / 1k / 10k tasks, some with empty
+fields ("Details: " as the app sends for details == ""), then prints the timings.
+
+Output is NOT identical to the old parser when a field is empty: its `\s*`
+after "Key:" crossed the newline, so "Details: \nDaysUntilDue: 3" gave
+details="DaysUntilDue: 3" (Title and PriorityScore the same way). The
+single-pass parser reads a field from its own line only (empty -> None, or a
+later non-empty line of the same key). The check is against the old parser
+with its patterns held to one line (same_line=True); the tasks where the
+real old parser differs are counted.
+"""
+import os
+import random
+import re
+import sys
+import time
+from typing import List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tasks_context import ParsedTask, parse_tasks_context  # noqa: E402
+
+SIZES = [100, 1_000, 10_000]
+REPEATS = 5
+
+
+# =========================
+# Old implementation (reference for identical output)
+# =========================
+# after "Key:" the old patterns used \s*, which also matches newlines
+_LEGACY_PATTERNS = {
+    "title": r"(?m)^\s*Title:\s*(.+)\s*$",
+    "details": r"(?m)^\s*Details:\s*(.+)\s*$",
+    "prio": r"(?m)^\s*PriorityScore:\s*(\d+)",
+    "days": r"(?m)^\s*DaysUntilDue:\s*([-\d]+|null)\s*$",
+    "start": r"(?m)^\s*Start:\s*(.+?)\s*\|\s*Due:\s*(.+)\s*$",
+    "overdue": r"(?m)^\s*Overdue:\s*(yes|no)\s*$",
+}
+_SAME_LINE_PATTERNS = {
+    "title": r"(?m)^\s*Title:[ \t]*(\S.*)\s*$",
+    "details": r"(?m)^\s*Details:[ \t]*(\S.*)\s*$",
+    "prio": r"(?m)^\s*PriorityScore:[ \t]*(\d+)",
+    "days": r"(?m)^\s*DaysUntilDue:[ \t]*([-\d]+|null)[ \t]*$",
+    "start": r"(?m)^\s*Start:[ \t]*(\S.*?)[ \t]*\|[ \t]*Due:[ \t]*(\S.*)\s*$",
+    "overdue": r"(?m)^\s*Overdue:[ \t]*(yes|no)[ \t]*$",
+}
+
+
+def legacy_parse_tasks_context(tasks_context: str, same_line: bool = False) -> List[ParsedTask]:
+    patterns = _SAME_LINE_PATTERNS if same_line else _LEGACY_PATTERNS
+    s = (tasks_context or "").strip()
+    if not s or "No active tasks" in s:
+        return []
+
+    blocks = re.split(r"(?m)^\s*#\d+\s*$", s)
+    tasks: List[ParsedTask] = []
+
+    for b in blocks:
+        b = b.strip()
+        if not b:
+            continue
+
+        def grab(pattern: str) -> Optional[str]:
+            m = re.search(pattern, b, flags=re.MULTILINE)
+            return m.group(1).strip() if m else None
+
+        title = grab(patterns["title"]) or "Untitled"
+        details = grab(patterns["details"])
+        prio_raw = grab(patterns["prio"])
+        days_raw = grab(patterns["days"])
+        start_raw = grab(patterns["start"])
+        overdue_raw = grab(patterns["overdue"])
+
+        start_date = None
+        due_date = None
+        if start_raw:
+            m2 = re.search(patterns["start"], b)
+            if m2:
+                start_date = m2.group(1).strip()
+                due_date = m2.group(2).strip()
+
+        try:
+            prio = int(prio_raw) if prio_raw is not None else 0
+        except:
+            prio = 0
+
+        days_until_due: Optional[int] = None
+        if days_raw and days_raw != "null":
+            try:
+                days_until_due = int(days_raw)
+            except:
+                days_until_due = None
+
+        overdue = (overdue_raw == "yes") if overdue_raw else (days_until_due is not None and days_until_due < 0)
+
+        tasks.append(ParsedTask(
+            title=title,
+            details=details,
+            priority=prio,
+            daysUntilDue=days_until_due,
+            start=start_date,
+            due=due_date,
+            overdue=overdue,
+            raw=b
+        ))
+
+    return tasks
+
+
+# =========================
+# Synthetic tasksContext
+# =========================
+def make_tasks_context(n: int, seed: int = 42, empty_rate: float = 0.1) -> str:
+    rnd = random.Random(seed)
+
+    def field(key: str, value: str) -> str:
+        # empty_rate of the Title/Details/PriorityScore lines have no value
+        return f"{key}: " if rnd.random() < empty_rate else f"{key}: {value}"
+
+    blocks = []
+    for i in range(1, n + 1):
+        days = rnd.choice([None, rnd.randint(-10, 30)])
+        lines = [
+            f"#{i}",
+            field("Title", f"Task {i} {rnd.choice(['essay', 'lab report', 'quiz prep', 'group meeting'])}"),
+            field("Details", rnd.choice(['-', 'chapter 3', 'submit on portal'])),
+            field("PriorityScore", str(rnd.randint(0, 100))),
+            f"DaysUntilDue: {'null' if days is None else days}",
+            f"Start: 0{rnd.randint(1, 9)}/12/2025 | Due: {rnd.randint(10, 28)}/12/2025",
+        ]
+        if rnd.random() < 0.5:
+            lines.append(f"Overdue: {'yes' if days is not None and days < 0 else 'no'}")
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks)
+
+
+def _best_of(fn, arg) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        t0 = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    print(f"{'tasks':>8} {'legacy ms':>11} {'single-pass ms':>15} {'speedup':>8} {'differ':>7}")
+    for n in SIZES:
+        ctx = make_tasks_context(n)
+
+        got = parse_tasks_context(ctx)
+        if got != legacy_parse_tasks_context(ctx, same_line=True):
+            raise SystemExit(f"❌ Output mismatch at {n} tasks")
+        differ = sum(a != b for a, b in zip(got, legacy_parse_tasks_context(ctx)))
+
+        old_s = _best_of(legacy_parse_tasks_context, ctx)
+        new_s = _best_of(parse_tasks_context, ctx)
+        print(f"{n:>8} {old_s * 1000:>11.2f} {new_s * 1000:>15.2f} {old_s / new_s:>7.1f}x {differ:>7}")
+
+    print("✅ Same output as the legacy parser held to one line per field")
+    print("   differ = tasks where the legacy parser read an empty field from the next line")
+
+
+if __name__ == "__main__":
+    main()
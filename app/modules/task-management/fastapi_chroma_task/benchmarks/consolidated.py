@@ -0,0 +1,181 @@
+"""
+RSS and startup time: task + money as two processes vs fastapi_chroma_all (one process).
+
+Run from the fastapi_chroma_task folder (needs fastapi, uvicorn, httpx, chromadb; Linux for RSS):
+    python benchmarks/consolidated.py
+    python benchmarks/consolidated.py --runs 5
+    python benchmarks/consolidated.py --stub-embedder
+
+ready_s = spawn -> every /ready answers 200 (Chroma open + embedding model loaded).
+rss_mb  = resident memory of the server process(es) right after that, and again
+after a few /search_vectors requests (query embedding + Chroma search).
+rss_mb first = the same right after the first /ready answer of any kind, before
+the store has loaded; the only RSS column left when the store fails (e.g. the
+ONNX model cannot be downloaded), in which case ready_s prints "failed";
+--stub-embedder runs both setups on benchmarks/stub_embedder.py instead (same
+shape and cost range, no download), so the shared-vs-separate model RSS
+difference can still be measured.
+Both setups open temp copies of the services' vectordb folders.
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT = os.path.abspath(os.path.join(HERE, "..", "..", "..", ".."))
+MONEY_DIR = os.path.join(ROOT, "fastapi_chroma_Money")
+ALL_DIR = os.path.join(ROOT, "fastapi_chroma_all")
+sys.path.insert(0, os.path.join(HERE, "benchmarks"))
+
+import stub_embedder  # noqa: E402
+
+TASK_PORT = 8051
+MONEY_PORT = 8052
+ALL_PORT = 8053
+TIMEOUT_S = 180.0
+
+
+def rss_mb(pid: int) -> float:
+    try:
+        with open(f"/proc/{pid}/status", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return float("nan")
+
+
+def _spawn(cwd: str, port: int, env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api:app", "--port", str(port), "--log-level", "warning"],
+        cwd=cwd,
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+def _first_answer(ports: List[int], t0: float) -> None:
+    pending = set(ports)
+    while pending and time.perf_counter() - t0 < TIMEOUT_S:
+        for port in list(pending):
+            try:
+                httpx.get(f"http://127.0.0.1:{port}/ready", timeout=2.0)
+                pending.discard(port)
+            except httpx.HTTPError:
+                pass
+        time.sleep(0.02)
+    if pending:
+        raise SystemExit(f"❌ ports {sorted(pending)} not answering after {TIMEOUT_S}s")
+
+
+def _store_error(body: dict) -> Optional[str]:
+    # fastapi_chroma_all nests one stats dict per store under its name
+    for stats in [body, *(v for v in body.values() if isinstance(v, dict))]:
+        if stats.get("status") == "failed":
+            return stats.get("error") or "failed"
+    return None
+
+
+def _wait_ready(ports: List[int], t0: float) -> Tuple[Optional[float], Optional[str]]:
+    """(seconds until every /ready is 200, None) or (None, error) once a store reports failed."""
+    pending = set(ports)
+    while pending and time.perf_counter() - t0 < TIMEOUT_S:
+        for port in list(pending):
+            try:
+                resp = httpx.get(f"http://127.0.0.1:{port}/ready", timeout=2.0)
+                if resp.status_code == 200:
+                    pending.discard(port)
+                elif _store_error(resp.json()):
+                    return None, _store_error(resp.json())
+            except (httpx.HTTPError, ValueError):
+                pass
+        time.sleep(0.05)
+    if pending:
+        raise SystemExit(f"❌ ports {sorted(pending)} not ready after {TIMEOUT_S}s")
+    return time.perf_counter() - t0, None
+
+
+def _retrieve(money_port: int) -> None:
+    # query embedding + Chroma search (the task retrieval path needs Ollama behind it)
+    for text in ("weekly budget", "cut food spending", "emergency fund"):
+        httpx.post(f"http://127.0.0.1:{money_port}/search_vectors", json={"text": text}, timeout=60.0)
+
+
+def measure(setup: str, env: dict) -> Tuple[float, Optional[float], Optional[float], Optional[float], Optional[str]]:
+    t0 = time.perf_counter()
+    if setup == "separate":
+        procs = [_spawn(HERE, TASK_PORT, env), _spawn(MONEY_DIR, MONEY_PORT, env)]
+        ports, money_port = [TASK_PORT, MONEY_PORT], MONEY_PORT
+    else:
+        procs = [_spawn(ALL_DIR, ALL_PORT, env)]
+        ports, money_port = [ALL_PORT], ALL_PORT
+    try:
+        _first_answer(ports, t0)
+        rss_first = sum(rss_mb(p.pid) for p in procs)
+        ready_s, error = _wait_ready(ports, t0)
+        if ready_s is None:
+            return rss_first, None, None, None, error
+        rss_ready = sum(rss_mb(p.pid) for p in procs)
+        _retrieve(money_port)
+        rss_used = sum(rss_mb(p.pid) for p in procs)
+        return rss_first, ready_s, rss_ready, rss_used, None
+    finally:
+        for p in procs:
+            p.terminate()
+            p.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--stub-embedder", action="store_true", help="stand-in ONNX model (no download)")
+    args = parser.parse_args()
+
+    state_dir = tempfile.mkdtemp(prefix="consolidated_")
+    task_db = os.path.join(state_dir, "task_vectordb")
+    money_db = os.path.join(state_dir, "money_vectordb")
+    shutil.copytree(os.path.join(HERE, "vectordb"), task_db)
+    shutil.copytree(os.path.join(MONEY_DIR, "vectordb"), money_db)
+    env = dict(
+        os.environ,
+        TASK_VECTORDB_PATH=task_db,
+        MONEY_VECTORDB_PATH=money_db,
+        EMBEDDING_CACHE_DIR=os.path.join(state_dir, "embedding_cache"),
+        TASK_INDEX_PATH=os.path.join(state_dir, "task_index.sqlite3"),
+    )
+    if args.stub_embedder:
+        env["HOME"] = os.path.join(state_dir, "home")
+        stub_embedder.install(env["HOME"])
+
+    print(f"{'setup':<10} {'rss_mb first':>13} {'ready_s':>8} {'rss_mb ready':>13} {'rss_mb used':>12}"
+          f"   (median of {args.runs}, {'stub' if args.stub_embedder else 'real'} embedding model)")
+    for setup in ("separate", "combined"):
+        runs: Dict[str, List[float]] = {"rss_first": [], "ready": [], "rss_ready": [], "rss_used": []}
+        error = None
+        for _ in range(args.runs):
+            rss_first, ready_s, rss_ready, rss_used, error = measure(setup, env)
+            runs["rss_first"].append(rss_first)
+            if ready_s is not None:
+                runs["ready"].append(ready_s)
+                runs["rss_ready"].append(rss_ready)
+                runs["rss_used"].append(rss_used)
+        med = {k: statistics.median(v) for k, v in runs.items() if v}
+        if "ready" in med:
+            print(f"{setup:<10} {med['rss_first']:>13.1f} {med['ready']:>8.2f} {med['rss_ready']:>13.1f} {med['rss_used']:>12.1f}")
+        else:
+            print(f"{setup:<10} {med['rss_first']:>13.1f} {'failed':>8} {'-':>13} {'-':>12}")
+        if error:
+            print(f"   ❌ store failed: {error}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Fixed-concurrency load driver for /chat_rag (task service) and
+/search_rag_model (money service), against the fake Ollama.
+
+Run from the fastapi_chroma_task folder (needs fastapi, uvicorn, httpx, chromadb):
+    python benchmarks/drive_load.py
+    python benchmarks/drive_load.py --concurrency 1 8 32 --requests 400 --latency 2 --tokens-per-s 15
+
+Starts benchmarks/ollama_stub.py, the task API and the money API with uvicorn,
+then for every concurrency level keeps exactly N requests in flight until
+--requests have completed. Task requests cycle through synthetic.QUESTIONS
+(every intent, "other" goes to the stub) with synthetic v2 task lists; money
+requests alternate between the typed v2 summary (buildAiSummary(), what
+FinancialAdvice.tsx sends) and v1 buildAiPrompt() texts (older clients).
+Reports throughput and p50/p95/p99 latency per intent, plus non-200 counts
+(e.g. 429 from the LLM queue). Both APIs open temp copies of their vectordb,
+so the repo's own are never migrated or written.
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+import httpx
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MONEY_DIR = os.path.abspath(os.path.join(HERE, "..", "..", "..", "..", "fastapi_chroma_Money"))
+sys.path.insert(0, os.path.join(HERE, "benchmarks"))
+
+from synthetic import QUESTIONS, make_money_prompt, make_money_summary, make_task_items  # noqa: E402
+
+STUB_PORT = 11436
+TASK_PORT = 8021
+MONEY_PORT = 8022
+SEED = 7
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return float("nan")
+    idx = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[idx]
+
+
+def _start(module: str, port: int, cwd: str, env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", f"{module}:app", "--port", str(port), "--log-level", "warning"],
+        cwd=cwd,
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+async def _wait_up(client: httpx.AsyncClient, url: str) -> None:
+    for _ in range(300):
+        try:
+            await client.get(url)
+            return
+        except httpx.HTTPError:
+            await asyncio.sleep(0.1)
+    raise SystemExit(f"❌ {url} did not start")
+
+
+def _requests(n: int) -> List[Tuple[str, str, dict]]:
+    """(label, url, json body) for n requests, deterministic mix."""
+    task_lists = [make_task_items(30, seed=SEED + i) for i in range(50)]
+    prompts = [make_money_prompt(seed=SEED + i) for i in range(50)]
+    summaries = [make_money_summary(seed=SEED + i) for i in range(50)]
+    out = []
+    for i in range(n):
+        if i % 8 == 3:
+            out.append(("money_v1", f"http://127.0.0.1:{MONEY_PORT}/search_rag_model",
+                        {"text": prompts[i % len(prompts)], "n_results": 3}))
+            continue
+        if i % 8 == 7:
+            out.append(("money_v2", f"http://127.0.0.1:{MONEY_PORT}/search_rag_model",
+                        {"version": 2, "summary": summaries[i % len(summaries)], "n_results": 3}))
+            continue
+        question, intent = QUESTIONS[i % len(QUESTIONS)]
+        if intent == "other":
+            question = f"{question} (#{i})"  # distinct prompts -> no single-flight sharing
+        out.append((intent, f"http://127.0.0.1:{TASK_PORT}/chat_rag", {
+            "text": question,
+            "userId": f"bench-user-{i % 20}",
+            "version": 2,
+            "tasks": task_lists[i % len(task_lists)],
+        }))
+    return out
+
+
+async def run_level(concurrency: int, total: int) -> None:
+    work = _requests(total)
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+    next_i = 0
+
+    limits = httpx.Limits(max_connections=concurrency + 4)
+    async with httpx.AsyncClient(timeout=180.0, limits=limits) as client:
+        async def worker() -> None:
+            nonlocal next_i
+            while next_i < len(work):
+                label, url, body = work[next_i]
+                next_i += 1
+                t0 = time.perf_counter()
+                try:
+                    r = await client.post(url, json=body)
+                    status = r.status_code
+                except httpx.HTTPError:
+                    status = -1
+                ms = (time.perf_counter() - t0) * 1000
+                if status == 200:
+                    latencies[label].append(ms)
+                else:
+                    errors[label][status] += 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        wall = time.perf_counter() - t0
+
+    ok = sum(len(v) for v in latencies.values())
+    print(f"\n=== concurrency {concurrency}: {total} requests in {wall:.2f}s -> {ok / wall:.1f} ok req/s ===")
+    print(f"{'intent':<15} {'ok':>5} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  non-200")
+    for label in sorted(set(latencies) | set(errors)):
+        vals = sorted(latencies[label])
+        bad = ", ".join(f"{code}x{n}" for code, n in sorted(errors[label].items())) or "-"
+        print(
+            f"{label:<15} {len(vals):>5} {len(vals) / wall:>8.1f} {percentile(vals, 0.50):>9.2f} "
+            f"{percentile(vals, 0.95):>9.2f} {percentile(vals, 0.99):>9.2f}  {bad}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=240, help="requests per concurrency level")
+    parser.add_argument("--latency", type=float, default=1.0, help="stub prefill seconds")
+    parser.add_argument("--tokens-per-s", type=float, default=20.0, help="stub generation rate")
+    args = parser.parse_args()
+
+    state_dir = tempfile.mkdtemp(prefix="drive_load_")
+    task_db = os.path.join(state_dir, "task_vectordb")
+    money_db = os.path.join(state_dir, "money_vectordb")
+    shutil.copytree(os.path.join(HERE, "vectordb"), task_db)
+    shutil.copytree(os.path.join(MONEY_DIR, "vectordb"), money_db)
+    env = dict(
+        os.environ,
+        STUB_LATENCY_S=str(args.latency),
+        STUB_TOKENS_PER_S=str(args.tokens_per_s),
+        OLLAMA_CHAT_URL=f"http://127.0.0.1:{STUB_PORT}/api/chat",
+        EMBEDDING_CACHE_DIR=os.path.join(state_dir, "embedding_cache"),
+        TASK_INDEX_PATH=os.path.join(state_dir, "task_index.sqlite3"),
+        TASK_VECTORDB_PATH=task_db,
+        MONEY_VECTORDB_PATH=money_db,
+    )
+    procs = [
+        _start("ollama_stub", STUB_PORT, os.path.join(HERE, "benchmarks"), env),
+        _start("api", TASK_PORT, HERE, env),
+        _start("api", MONEY_PORT, MONEY_DIR, dict(env, EMBEDDING_CACHE_DIR=os.path.join(state_dir, "money_cache"))),
+    ]
+
+    async def wait_all() -> None:
+        async with httpx.AsyncClient() as client:
+            await _wait_up(client, f"http://127.0.0.1:{STUB_PORT}/docs")
+            await _wait_up(client, f"http://127.0.0.1:{TASK_PORT}/health")
+            await _wait_up(client, f"http://127.0.0.1:{MONEY_PORT}/")
+
+    try:
+        asyncio.run(wait_all())
+        print(f"stub: prefill {args.latency}s, {args.tokens_per_s} tokens/s")
+        for c in args.concurrency:
+            asyncio.run(run_level(c, args.requests))
+    finally:
+        for p in procs:
+            p.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Per-user task search: exact NumPy top-k (user_vectors.py) vs Chroma's filtered
+HNSW query, by number of docs the user has. EXACT_SEARCH_MAX_DOCS should stay
+at or below the crossover (if any size reaches one) and within the memory
+budget: one user's matrix is docs * 384 * 4 bytes (~15 MB at 10000 docs).
+
+Run from the fastapi_chroma_task folder (needs numpy; chromadb for the ANN column):
+    python benchmarks/exact_vs_ann.py
+    python benchmarks/exact_vs_ann.py --sizes 50 200 1000 --others 20000
+    python benchmarks/exact_vs_ann.py --exact-only      # no chromadb needed
+
+The user's docs sit in one collection next to --others other users' docs (the
+my_data layout, queried like _query_tasks with the $and filter). Random unit
+384-d embeddings; nothing is embedded, only the search is timed.
+  exact      cached matrix, per query (what a warm request pays)
+  load       collection.get of the user's docs + matrix build (once per write to the user's docs)
+  ann        collection.query with where userId, n_results=5
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, HERE)
+
+from user_vectors import UserVectors  # noqa: E402
+
+DIM = 384
+N_RESULTS = 5
+BATCH = 5000
+SEED = 42
+USER_ID = "bench-user"
+
+
+def _vectors(rng: np.random.Generator, n: int) -> np.ndarray:
+    v = rng.standard_normal((n, DIM)).astype(np.float32)
+    v /= np.linalg.norm(v, axis=1, keepdims=True)
+    return v
+
+
+def _page(n: int, rng: np.random.Generator) -> Dict[str, Any]:
+    return {
+        "ids": [f"task::{USER_ID}::{i}" for i in range(n)],
+        "documents": ["task"] * n,
+        "metadatas": [{"module": "task-management", "type": "task", "userId": USER_ID}] * n,
+        "embeddings": _vectors(rng, n),
+    }
+
+
+def _median_ms(fn: Callable[[], Any], loops: int) -> float:
+    fn()  # warm up
+    times: List[float] = []
+    for _ in range(loops):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(times)
+
+
+def _where(user_id: str) -> Dict[str, Any]:
+    return {"$and": [
+        {"module": {"$eq": "task-management"}},
+        {"type": {"$eq": "task"}},
+        {"userId": {"$eq": user_id}},
+    ]}
+
+
+def _fill(coll: Any, page: Dict[str, Any]) -> None:
+    n = len(page["ids"])
+    for i in range(0, n, BATCH):
+        coll.add(
+            ids=page["ids"][i:i + BATCH],
+            documents=page["documents"][i:i + BATCH],
+            metadatas=page["metadatas"][i:i + BATCH],
+            embeddings=page["embeddings"][i:i + BATCH].tolist(),
+        )
+
+
+def run(sizes: List[int], others: int, loops: int, exact_only: bool) -> None:
+    rng = np.random.default_rng(SEED)
+    queries = _vectors(rng, loops + 1)
+    q_iter = iter(range(10 ** 9))
+
+    def next_q() -> np.ndarray:
+        return queries[next(q_iter) % len(queries)]
+
+    client: Optional[Any] = None
+    path = None
+    if not exact_only:
+        import chromadb
+
+        path = tempfile.mkdtemp(prefix="exact_vs_ann_")
+        client = chromadb.PersistentClient(path=path)
+
+    print(f"{'docs':>6} {'exact_ms':>9} {'load_ms':>9} {'ann_ms':>9}   (median of {loops}; {others} other users' docs)")
+    crossover = None
+    try:
+        for n in sizes:
+            page = _page(n, rng)
+            uv = UserVectors(max_docs=max(sizes))
+            exact_ms = _median_ms(lambda: uv.search(USER_ID, lambda _limit: page, next_q(), N_RESULTS), loops)
+
+            ann_ms = load_ms = float("nan")
+            if client is not None:
+                coll = client.create_collection(name=f"bench_{n}")
+                others_page = {
+                    "ids": [f"task::other{i % 1000}::{i}" for i in range(others)],
+                    "documents": ["task"] * others,
+                    "metadatas": [{"module": "task-management", "type": "task", "userId": f"other{i % 1000}"} for i in range(others)],
+                    "embeddings": _vectors(rng, others),
+                }
+                _fill(coll, others_page)
+                _fill(coll, page)
+
+                def fetch(limit: int) -> Dict[str, Any]:
+                    return coll.get(where=_where(USER_ID), limit=limit, include=["documents", "metadatas", "embeddings"])
+
+                def load() -> None:
+                    uv.clear()
+                    uv.search(USER_ID, fetch, next_q(), N_RESULTS)
+
+                load_ms = _median_ms(load, max(5, loops // 10))
+                ann_ms = _median_ms(
+                    lambda: coll.query(query_embeddings=[next_q().tolist()], n_results=N_RESULTS, where=_where(USER_ID)),
+                    loops,
+                )
+                if exact_ms < ann_ms:
+                    crossover = n
+            print(f"{n:>6} {exact_ms:>9.3f} {load_ms:>9.2f} {ann_ms:>9.3f}")
+    finally:
+        if path:
+            shutil.rmtree(path, ignore_errors=True)
+
+    if client is not None:
+        if crossover is None:
+            print("❌ exact search was slower than the ANN query at every size")
+        elif crossover == max(sizes):
+            mb = crossover * DIM * 4 / 1024 / 1024
+            print(f"(ok) exact search still wins at the largest size ({crossover} docs): no crossover found, "
+                  f"the cap is memory-bound ({mb:.0f} MB per user at {crossover} docs)")
+        else:
+            print(f"✅ exact search wins up to {crossover} docs -> EXACT_SEARCH_MAX_DOCS={crossover}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 100, 250, 500, 1000, 2000, 5000, 10000])
+    parser.add_argument("--others", type=int, default=30_000, help="other users' docs in the collection")
+    parser.add_argument("--loops", type=int, default=200)
+    parser.add_argument("--exact-only", action="store_true", help="skip Chroma (load/ann columns)")
+    args = parser.parse_args()
+    run(args.sizes, args.others, args.loops, args.exact_only)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Load test: deterministic intents must stay fast while many LLM requests are in flight.
+
+Run from the fastapi_chroma_task folder (needs fastapi, uvicorn, httpx, chromadb):
+    python benchmarks/load_chat_rag.py
+
+Starts benchmarks/ollama_stub.py and api.py with uvicorn, fires LLM_REQUESTS
+"other"-intent requests at once (each held STUB_LATENCY_S by the stub), and
+while they are pending measures a series of deterministic-intent requests.
+Then fires IDENTICAL_REQUESTS copies of the same LLM request to show
+single-flight coalescing (one stub generation shared by all of them).
+LLM_MAX_CONCURRENT / LLM_MAX_QUEUE are raised for the API so the admission
+queue (default 16) does not answer most of the burst with 429; rejected
+requests are counted and fail the run. The API opens a temp copy of ./vectordb.
+"""
+import asyncio
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUB_PORT = 11435
+API_PORT = 8011
+API_URL = f"http://127.0.0.1:{API_PORT}"
+
+LLM_REQUESTS = 60
+DETERMINISTIC_REQUESTS = 40
+IDENTICAL_REQUESTS = 30
+STUB_LATENCY_S = 5.0
+
+TASKS = [
+    {"title": "Lab report", "priority": 80, "daysUntilDue": -1, "due": "01/12/2025"},
+    {"title": "Essay draft", "priority": 60, "daysUntilDue": 2, "due": "04/12/2025"},
+    {"title": "Quiz prep", "priority": 40, "daysUntilDue": 9, "due": "11/12/2025"},
+]
+
+
+def _start(module: str, port: int, cwd: str, env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", f"{module}:app", "--port", str(port), "--log-level", "warning"],
+        cwd=cwd,
+        env=env,
+    )
+
+
+async def _wait_up(client: httpx.AsyncClient, url: str) -> None:
+    for _ in range(200):
+        try:
+            await client.get(url)
+            return
+        except httpx.HTTPError:
+            await asyncio.sleep(0.1)
+    raise SystemExit(f"❌ {url} did not start")
+
+
+def _body(text: str, i: int) -> dict:
+    return {"text": text, "userId": f"load-user-{i}", "version": 2, "tasks": TASKS}
+
+
+async def _run() -> None:
+    limits = httpx.Limits(max_connections=LLM_REQUESTS + 10)
+    async with httpx.AsyncClient(base_url=API_URL, timeout=120.0, limits=limits) as client:
+        await _wait_up(client, "/health")
+
+        t0 = time.perf_counter()
+        llm = [
+            asyncio.create_task(client.post("/chat_rag", json=_body(f"Summarise how my semester is going ({i})", i)))
+            for i in range(LLM_REQUESTS)
+        ]
+        await asyncio.sleep(0.5)  # let the LLM requests reach the stub
+
+        latencies = []
+        for i in range(DETERMINISTIC_REQUESTS):
+            s = time.perf_counter()
+            r = await client.post("/chat_rag", json=_body("What are the top 3 tasks I should do today?", i))
+            r.raise_for_status()
+            latencies.append((time.perf_counter() - s) * 1000)
+        pending = sum(1 for t in llm if not t.done())
+
+        results = await asyncio.gather(*llm)
+        llm_wall = time.perf_counter() - t0
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"LLM requests: {LLM_REQUESTS} (still pending during deterministic run: {pending})")
+    rejected = sum(r.status_code == 429 for r in results)
+    print(f"LLM wall time: {llm_wall:.2f}s, ok: {sum(r.status_code == 200 for r in results)}, 429: {rejected}")
+    if rejected:
+        raise SystemExit(f"❌ {rejected} LLM requests rejected by the admission queue (raise LLM_MAX_QUEUE)")
+    print(f"Deterministic latency ms: p50={statistics.median(latencies):.2f} p95={p95:.2f} max={latencies[-1]:.2f}")
+
+    async with httpx.AsyncClient(base_url=API_URL, timeout=120.0, limits=limits) as client:
+        before = (await client.get("/ollama/single_flight/stats")).json()
+        t0 = time.perf_counter()
+        same = await asyncio.gather(*[
+            client.post("/chat_rag", json=_body("Summarise how my semester is going", 0))
+            for _ in range(IDENTICAL_REQUESTS)
+        ])
+        wall = time.perf_counter() - t0
+        after = (await client.get("/ollama/single_flight/stats")).json()
+    print(
+        f"Identical LLM requests: {IDENTICAL_REQUESTS} in {wall:.2f}s, ok: {sum(r.status_code == 200 for r in same)}, "
+        f"Ollama generations: {after['started'] - before['started']}, joined: {after['joined'] - before['joined']}"
+    )
+
+
+def main() -> None:
+    state_dir = tempfile.mkdtemp(prefix="load_chat_rag_")
+    db_dir = os.path.join(state_dir, "vectordb")
+    shutil.copytree(os.path.join(HERE, "vectordb"), db_dir)
+    env = dict(
+        os.environ,
+        STUB_LATENCY_S=str(STUB_LATENCY_S),
+        OLLAMA_CHAT_URL=f"http://127.0.0.1:{STUB_PORT}/api/chat",
+        # the whole burst is admitted (same as multi_worker.py)
+        LLM_MAX_CONCURRENT=str(LLM_REQUESTS),
+        LLM_MAX_QUEUE=str(LLM_REQUESTS + IDENTICAL_REQUESTS),
+        TASK_VECTORDB_PATH=db_dir,
+        EMBEDDING_CACHE_DIR=os.path.join(state_dir, "embedding_cache"),
+        TASK_INDEX_PATH=os.path.join(state_dir, "task_index.sqlite3"),
+    )
+    stub = _start("ollama_stub", STUB_PORT, os.path.join(HERE, "benchmarks"), env)
+    api = _start("api", API_PORT, HERE, env)
+    try:
+        asyncio.run(_run())
+    finally:
+        api.terminate()
+        stub.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Microbenchmarks of the per-request CPU work (no server, no Chroma, no Ollama).
+
+Run from the fastapi_chroma_task folder:
+    python benchmarks/microbench.py
+
+Inputs come from benchmarks/synthetic.py in the app's exact formats:
+  parse_tasks_context   client "TASK" text (buildTasksContextForAI) and "#N" text
+  detect_intent         every labelled question in synthetic.QUESTIONS
+  answer_by_intent      30 tasks (the client limit), per local intent
+  parse_money_summary   FinancialAdvice.tsx buildAiPrompt() text (money service)
+  summary_from_model    the typed v2 `summary` (buildAiSummary()), same numbers
+  build_rule_based_advice
+  money request v1 / v2 json.loads of the request body + summary + advice, i.e.
+                        the per-request CPU of /search_rag_model without FastAPI
+                        (pydantic validation of `summary` is not included)
+"""
+import json
+import os
+import sys
+import time
+from types import SimpleNamespace
+from typing import Callable
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MONEY_DIR = os.path.abspath(os.path.join(HERE, "..", "..", "..", "..", "fastapi_chroma_Money"))
+sys.path.insert(0, HERE)
+sys.path.insert(0, MONEY_DIR)
+
+from intent_answers import answer_by_intent  # noqa: E402
+from intent_classifier import IntentClassifier  # noqa: E402
+from money_advice import build_rule_based_advice, parse_money_summary, summary_from_model  # noqa: E402
+from synthetic import (  # noqa: E402
+    QUESTIONS,
+    make_client_tasks_context,
+    make_money_prompt,
+    make_money_summary,
+    make_task_items,
+)
+from tasks_context import format_tasks_context, parse_tasks_context, tasks_from_items  # noqa: E402
+
+LOOPS = 5_000
+SEED = 42
+
+
+def bench(name: str, fn: Callable[[], object], loops: int = LOOPS) -> None:
+    fn()  # warm up
+    t0 = time.perf_counter()
+    for _ in range(loops):
+        fn()
+    us = (time.perf_counter() - t0) / loops * 1e6
+    print(f"{name:<44} {us:>10.2f} µs/op")
+
+
+def main() -> None:
+    client_text = make_client_tasks_context(30, seed=SEED)
+    tasks = tasks_from_items(SimpleNamespace(**dict({"details": None}, **it)) for it in make_task_items(30, seed=SEED))
+    server_text = format_tasks_context(tasks)
+
+    print(f"parse_tasks_context(client TASK text) -> {len(parse_tasks_context(client_text))} task(s) of 30")
+    print(f"parse_tasks_context(#N text)          -> {len(parse_tasks_context(server_text))} task(s) of 30")
+    print()
+    bench("parse_tasks_context (client TASK text)", lambda: parse_tasks_context(client_text))
+    bench("parse_tasks_context (#N text, 30 tasks)", lambda: parse_tasks_context(server_text))
+
+    classifier = IntentClassifier()
+    questions = [q for q, _ in QUESTIONS]
+    bench(f"detect_intent (x{len(questions)} questions)", lambda: [classifier.classify(q) for q in questions])
+
+    for _, intent in QUESTIONS:
+        if intent != "other":
+            bench(f"answer_by_intent ({intent}, 30 tasks)", lambda i=intent: answer_by_intent(i, "", tasks))
+
+    prompts = [make_money_prompt(seed=SEED + i) for i in range(20)]
+    summaries = [parse_money_summary(p) for p in prompts]
+    bench("parse_money_summary (x20 prompts)", lambda: [parse_money_summary(p) for p in prompts], loops=1_000)
+    bench("build_rule_based_advice (x20 summaries)", lambda: [build_rule_based_advice(s) for s in summaries], loops=1_000)
+
+    typed = [SimpleNamespace(**make_money_summary(seed=SEED + i)) for i in range(20)]
+    bench("summary_from_model (x20 summaries)", lambda: [summary_from_model(s) for s in typed], loops=1_000)
+
+    v1_bodies = [json.dumps({"text": p, "n_results": 3}) for p in prompts]
+    v2_bodies = [
+        json.dumps({"version": 2, "summary": make_money_summary(seed=SEED + i), "n_results": 3})
+        for i in range(20)
+    ]
+
+    def v1_request(body: str) -> str:
+        return build_rule_based_advice(parse_money_summary(json.loads(body)["text"]))
+
+    def v2_request(body: str) -> str:
+        return build_rule_based_advice(summary_from_model(SimpleNamespace(**json.loads(body)["summary"])))
+
+    print()
+    print(f"money request body: v1 {sum(map(len, v1_bodies)) // 20} B, v2 {sum(map(len, v2_bodies)) // 20} B (avg)")
+    bench("money request v1 text (x20)", lambda: [v1_request(b) for b in v1_bodies], loops=1_000)
+    bench("money request v2 typed (x20)", lambda: [v2_request(b) for b in v2_bodies], loops=1_000)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+Throughput of the task API with 1..N uvicorn workers sharing one Chroma server.
+
+Run from the fastapi_chroma_task folder (needs fastapi, uvicorn, httpx, chromadb):
+    python benchmarks/multi_worker.py
+    python benchmarks/multi_worker.py --workers 1 2 4 8 --concurrency 64 --requests 2000
+
+Copies ./vectordb to a temp dir, serves it with `chroma run` (CHROMA_MODE=http)
+and starts benchmarks/ollama_stub.py with a short latency, so the Python-side
+work dominates: task parsing, intent, local answers, embedding + Chroma
+retrieval and prompt packing. Every request carries a different synthetic
+task list (no answer-cache hits). The baseline row is the old single-process
+PersistentClient setup, on its own temp copy of ./vectordb.
+Stops with the error as soon as /ready reports the store "failed" (e.g. the
+ONNX model cannot be downloaded); --stub-embedder runs every process on
+benchmarks/stub_embedder.py instead (same shape and cost range, no download).
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(HERE, "benchmarks"))
+
+import stub_embedder  # noqa: E402
+from drive_load import percentile  # noqa: E402
+from synthetic import QUESTIONS, make_task_items  # noqa: E402
+
+STUB_PORT = 11437
+CHROMA_PORT = 8041
+API_PORT = 8042
+API_URL = f"http://127.0.0.1:{API_PORT}"
+
+
+def _spawn(cmd: List[str], cwd: str, env: dict) -> subprocess.Popen:
+    return subprocess.Popen(cmd, cwd=cwd, env=env, stdout=subprocess.DEVNULL)
+
+
+def _uvicorn(module: str, port: int, workers: int = 1) -> List[str]:
+    return [sys.executable, "-m", "uvicorn", f"{module}:app", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning"]
+
+
+def _wait_ready(*urls: str, timeout_s: float = 180.0) -> None:
+    """Until any of urls answers 200; exits if one reports a failed store."""
+    t0 = time.perf_counter()
+    while time.perf_counter() - t0 < timeout_s:
+        for url in urls:
+            try:
+                resp = httpx.get(url, timeout=2.0)
+                if resp.status_code == 200:
+                    return
+                if resp.json().get("status") == "failed":
+                    raise SystemExit(f"❌ {url}: store failed: {resp.json().get('error')}")
+            except (httpx.HTTPError, ValueError):
+                pass
+        time.sleep(0.2)
+    raise SystemExit(f"❌ {urls[0]} not ready after {timeout_s}s")
+
+
+def _bodies(n: int, start: int = 0) -> List[dict]:
+    bodies = []
+    for i in range(start, start + n):
+        question, intent = QUESTIONS[i % len(QUESTIONS)]
+        if intent == "other":
+            question = f"{question} (#{i})"
+        bodies.append({
+            "text": question,
+            "userId": f"mw-user-{i % 50}",
+            "version": 2,
+            "tasks": make_task_items(30, seed=i),
+        })
+    return bodies
+
+
+async def _drive(bodies: List[dict], concurrency: int) -> Dict[str, float]:
+    latencies: List[float] = []
+    failed = 0
+    next_i = 0
+    limits = httpx.Limits(max_connections=concurrency + 4)
+    async with httpx.AsyncClient(timeout=120.0, limits=limits) as client:
+        async def worker() -> None:
+            nonlocal next_i, failed
+            while next_i < len(bodies):
+                body = bodies[next_i]
+                next_i += 1
+                t0 = time.perf_counter()
+                try:
+                    ok = (await client.post(f"{API_URL}/chat_rag", json=body)).status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                if ok:
+                    latencies.append((time.perf_counter() - t0) * 1000)
+                else:
+                    failed += 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        wall = time.perf_counter() - t0
+    latencies.sort()
+    return {
+        "rps": len(latencies) / wall,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "failed": failed,
+    }
+
+
+def run(label: str, workers: int, env: dict, bodies: List[dict], concurrency: int, state_dir: str) -> None:
+    # own embedding cache + task index per setup, so no setup reuses vectors another one paid for
+    run_dir = tempfile.mkdtemp(prefix="run_", dir=state_dir)
+    env = dict(
+        env,
+        EMBEDDING_CACHE_DIR=os.path.join(run_dir, "embedding_cache"),
+        TASK_INDEX_PATH=os.path.join(run_dir, "task_index.sqlite3"),
+    )
+    api = _spawn(_uvicorn("api", API_PORT, workers), HERE, env)
+    try:
+        _wait_ready(f"{API_URL}/ready")
+        # with several workers, /ready only proves one of them; warm them all up
+        # (other questions than the measured ones, so the warm-up does not fill the caches for them)
+        asyncio.run(_drive(_bodies(workers * 20, start=len(bodies)), concurrency))
+        r = asyncio.run(_drive(bodies, concurrency))
+    finally:
+        api.terminate()
+        api.wait()
+    print(f"{label:<28} {r['rps']:>8.1f} {r['p50']:>9.1f} {r['p95']:>9.1f} {r['failed']:>7}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--stub-latency", type=float, default=0.05)
+    parser.add_argument("--stub-embedder", action="store_true", help="stand-in ONNX model (no download)")
+    args = parser.parse_args()
+
+    chroma_cli: Optional[str] = shutil.which("chroma")
+    if chroma_cli is None:
+        raise SystemExit("❌ `chroma` CLI not found (pip install chromadb)")
+
+    state_dir = tempfile.mkdtemp(prefix="multi_worker_")
+    db_dir = os.path.join(state_dir, "vectordb")
+    persistent_db_dir = os.path.join(state_dir, "vectordb_persistent")
+    shutil.copytree(os.path.join(HERE, "vectordb"), db_dir)
+    shutil.copytree(os.path.join(HERE, "vectordb"), persistent_db_dir)
+
+    base_env = dict(
+        os.environ,
+        STUB_LATENCY_S=str(args.stub_latency),
+        STUB_TOKENS_PER_S="1000",
+        OLLAMA_CHAT_URL=f"http://127.0.0.1:{STUB_PORT}/api/chat",
+        LLM_MAX_CONCURRENT="64",
+        LLM_MAX_QUEUE="1024",
+    )
+    if args.stub_embedder:
+        base_env["HOME"] = os.path.join(state_dir, "home")
+        stub_embedder.install(base_env["HOME"])
+    http_env = dict(base_env, CHROMA_MODE="http", CHROMA_HOST="127.0.0.1", CHROMA_PORT=str(CHROMA_PORT))
+    bodies = _bodies(args.requests)
+
+    stub = _spawn(_uvicorn("ollama_stub", STUB_PORT), os.path.join(HERE, "benchmarks"), base_env)
+    chroma = _spawn([chroma_cli, "run", "--path", db_dir, "--port", str(CHROMA_PORT)], state_dir, base_env)
+    try:
+        # heartbeat path depends on the chromadb version
+        _wait_ready(*(f"http://127.0.0.1:{CHROMA_PORT}/api/{v}/heartbeat" for v in ("v2", "v1")))
+        print(f"{args.requests} requests, concurrency {args.concurrency}, stub latency {args.stub_latency}s, "
+              f"{'stub' if args.stub_embedder else 'real'} embedding model, {os.cpu_count()} CPU(s)")
+        print(f"{'setup':<28} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'failed':>7}")
+        # baseline: one process opening the vectordb itself (the setup before CHROMA_MODE=http)
+        persistent_env = dict(base_env, CHROMA_MODE="persistent", TASK_VECTORDB_PATH=persistent_db_dir)
+        run("persistent, 1 worker", 1, persistent_env, bodies, args.concurrency, state_dir)
+        for w in args.workers:
+            run(f"http, {w} worker(s)", w, http_env, bodies, args.concurrency, state_dir)
+    finally:
+        chroma.terminate()
+        stub.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Fake Ollama /api/chat for load tests (no model, no GPU/CPU cost).
+
+    STUB_LATENCY_S=5 uvicorn ollama_stub:app --port 11435
+
+Then start the task API with OLLAMA_CHAT_URL=http://127.0.0.1:11435/api/chat
+
+STUB_LATENCY_S is the prefill time (before the first token); with
+"stream": true the answer is then sent word by word at STUB_TOKENS_PER_S
+(non-stream replies wait for the same generation time). Warm-up requests
+(no messages, only keep_alive) return at once, like a loaded model.
+"""
+import asyncio
+import json
+import os
+from typing import Any, Dict
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+STUB_LATENCY_S = float(os.getenv("STUB_LATENCY_S", "5"))
+STUB_TOKENS_PER_S = float(os.getenv("STUB_TOKENS_PER_S", "20"))
+STUB_ANSWER = "Stub answer: focus on the most urgent task first, then plan the rest of the week."
+
+app = FastAPI()
+
+
+@app.post("/api/chat")
+async def chat(body: Dict[str, Any]):
+    model = body.get("model")
+    if not body.get("messages"):
+        return {"model": model, "message": {"role": "assistant", "content": ""}, "done": True}
+
+    await asyncio.sleep(STUB_LATENCY_S)
+
+    if not body.get("stream", True):
+        await asyncio.sleep(len(STUB_ANSWER.split(" ")) / STUB_TOKENS_PER_S)
+        return {
+            "model": model,
+            "message": {"role": "assistant", "content": STUB_ANSWER},
+            "done": True,
+        }
+
+    async def chunks():
+        for word in STUB_ANSWER.split(" "):
+            yield json.dumps({"model": model, "message": {"role": "assistant", "content": word + " "}, "done": False}) + "\n"
+            await asyncio.sleep(1.0 / STUB_TOKENS_PER_S)
+        yield json.dumps({"model": model, "message": {"role": "assistant", "content": ""}, "done": True}) + "\n"
+
+    return StreamingResponse(chunks(), media_type="application/x-ndjson")
@@ -0,0 +1,207 @@
+"""
+Task retrieval latency: one my_data collection vs the sharded layout (shards.py).
+
+Run from the fastapi_chroma_task folder (needs chromadb, numpy; httpx for drive_load.percentile):
+    python benchmarks/shard_latency.py
+    python benchmarks/shard_latency.py --users 1000 10000 --tasks-per-user 5
+
+For each user count a fresh temp vectordb is filled both ways with random
+384-d embeddings (the default model's size; nothing is embedded, so only the
+Chroma search is timed):
+  single   my_data, tasks + rules, queried like _query_tasks with the
+           $and(module, type, userId) filter
+  sharded  tasks_<bucket> (TASK_BUCKETS buckets), queried with userId only
+Queries go to random users with a random query vector, n_results=5.
+Every (users, layout) pair runs in its own child process, and vectors are
+generated and added in batches, so memory holds one layout at a time (never
+every vector as Python floats). rss_mb is the child's resident memory after
+the queries; kb/user = (rss_mb - rss of the empty client) / users.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import chromadb
+import numpy as np
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.abspath(os.path.join(HERE, "..", "..", "..", "..")))
+
+from drive_load import percentile  # noqa: E402
+from fastapi_chroma_shared.shards import LEGACY_COLLECTION, MODULE_TASKS, RULE_USER_ID, TASK_BUCKETS, ShardRouter  # noqa: E402
+
+DIM = 384
+RULE_DOCS = 20
+N_RESULTS = 5
+BATCH = 5000
+SEED = 42
+
+
+def _vectors(rng: np.random.Generator, n: int) -> np.ndarray:
+    v = rng.standard_normal((n, DIM)).astype(np.float32)
+    v /= np.linalg.norm(v, axis=1, keepdims=True)
+    return v
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def _add(coll: Any, ids: List[str], metas: List[Dict[str, Any]], embs: np.ndarray) -> None:
+    coll.add(ids=ids, documents=["task"] * len(ids), metadatas=metas, embeddings=embs)
+
+
+def _user_batches(users: int, tasks_per_user: int):
+    """(user index, ids, metas, vectors) per user, vectors drawn BATCH at a time
+    (same seed -> same vectors for both layouts)."""
+    rng = np.random.default_rng(SEED)
+    buf = np.empty((0, DIM), dtype=np.float32)
+    for u in range(users):
+        if len(buf) < tasks_per_user:
+            buf = np.concatenate([buf, _vectors(rng, BATCH)])
+        embs, buf = buf[:tasks_per_user], buf[tasks_per_user:]
+        ids = [f"task::u{u}::{t}" for t in range(tasks_per_user)]
+        metas = [{"module": MODULE_TASKS, "type": "task", "userId": f"u{u}"}] * tasks_per_user
+        yield u, ids, metas, embs
+
+
+def build(path: str, layout: str, users: int, tasks_per_user: int, buckets: int) -> Dict[str, Any]:
+    rule_rng = np.random.default_rng(SEED - 1)
+    rule_ids = [f"rule_{i}" for i in range(RULE_DOCS)]
+    rule_metas = [{"module": MODULE_TASKS, "type": "rule", "userId": RULE_USER_ID}] * RULE_DOCS
+
+    client = chromadb.PersistentClient(path=path)
+    base_mb = rss_mb()
+    t0 = time.perf_counter()
+    if layout == "single":
+        legacy = client.get_or_create_collection(name=LEGACY_COLLECTION)
+        _add(legacy, rule_ids, rule_metas, _vectors(rule_rng, RULE_DOCS))
+        pending: Dict[str, list] = {"ids": [], "metas": [], "embs": []}
+        for _, ids, metas, embs in _user_batches(users, tasks_per_user):
+            pending["ids"] += ids
+            pending["metas"] += metas
+            pending["embs"].append(embs)
+            if len(pending["ids"]) >= BATCH:
+                _add(legacy, pending["ids"], pending["metas"], np.concatenate(pending["embs"]))
+                pending = {"ids": [], "metas": [], "embs": []}
+        if pending["ids"]:
+            _add(legacy, pending["ids"], pending["metas"], np.concatenate(pending["embs"]))
+        return {"client": client, "legacy": legacy, "build_s": time.perf_counter() - t0, "base_mb": base_mb}
+
+    router = ShardRouter(client, buckets)
+    _add(router.rules(MODULE_TASKS), rule_ids, rule_metas, _vectors(rule_rng, RULE_DOCS))
+    groups: Dict[str, Dict[str, Any]] = {}
+    per_bucket = max(1, BATCH // 5)  # 64 half-full buffers stay small
+
+    def flush(g: Dict[str, Any]) -> None:
+        if g["ids"]:
+            _add(g["coll"], g["ids"], g["metas"], np.concatenate(g["embs"]))
+            g["ids"], g["metas"], g["embs"] = [], [], []
+
+    for u, ids, metas, embs in _user_batches(users, tasks_per_user):
+        coll = router.tasks(f"u{u}")
+        g = groups.setdefault(coll.name, {"coll": coll, "ids": [], "metas": [], "embs": []})
+        g["ids"] += ids
+        g["metas"] += metas
+        g["embs"].append(embs)
+        if len(g["ids"]) >= per_bucket:
+            flush(g)
+    for g in groups.values():
+        flush(g)
+    return {"client": client, "router": router, "build_s": time.perf_counter() - t0, "base_mb": base_mb}
+
+
+def measure(store: Dict[str, Any], layout: str, users: int, queries: int) -> List[float]:
+    rng = np.random.default_rng(SEED + 1)
+    picks = random.Random(SEED)
+    qs = _vectors(rng, queries)
+    user_ids = [f"u{picks.randrange(users)}" for _ in range(queries)]
+    out: List[float] = []
+
+    for q, user_id in zip(qs, user_ids):
+        t0 = time.perf_counter()
+        if layout == "single":
+            store["legacy"].query(
+                query_embeddings=[q],
+                n_results=N_RESULTS,
+                where={"$and": [
+                    {"module": {"$eq": MODULE_TASKS}},
+                    {"type": {"$eq": "task"}},
+                    {"userId": {"$eq": user_id}},
+                ]},
+            )
+        else:
+            store["router"].tasks(user_id).query(
+                query_embeddings=[q],
+                n_results=N_RESULTS,
+                where={"userId": user_id},
+            )
+        out.append((time.perf_counter() - t0) * 1000)
+    return sorted(out)
+
+
+def run_one(layout: str, users: int, tasks_per_user: int, buckets: int, queries: int) -> Dict[str, float]:
+    path = tempfile.mkdtemp(prefix="shard_latency_")
+    try:
+        store = build(path, layout, users, tasks_per_user, buckets)
+        measure(store, layout, users, 20)  # warm up (loads the HNSW segments)
+        ms = measure(store, layout, users, queries)
+        mb = rss_mb()
+        return {
+            "build_s": store["build_s"],
+            "p50": percentile(ms, 0.50),
+            "p95": percentile(ms, 0.95),
+            "p99": percentile(ms, 0.99),
+            "rss_mb": mb,
+            "kb_per_user": (mb - store["base_mb"]) * 1024 / users,
+        }
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--tasks-per-user", type=int, default=3)
+    parser.add_argument("--buckets", type=int, default=TASK_BUCKETS)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--one", choices=["single", "sharded"], help=argparse.SUPPRESS)  # child process
+    args = parser.parse_args()
+
+    if args.one:
+        r = run_one(args.one, args.users[0], args.tasks_per_user, args.buckets, args.queries)
+        print(json.dumps(r))
+        return
+
+    print(f"{'users':>8} {'layout':<8} {'build_s':>8} {'p50_ms':>8} {'p95_ms':>8} {'p99_ms':>8} {'rss_mb':>8} {'kb/user':>8}"
+          f"   ({args.tasks_per_user} tasks/user, {args.buckets} buckets, {args.queries} queries)")
+    for users in args.users:
+        for layout in ("single", "sharded"):
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--one", layout, "--users", str(users),
+                 "--tasks-per-user", str(args.tasks_per_user), "--buckets", str(args.buckets),
+                 "--queries", str(args.queries)],
+                capture_output=True, text=True,
+            )
+            if out.returncode != 0:
+                why = "killed (out of memory?)" if out.returncode < 0 else out.stderr.strip().splitlines()[-1:]
+                print(f"{users:>8} {layout:<8} ❌ {why}")
+                continue
+            r = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f"{users:>8} {layout:<8} {r['build_s']:>8.1f} {r['p50']:>8.2f} {r['p95']:>8.2f} {r['p99']:>8.2f}"
+                  f" {r['rss_mb']:>8.1f} {r['kb_per_user']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
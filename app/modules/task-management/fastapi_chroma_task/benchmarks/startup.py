@@ -0,0 +1,147 @@
+"""
+Startup timings for the task and money services (cold process each run).
+
+Run from the fastapi_chroma_task folder (needs fastapi, uvicorn, httpx, chromadb):
+    python benchmarks/startup.py
+    python benchmarks/startup.py --runs 5
+    python benchmarks/startup.py --stub-embedder
+
+Per service and run:
+  import_s        `import api` in a fresh interpreter
+  first_answer_s  spawn uvicorn -> first 200 from a route that needs no Chroma
+                  (/chat_rag top_today for tasks, /search_rag_model for money)
+  ready_s         spawn uvicorn -> GET /ready == 200 (Chroma + embedding model loaded)
+Before background init, first_answer_s ~= ready_s; after it, first_answer_s is
+roughly interpreter + FastAPI import time.
+If the store fails to load (e.g. the ONNX model cannot be downloaded), ready_s
+prints "failed" with the error instead of waiting for TIMEOUT_S;
+--stub-embedder loads benchmarks/stub_embedder.py instead (same shape and
+cost range, no download), so ready_s is still measured.
+Each service opens a temp copy of its vectordb, so the repo's own is never
+migrated or written.
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+HERE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MONEY_DIR = os.path.abspath(os.path.join(HERE, "..", "..", "..", "..", "fastapi_chroma_Money"))
+sys.path.insert(0, os.path.join(HERE, "benchmarks"))
+
+import stub_embedder  # noqa: E402
+from synthetic import make_money_prompt, make_task_items  # noqa: E402
+
+PORT = 8031
+TIMEOUT_S = 180.0
+
+# (name, cwd, first-answer path, body)
+SERVICES: List[Tuple[str, str, str, dict]] = [
+    ("task", HERE, "/chat_rag", {
+        "text": "What are the top 3 tasks I should do today?",
+        "userId": "startup-user",
+        "version": 2,
+        "tasks": make_task_items(30, seed=1),
+    }),
+    ("money", MONEY_DIR, "/search_rag_model", {"text": make_money_prompt(seed=1)}),
+]
+
+
+def import_seconds(cwd: str, env: dict) -> float:
+    code = "import time; t = time.perf_counter(); import api; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env, capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def _poll(client: httpx.Client, method: str, url: str, body: dict, t0: float) -> float:
+    while time.perf_counter() - t0 < TIMEOUT_S:
+        try:
+            if client.request(method, url, json=body if method == "POST" else None).status_code == 200:
+                return time.perf_counter() - t0
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.02)
+    raise SystemExit(f"❌ {url} not answering after {TIMEOUT_S}s")
+
+
+def _poll_ready(client: httpx.Client, url: str, t0: float) -> Tuple[Optional[float], Optional[str]]:
+    """(seconds to /ready 200, None) or (None, error) once the store reports failed."""
+    while time.perf_counter() - t0 < TIMEOUT_S:
+        try:
+            resp = client.get(url)
+            if resp.status_code == 200:
+                return time.perf_counter() - t0, None
+            if resp.json().get("status") == "failed":
+                return None, resp.json().get("error")
+        except (httpx.HTTPError, ValueError):
+            pass
+        time.sleep(0.02)
+    raise SystemExit(f"❌ {url} not answering after {TIMEOUT_S}s")
+
+
+def serve_seconds(cwd: str, env: dict, path: str, body: dict) -> Tuple[float, Optional[float], Optional[str]]:
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api:app", "--port", str(PORT), "--log-level", "warning"],
+        cwd=cwd,
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(timeout=30.0) as client:
+            first = _poll(client, "POST", f"http://127.0.0.1:{PORT}{path}", body, t0)
+            ready, error = _poll_ready(client, f"http://127.0.0.1:{PORT}/ready", t0)
+        return first, ready, error
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--stub-embedder", action="store_true", help="stand-in ONNX model (no download)")
+    args = parser.parse_args()
+
+    state_dir = tempfile.mkdtemp(prefix="startup_")
+    home = os.path.join(state_dir, "home")
+    if args.stub_embedder:
+        stub_embedder.install(home)
+    print(f"{'service':<8} {'import_s':>9} {'first_answer_s':>15} {'ready_s':>9}"
+          f"   (median of {args.runs}, {'stub' if args.stub_embedder else 'real'} embedding model)")
+    for name, cwd, path, body in SERVICES:
+        db_dir = os.path.join(state_dir, f"{name}_vectordb")
+        shutil.copytree(os.path.join(cwd, "vectordb"), db_dir)
+        env = dict(
+            os.environ,
+            TASK_VECTORDB_PATH=db_dir,
+            MONEY_VECTORDB_PATH=db_dir,
+            EMBEDDING_CACHE_DIR=os.path.join(state_dir, f"{name}_cache"),
+            TASK_INDEX_PATH=os.path.join(state_dir, "task_index.sqlite3"),
+        )
+        if args.stub_embedder:
+            env["HOME"] = home
+        runs: Dict[str, List[float]] = {"import": [], "first": [], "ready": []}
+        error = None
+        for _ in range(args.runs):
+            runs["import"].append(import_seconds(cwd, env))
+            first, ready, error = serve_seconds(cwd, env, path, body)
+            runs["first"].append(first)
+            if ready is not None:
+                runs["ready"].append(ready)
+        med = {k: statistics.median(v) for k, v in runs.items() if v}
+        ready_col = f"{med['ready']:>9.2f}" if "ready" in med else f"{'failed':>9}"
+        print(f"{name:<8} {med['import']:>9.2f} {med['first']:>15.2f} {ready_col}")
+        if error:
+            print(f"   ❌ store failed: {error}")
+
+
+if __name__ == "__main__":
+    main()
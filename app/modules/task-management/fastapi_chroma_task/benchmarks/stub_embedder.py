@@ -0,0 +1,118 @@
+"""
+Stand-in for chromadb's default ONNX embedding model (all-MiniLM-L6-v2) when
+it cannot be downloaded, so /ready, retrieval and RSS can still be measured.
+
+    python benchmarks/stub_embedder.py /tmp/bench_home
+    HOME=/tmp/bench_home uvicorn api:app --port 8001
+
+install(home) writes the six files chromadb looks for under
+<home>/.cache/chroma/onnx_models/all-MiniLM-L6-v2/onnx/, so a process started
+with HOME=<home> loads the stub instead of downloading (never point it at the
+real HOME: it would shadow the real model). Needs onnx + tokenizers.
+
+Same vocab size (30522), hidden size (384) and padding (256 tokens) as
+MiniLM-L6: a token embedding table + 6 feed-forward blocks with random
+weights, no attention. ~19M float32 params (~75 MB; MiniLM-L6 is ~22.7M,
+~90 MB) and ~3.6 GFLOP per text (MiniLM-L6 ~5.5 with attention), so model
+memory and embedding cost are in the real model's range, slightly below.
+The vectors carry no meaning: use it for timings and memory only.
+"""
+import json
+import os
+import sys
+
+import numpy as np
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+VOCAB_SIZE = 30522
+HIDDEN = 384
+FFN = 1536
+LAYERS = 6
+SEED = 7
+
+_SPECIAL = {"[PAD]": 0, "[UNK]": 100, "[CLS]": 101, "[SEP]": 102, "[MASK]": 103}
+
+
+def model_dir(home: str) -> str:
+    return os.path.join(home, ".cache", "chroma", "onnx_models", MODEL_NAME, "onnx")
+
+
+def _vocab() -> dict:
+    vocab = dict(_SPECIAL)
+    chars = [chr(c) for c in range(33, 127)]
+    pieces = chars + [f"##{c}" for c in chars]
+    special_ids = set(_SPECIAL.values())
+    for i in range(VOCAB_SIZE):
+        if i in special_ids:
+            continue
+        token = pieces.pop(0) if pieces and i > 103 else f"[unused{i}]"
+        vocab[token] = i
+    return vocab
+
+
+def _write_tokenizer(out: str, vocab: dict) -> None:
+    from tokenizers import Tokenizer, models, normalizers, pre_tokenizers, processors
+
+    tok = Tokenizer(models.WordPiece(vocab=vocab, unk_token="[UNK]"))
+    tok.normalizer = normalizers.BertNormalizer(lowercase=True)
+    tok.pre_tokenizer = pre_tokenizers.BertPreTokenizer()
+    tok.post_processor = processors.TemplateProcessing(
+        single="[CLS] $A [SEP]",
+        pair="[CLS] $A [SEP] $B:1 [SEP]:1",
+        special_tokens=[("[CLS]", _SPECIAL["[CLS]"]), ("[SEP]", _SPECIAL["[SEP]"])],
+    )
+    tok.save(os.path.join(out, "tokenizer.json"))
+
+    with open(os.path.join(out, "vocab.txt"), "w", encoding="utf-8") as f:
+        f.write("\n".join(sorted(vocab, key=vocab.get)) + "\n")
+    with open(os.path.join(out, "config.json"), "w", encoding="utf-8") as f:
+        json.dump({"hidden_size": HIDDEN, "num_hidden_layers": LAYERS, "vocab_size": VOCAB_SIZE, "stub": True}, f)
+    with open(os.path.join(out, "special_tokens_map.json"), "w", encoding="utf-8") as f:
+        json.dump({"unk_token": "[UNK]", "sep_token": "[SEP]", "pad_token": "[PAD]", "cls_token": "[CLS]"}, f)
+    with open(os.path.join(out, "tokenizer_config.json"), "w", encoding="utf-8") as f:
+        json.dump({"do_lower_case": True, "model_max_length": 256}, f)
+
+
+def _write_model(out: str) -> None:
+    import onnx
+    from onnx import TensorProto, helper, numpy_helper
+
+    rng = np.random.default_rng(SEED)
+    inits = [numpy_helper.from_array(rng.normal(0, 0.02, (VOCAB_SIZE, HIDDEN)).astype(np.float32), "embeddings")]
+    nodes = [helper.make_node("Gather", ["embeddings", "input_ids"], ["h0"])]
+    for i in range(LAYERS):
+        inits.append(numpy_helper.from_array(rng.normal(0, 0.02, (HIDDEN, FFN)).astype(np.float32), f"w1_{i}"))
+        inits.append(numpy_helper.from_array(rng.normal(0, 0.02, (FFN, HIDDEN)).astype(np.float32), f"w2_{i}"))
+        nodes += [
+            helper.make_node("MatMul", [f"h{i}", f"w1_{i}"], [f"a{i}"]),
+            helper.make_node("Relu", [f"a{i}"], [f"r{i}"]),
+            helper.make_node("MatMul", [f"r{i}", f"w2_{i}"], [f"b{i}"]),
+            helper.make_node("Add", [f"h{i}", f"b{i}"], [f"h{i + 1}" if i < LAYERS - 1 else "last_hidden_state"]),
+        ]
+
+    inputs = [
+        helper.make_tensor_value_info(name, TensorProto.INT64, ["batch", "seq"])
+        for name in ("input_ids", "attention_mask", "token_type_ids")
+    ]
+    output = helper.make_tensor_value_info("last_hidden_state", TensorProto.FLOAT, ["batch", "seq", HIDDEN])
+    graph = helper.make_graph(nodes, "stub_minilm", inputs, [output], initializer=inits)
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)])
+    model.ir_version = 8
+    onnx.save(model, os.path.join(out, "model.onnx"))
+
+
+def install(home: str) -> str:
+    """Write the stub model under <home> (once) -> its folder."""
+    out = model_dir(home)
+    if os.path.exists(os.path.join(out, "model.onnx")):
+        return out
+    os.makedirs(out, exist_ok=True)
+    _write_tokenizer(out, _vocab())
+    _write_model(out)
+    return out
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        raise SystemExit(__doc__)
+    print(f"✅ Stub embedding model in {install(sys.argv[1])}")
@@ -0,0 +1,172 @@
+"""
+Synthetic request data in the exact formats the app sends.
+
+- make_client_tasks_context(): hooks/useAIAssistant.ts buildTasksContextForAI()
+  ("TASK" blocks, max 30 tasks, "No active tasks." when empty)
+- make_task_items(): the typed v2 `tasks` list (buildTasksForAI())
+- make_money_prompt(): money-management/FinancialAdvice.tsx buildAiPrompt()
+- make_money_summary(): the typed v2 `summary` (buildAiSummary()), same numbers
+  as make_money_prompt() for the same seed
+- QUESTIONS: chat questions labelled with the intent they should hit
+
+Everything is driven by a seeded random.Random, so runs are reproducible.
+"""
+import random
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+CLIENT_TASK_LIMIT = 30  # activeTasks.slice(0, 30)
+
+TITLES = ["Lab report", "Essay draft", "Quiz prep", "Group meeting", "Read chapter", "Math worksheet",
+          "Project demo", "Revise notes", "Submit form", "Presentation slides"]
+DETAILS = [None, "Check rubric first", "Ask tutor about Q3", "Draft + proofread", "Bring laptop"]
+CATEGORIES = ["Food", "Transport", "Shopping", "Bills", "Entertainment", "Groceries", "Health"]
+ACCOUNTS = ["Maybank", "Cash", "TNG eWallet", "CIMB"]
+
+QUESTIONS: List[Tuple[str, str]] = [
+    ("What are the top 3 tasks I should do today?", "top_today"),
+    ("Plan my week", "plan_week"),
+    ("Which overdue tasks should I clear first?", "clear_overdue"),
+    ("How many tasks are overdue?", "count_overdue"),
+    ("Which tasks can I delay?", "can_delay"),
+    ("Summarise how my semester is going", "other"),
+]
+
+
+def _fmt(d: date) -> str:
+    # formatDate(): toLocaleDateString("en-GB") -> DD/MM/YYYY
+    return d.strftime("%d/%m/%Y")
+
+
+def make_tasks(n: int, rng: random.Random, today: Optional[date] = None) -> List[Dict[str, Any]]:
+    """Raw task fields (like TaskType) used by every formatter below."""
+    today = today or date.today()
+    tasks = []
+    for i in range(n):
+        due: Optional[date] = None
+        if rng.random() > 0.1:
+            due = today + timedelta(days=rng.randint(-10, 30))
+        start = (due - timedelta(days=rng.randint(1, 14))) if due and rng.random() > 0.3 else None
+        tasks.append({
+            "id": f"task-{i}",
+            "taskName": f"{rng.choice(TITLES)} {i}",
+            "details": rng.choice(DETAILS),
+            "priorityScore": rng.randint(0, 100),
+            "startDate": start,
+            "dueDate": due,
+            "daysUntilDue": (due - today).days if due else None,
+        })
+    return tasks
+
+
+def make_client_tasks_context(n: int, seed: int = 0) -> str:
+    tasks = make_tasks(n, random.Random(seed))[:CLIENT_TASK_LIMIT]
+    if not tasks:
+        return "No active tasks."
+    blocks = []
+    for t in tasks:
+        d = t["daysUntilDue"]
+        blocks.append(
+            "TASK\n"
+            f"Title: {t['taskName']}\n"
+            f"Details: {t['details'] or '-'}\n"
+            f"DaysUntilDue: {'null' if d is None else d}\n"
+            f"PriorityScore: {t['priorityScore']}\n"
+            f"Start: {_fmt(t['startDate']) if t['startDate'] else '-'}\n"
+            f"Due: {_fmt(t['dueDate']) if t['dueDate'] else '-'}\n"
+        )
+    return "\n".join(blocks)
+
+
+def make_task_items(n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    items = []
+    for t in make_tasks(n, random.Random(seed))[:CLIENT_TASK_LIMIT]:
+        d = t["daysUntilDue"]
+        item = {
+            "title": t["taskName"],
+            "priority": t["priorityScore"],
+            "daysUntilDue": d,
+            "start": _fmt(t["startDate"]) if t["startDate"] else None,
+            "due": _fmt(t["dueDate"]) if t["dueDate"] else None,
+            "overdue": d is not None and d < 0,
+        }
+        if t["details"]:
+            item["details"] = t["details"]
+        items.append(item)
+    return items
+
+
+def _money_analysis(seed: int) -> Dict[str, Any]:
+    # the `analysis` memo of FinancialAdvice.tsx
+    rng = random.Random(seed)
+    count = rng.randint(0, 120)
+    income = round(rng.uniform(0, 4000), 2) if rng.random() > 0.15 else 0.0
+    by_cat = sorted(
+        ((c, round(rng.uniform(5, 800), 2)) for c in rng.sample(CATEGORIES, rng.randint(0, 5))),
+        key=lambda kv: -kv[1],
+    )
+    expense = round(sum(v for _, v in by_cat), 2)
+    cashflow = income - expense
+    return {
+        "count": count,
+        "income": income,
+        "expense": expense,
+        "cashflow": cashflow,
+        "savings_rate": None if income <= 0 else cashflow / income * 100,
+        "by_cat": by_cat,
+        "top_acc": rng.choice(ACCOUNTS) if count else "",
+        "small": rng.randint(0, 40),
+    }
+
+
+def make_money_summary(seed: int = 0) -> Dict[str, Any]:
+    a = _money_analysis(seed)
+    return {
+        "transactionsCount": a["count"],
+        "income": a["income"],
+        "expenses": a["expense"],
+        "cashflow": a["cashflow"],
+        "savingsRate": a["savings_rate"],
+        "topAccount": a["top_acc"] or None,
+        "topCategory": a["by_cat"][0][0] if a["by_cat"] else None,
+        "smallPurchasesCount": a["small"],
+    }
+
+
+def make_money_prompt(seed: int = 0) -> str:
+    a = _money_analysis(seed)
+    count, income, expense, cashflow = a["count"], a["income"], a["expense"], a["cashflow"]
+    savings_rate, by_cat, top_acc = a["savings_rate"], a["by_cat"], a["top_acc"]
+    top_cat, top_val = by_cat[0] if by_cat else ("", 0.0)
+
+    top3 = "\n".join(f"{i + 1}) {c}: RM {v:.2f}" for i, (c, v) in enumerate(by_cat[:3]))
+    savings_line = (
+        "SavingsRate: (income not recorded / not enough data)"
+        if savings_rate is None
+        else f"SavingsRate: {savings_rate:.1f}%"
+    )
+    return f"""MONEY MODULE (personal finance coaching). Ignore any task-management rules.
+
+Use ONLY the numbers below. Do NOT invent transactions or amounts.
+
+User summary (Last 30 days):
+- TransactionsCount: {count}
+- Income: RM {income:.2f}
+- Expenses: RM {expense:.2f}
+- Cashflow: RM {cashflow:.2f}
+- {savings_line}
+- TopAccount: {top_acc or "-"}
+- TopCategory: {top_cat or "-"} (RM {top_val:.2f})
+- Top3Categories:
+{top3 or "(no category breakdown)"}
+- SmallPurchasesCount (<= RM10, all time): {a["small"]}
+
+What the user wants:
+- Advice to manage money and increase money.
+
+Output format (strict):
+1) What's happening (1-2 sentences)
+2) What to do this week (3-5 bullet steps, each with RM target)
+3) Longer-term plan (2-3 bullets)
+
+Keep it <= 180 words."""
@@ -0,0 +1,223 @@
+import heapq
+from typing import List, Optional, Tuple
+
+from intent_classifier import (
+    INTENT_CAN_DELAY,
+    INTENT_CLEAR_OVERDUE,
+    INTENT_COUNT_OVERDUE,
+    INTENT_PLAN_WEEK,
+)
+from tasks_context import ParsedTask
+
+# =========================
+# Local “AI-like” reasoning (deterministic, no Ollama needed)
+# This is what makes it "intelligent but safe".
+#
+# TaskTable is built ONCE per request: one pass over the tasks fills the
+# columns, the urgency key and the buckets (overdue / this week / immediate /
+# safe to delay). Every formatter below reuses them and only picks top-k with
+# heap selection (heapq.nsmallest == sorted(...)[:k], stable).
+# =========================
+
+
+class TaskTable:
+    """Column store: one list per field, buckets hold row indices (input order)."""
+
+    def __init__(self, tasks: List[ParsedTask]):
+        self.titles: List[str] = []
+        self.priorities: List[int] = []
+        self.days: List[Optional[int]] = []
+        self.dues: List[Optional[str]] = []
+        self.urgency: List[Tuple[int, int, int]] = []
+
+        self.overdue: List[int] = []    # DaysUntilDue < 0
+        self.due_week: List[int] = []   # 0 <= DaysUntilDue <= 7
+        self.immediate: List[int] = []  # DaysUntilDue <= 0
+        self.safe_to_delay: List[int] = []
+
+        titles, priorities, days_col, dues, urgency = self.titles, self.priorities, self.days, self.dues, self.urgency
+        for i, t in enumerate(tasks):
+            d = t.get("daysUntilDue", None)
+            pr = t.get("priority", 0)
+            titles.append(t["title"])
+            priorities.append(pr)
+            days_col.append(d)
+            dues.append(t.get("due"))
+
+            # overdue first by most overdue, then due soon, then priority
+            if d is None:
+                urgency.append((2, 9999, -pr))  # treat None due as far future
+                # no due date but very low priority
+                if pr <= 40:
+                    self.safe_to_delay.append(i)
+            elif d < 0:
+                urgency.append((0, d, -pr))  # more negative = more overdue => earlier
+                self.overdue.append(i)
+                self.immediate.append(i)
+            else:
+                urgency.append((1, d, -pr))
+                if d == 0:
+                    self.due_week.append(i)
+                    self.immediate.append(i)
+                elif d <= 7:
+                    self.due_week.append(i)
+                elif pr <= 80:
+                    self.safe_to_delay.append(i)
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def top3(self) -> List[int]:
+        return heapq.nsmallest(3, range(len(self.titles)), key=self.urgency.__getitem__)
+
+    def first_immediate(self) -> Optional[int]:
+        if not self.immediate:
+            return None
+        return min(self.immediate, key=self.urgency.__getitem__)  # min() keeps the first of equal keys
+
+    def week_by_urgency(self, k: int, exclude_title: Optional[str] = None) -> List[int]:
+        rows = self.due_week
+        if exclude_title is not None:
+            titles = self.titles
+            rows = [i for i in rows if titles[i] != exclude_title]
+        return heapq.nsmallest(k, rows, key=self.urgency.__getitem__)
+
+    def delay_candidates(self, k: int) -> List[int]:
+        days, priorities = self.days, self.priorities
+        return heapq.nsmallest(k, self.safe_to_delay, key=lambda i: (days[i] or 9999, priorities[i]))
+
+
+def _reason_for_task(d: Optional[int]) -> str:
+    if d is None:
+        return "No due date set — set/confirm due date to avoid surprise deadlines."
+    if d < 0:
+        return f"Overdue by {abs(d)} day(s) — clearing it reduces backlog pressure."
+    if d == 0:
+        return "Due today — finish it to avoid becoming overdue."
+    if 1 <= d <= 3:
+        return f"Due in {d} day(s) — do early to keep buffer for unexpected issues."
+    if 4 <= d <= 7:
+        return f"Due in {d} day(s) — schedule a focused block this week."
+    return f"Due in {d} day(s) — lower urgency right now; plan ahead."
+
+
+def _suggested_plan(intent: str, table: TaskTable) -> List[str]:
+    titles = table.titles
+    overdue_tasks = table.overdue
+
+    plan: List[str] = []
+    if intent == INTENT_CLEAR_OVERDUE:
+        if overdue_tasks:
+            plan.append(f"Finish **{titles[overdue_tasks[0]]}** today (it’s the most overdue).")
+            if len(overdue_tasks) > 1:
+                plan.append("If time remains, start the next overdue item to stop backlog growing.")
+        else:
+            plan.append("No overdue tasks — use today to pre-finish the nearest due task.")
+        return plan
+
+    if intent == INTENT_PLAN_WEEK:
+        if overdue_tasks:
+            plan.append(f"Day 1: clear **{titles[overdue_tasks[0]]}** first (overdue tasks come first).")
+        if table.due_week:
+            # pick 1-2 due soon
+            sorted_week = table.week_by_urgency(2)
+            plan.append(f"Book 1 focused block for **{titles[sorted_week[0]]}** within the next 2–3 days.")
+            if len(sorted_week) > 1:
+                plan.append(f"Reserve another block later this week for **{titles[sorted_week[1]]}**.")
+        else:
+            plan.append("No tasks due within 7 days — use this week to clear overdue work or set due dates/steps.")
+        return plan
+
+    if intent == INTENT_CAN_DELAY:
+        # tasks with due date > 7 days away or no due date + low priority
+        if not table.safe_to_delay:
+            plan.append("Right now, there are no clearly safe tasks to delay — most items are close in due date or important.")
+        else:
+            names = ", ".join([titles[i] for i in table.delay_candidates(5)])
+            plan.append("You can consider delaying these lower‑impact tasks: " + names + ".")
+            plan.append("If you need more time this week, move them to later dates or keep them in a 'Later / Someday' list.")
+        return plan
+
+    # top today
+    selected = table.top3()
+    if selected:
+        plan.append(f"Do **{titles[selected[0]]}** first, then move to the next item if time allows.")
+        if len(selected) >= 2:
+            plan.append(f"If you finish early, start **{titles[selected[1]]}** to reduce future pressure.")
+    else:
+        plan.append("No active tasks — add tasks with due dates so the assistant can prioritize accurately.")
+    return plan
+
+
+def answer_by_intent(intent: str, user_text: str, tasks: List[ParsedTask]) -> str:
+    total_active = len(tasks)
+
+    if total_active == 0:
+        return "No active tasks found. Add tasks (with due dates) and ask again."
+
+    # Special: count overdue question (only needs the overdue filter, no table)
+    if intent == INTENT_COUNT_OVERDUE:
+        overdue_tasks = [t for t in tasks if t.get("daysUntilDue") is not None and t["daysUntilDue"] < 0]
+        if overdue_tasks:
+            names = ", ".join([t["title"] for t in overdue_tasks[:3]])
+            return f"You have {len(overdue_tasks)} overdue task(s) out of {total_active} active task(s): {names}. Please do it ASAP."
+        return f"You have 0 overdue task(s) out of {total_active} active task(s). You're on track."
+
+    table = TaskTable(tasks)
+    titles, days, dues = table.titles, table.days, table.dues
+
+    lines: List[str] = []
+    # Immediate focus block (overdue + due today)
+    i1 = table.first_immediate()
+    lines.append("Immediate focus:")
+    if i1 is not None:
+        d = days[i1]
+        due = dues[i1] or "-"
+        if d < 0:
+            lines.append(f"1. {titles[i1]} — overdue by {abs(d)} day(s) due on {due}. {_reason_for_task(d)}")
+        else:
+            lines.append(f"1. {titles[i1]} — due today ({due}). {_reason_for_task(d)}")
+    else:
+        # if no overdue/due today, use top task as #1
+        i1 = table.top3()[0]
+        d = days[i1]
+        due = dues[i1] or "-"
+        if d is None:
+            lines.append(f"1. {titles[i1]} — no due date. {_reason_for_task(d)}")
+        else:
+            lines.append(f"1. {titles[i1]} — due in {d} day(s) due on {due}. {_reason_for_task(d)}")
+
+    # This week block (also used for weekly schedule intent)
+    lines.append("")
+    if intent == INTENT_PLAN_WEEK:
+        lines.append("This week (suggested schedule):")
+    else:
+        lines.append("This week:")
+
+    # exclude tasks already used as #1
+    week_sorted = table.week_by_urgency(3, exclude_title=titles[i1])
+
+    if week_sorted:
+        # output up to 3 items (#2, #3, #4) with clearer schedule wording
+        for idx, i in enumerate(week_sorted, start=2):
+            d = days[i]
+            due = dues[i] or "-"
+            if intent == INTENT_PLAN_WEEK:
+                when = "today" if d == 0 else f"in ~{d} day(s)"
+                lines.append(
+                    f"{idx}. {titles[i]} — schedule one focused block {when} (due on {due}). {_reason_for_task(d)}"
+                )
+            else:
+                lines.append(f"{idx}. {titles[i]} — due in {d} day(s) due on {due}. {_reason_for_task(d)}")
+    else:
+        lines.append("No tasks due within the next 7 days. Use this time to clear overdue work or prepare ahead.")
+
+    # Suggested plan
+    plan = _suggested_plan(intent, table)
+    lines.append("")
+    lines.append("Suggested plan:")
+    for p in plan[:2]:
+        # keep it short and stable
+        lines.append(f"- {p}")
+
+    return "\n".join(lines).strip()
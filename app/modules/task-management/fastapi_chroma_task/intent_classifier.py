@@ -0,0 +1,174 @@
+import re
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+# =========================
+# Intent detection (THIS is the key)
+# Table-driven: every phrase of every rule is compiled into ONE regex
+# (a prefix trie of alternations), so the lowercased text is scanned once
+# whatever the table size. The set of phrases found then picks the first
+# rule (priority order) whose groups all have a phrase in it.
+# A rule matches when EVERY group has at least one phrase in the text
+# (groups are AND, phrases inside a group are OR; substring match).
+# =========================
+INTENT_TOP_TODAY = "top_today"
+INTENT_PLAN_WEEK = "plan_week"
+INTENT_CLEAR_OVERDUE = "clear_overdue"
+INTENT_COUNT_OVERDUE = "count_overdue"
+INTENT_CAN_DELAY = "can_delay"
+INTENT_OTHER = "other"
+
+
+class IntentRule(NamedTuple):
+    intent: str
+    priority: int  # lower = checked first
+    groups: Tuple[Tuple[str, ...], ...]
+
+
+class IntentMatch(NamedTuple):
+    intent: str
+    evidence: Tuple[str, ...]  # phrases (or nearest example) that decided the intent
+    source: str  # "table" | "embedding" | "none"
+
+
+_NO_MATCH = IntentMatch(INTENT_OTHER, (), "none")
+# one decision per distinct set of phrases found (a handful in practice)
+_MAX_DECISIONS = 4096
+
+# Same decisions (and order) as the old if-chain
+DEFAULT_INTENT_TABLE: List[IntentRule] = [
+    IntentRule(INTENT_COUNT_OVERDUE, 10, (("how many", "count"), ("overdue",))),
+    IntentRule(INTENT_CLEAR_OVERDUE, 20, (("overdue",), ("clear", "finish", "first", "which"))),
+    IntentRule(INTENT_PLAN_WEEK, 30, (("next 7 days", "plan my week", "schedule over the next", "weekly schedule"),)),
+    IntentRule(INTENT_CAN_DELAY, 40, (("can i delay", "which tasks can i delay", "what can i delay", "postpone", "can wait"),)),
+    IntentRule(INTENT_TOP_TODAY, 50, (("top",), ("today",))),
+    IntentRule(INTENT_TOP_TODAY, 51, (("what should i do today", "most urgent today"),)),
+]
+
+# Labelled examples for the optional embedding nearest-neighbour fallback
+DEFAULT_INTENT_EXAMPLES: List[Tuple[str, str]] = [
+    ("what are the top 3 tasks i should do today", INTENT_TOP_TODAY),
+    ("what should i work on right now", INTENT_TOP_TODAY),
+    ("which task is the most important today", INTENT_TOP_TODAY),
+    ("help me plan the next few days", INTENT_PLAN_WEEK),
+    ("make me a schedule for this week", INTENT_PLAN_WEEK),
+    ("how should i organise my week", INTENT_PLAN_WEEK),
+    ("which late tasks should i finish first", INTENT_CLEAR_OVERDUE),
+    ("i missed some deadlines, what do i fix first", INTENT_CLEAR_OVERDUE),
+    ("how many tasks are late", INTENT_COUNT_OVERDUE),
+    ("number of tasks past their due date", INTENT_COUNT_OVERDUE),
+    ("what can i push to later", INTENT_CAN_DELAY),
+    ("which tasks are not urgent and can be moved", INTENT_CAN_DELAY),
+]
+
+
+def _trie_pattern(phrases: Sequence[str]) -> str:
+    """One alternation for all phrases with shared prefixes factored out
+    ("which" / "which tasks can i delay" -> which(?: tasks can i delay)?),
+    so the longest phrase starting at a position is the one matched."""
+    trie: Dict[str, dict] = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def emit(node: Dict[str, dict]) -> str:
+        alts = [re.escape(ch) + emit(child) for ch, child in sorted(node.items()) if ch]
+        if not alts:
+            return ""
+        body = alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+        if "" in node:  # a phrase ends here and longer ones go on
+            body = ("(?:" + body + ")" if len(alts) == 1 else body) + "?"
+        return body
+
+    return emit(trie)
+
+
+class IntentClassifier:
+    def __init__(
+        self,
+        table: Sequence[IntentRule] = DEFAULT_INTENT_TABLE,
+        examples: Sequence[Tuple[str, str]] = (),
+        embed_fn: Optional[Callable[[List[str]], Any]] = None,
+        min_similarity: float = 0.8,
+    ):
+        self.table = sorted(table, key=lambda r: r.priority)
+        self._compile()
+
+        self.examples = list(examples)
+        self._embed_fn = embed_fn
+        self.min_similarity = min_similarity
+        self._example_matrix: Any = None
+
+    @property
+    def has_fallback(self) -> bool:
+        return self._embed_fn is not None and bool(self.examples)
+
+    def _compile(self) -> None:
+        phrases = sorted({p for rule in self.table for group in rule.groups for p in group if p})
+        self._bit = {p: 1 << i for i, p in enumerate(phrases)}
+        self._findall = re.compile(_trie_pattern(phrases)).findall if phrases else (lambda t: [])
+        # a match also means every phrase inside it is in the text ("which tasks can i delay" -> "which")
+        self._contains = {p: sum(self._bit[q] for q in phrases if q in p) for p in phrases}
+        # the scan resumes after a match, so a phrase that starts inside one and runs past
+        # its end ("firs[t]op") is never matched -> those few are checked with `in`
+        self._overlaps = {
+            p: tuple(
+                (q, self._bit[q]) for q in phrases
+                if any(p.endswith(q[:k]) for k in range(1, min(len(p), len(q))))
+            )
+            for p in phrases
+        }
+        self._decisions: Dict[int, IntentMatch] = {}
+
+    def _decide(self, found: int) -> IntentMatch:
+        for rule in self.table:
+            evidence: List[str] = []
+            for group in rule.groups:
+                for p in group:
+                    if found & self._bit[p]:
+                        evidence.append(p)
+                        break
+                else:
+                    break
+            else:
+                return IntentMatch(rule.intent, tuple(evidence), "table")
+        return _NO_MATCH
+
+    def classify(self, user_text: str) -> IntentMatch:
+        t = (user_text or "").strip().lower()
+        found = 0
+        for p in self._findall(t):
+            found |= self._contains[p]
+            for q, bit in self._overlaps[p]:
+                if q in t:
+                    found |= bit
+        if not found:
+            return _NO_MATCH
+        decision = self._decisions.get(found)
+        if decision is None:
+            if len(self._decisions) >= _MAX_DECISIONS:
+                self._decisions.clear()
+            decision = self._decisions[found] = self._decide(found)
+        return decision
+
+    def nearest(self, user_text: str) -> IntentMatch:
+        """Embedding nearest-neighbour over the labelled examples (cosine, thresholded)."""
+        if not self.has_fallback:
+            return IntentMatch(INTENT_OTHER, (), "none")
+
+        import numpy as np
+
+        if self._example_matrix is None:
+            vecs = np.asarray(self._embed_fn([e[0] for e in self.examples]), dtype=np.float32)
+            self._example_matrix = vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+
+        # same text as the task retrieval query, so the embedding cache is shared
+        q = np.asarray(self._embed_fn([(user_text or "").strip()])[0], dtype=np.float32)
+        q = q / (np.linalg.norm(q) or 1.0)
+        sims = self._example_matrix @ q
+        best = int(np.argmax(sims))
+        if float(sims[best]) < self.min_similarity:
+            return IntentMatch(INTENT_OTHER, (), "none")
+        example, intent = self.examples[best]
+        return IntentMatch(intent, (example,), "embedding")
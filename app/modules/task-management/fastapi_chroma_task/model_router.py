@@ -0,0 +1,111 @@
+import math
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Sequence
+
+# =========================
+# Adaptive model routing (largest -> smallest)
+# Per model: recent generation latencies (sliding window) + generations in flight.
+# The admission queue in front of Ollama is global (admission.py), so a new
+# request waits behind every admitted or queued request, whatever its model.
+# Predicted latency for a new request = p95 * rounds it waits, where
+# rounds = ceil((queue_depth() + 1) / parallel slots) and queue_depth() is the
+# admission controller's active + queued count.
+# The requested model is kept while that prediction meets the SLO, otherwise
+# the next smaller model in the list is tried; if none meets it, the one with
+# the lowest prediction is used.
+# Models without enough samples yet are assumed to meet the SLO.
+# =========================
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    if not values:
+        return 0.0
+    s = sorted(values)
+    idx = min(len(s) - 1, max(0, int(round(q * (len(s) - 1)))))
+    return s[idx]
+
+
+class ModelStats:
+    def __init__(self, window: int):
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.in_flight = 0
+        self.served = 0
+
+    def p95(self) -> float:
+        return percentile(self.latencies, 0.95)
+
+
+class ModelRouter:
+    def __init__(
+        self,
+        models: Sequence[str],
+        slo_p95_s: float,
+        queue_depth: Callable[[], int] = lambda: 0,
+        parallel: int = 1,
+        window: int = 50,
+        min_samples: int = 5,
+    ):
+        self.models: List[str] = list(models)  # largest first
+        self.slo_p95_s = slo_p95_s
+        self.queue_depth = queue_depth
+        self.parallel = max(1, parallel)
+        self.min_samples = min_samples
+        self._stats: Dict[str, ModelStats] = {m: ModelStats(window) for m in self.models}
+        self.downgrades = 0
+
+    def predicted_s(self, model: str) -> Optional[float]:
+        st = self._stats.get(model)
+        if st is None or len(st.latencies) < self.min_samples:
+            return None
+        return st.p95() * math.ceil((self.queue_depth() + 1) / self.parallel)
+
+    def choose(self, requested: str) -> str:
+        if requested not in self._stats:
+            return requested  # not a routed model -> use as asked
+        candidates = self.models[self.models.index(requested):]
+        chosen = next(
+            (m for m in candidates if (self.predicted_s(m) or 0.0) <= self.slo_p95_s),
+            None,
+        )
+        if chosen is None:
+            # nobody meets the SLO -> the one expected to finish first
+            chosen = min(candidates, key=lambda m: self.predicted_s(m) or 0.0)
+        if chosen != requested:
+            self.downgrades += 1
+        return chosen
+
+    @contextmanager
+    def track(self, model: str) -> Iterator[None]:
+        """Count one generation as in flight; record its latency if it succeeds."""
+        st = self._stats.get(model)
+        if st is None:
+            yield
+            return
+        st.in_flight += 1
+        t0 = time.perf_counter()
+        try:
+            yield
+            st.latencies.append(time.perf_counter() - t0)
+            st.served += 1
+        finally:
+            st.in_flight -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "slo_p95_s": self.slo_p95_s,
+            "parallel": self.parallel,
+            "queue_depth": self.queue_depth(),
+            "downgrades": self.downgrades,
+            "models": {
+                m: {
+                    "in_flight": st.in_flight,
+                    "served": st.served,
+                    "samples": len(st.latencies),
+                    "p95_s": round(st.p95(), 3) if st.latencies else None,
+                    "predicted_s": None if self.predicted_s(m) is None else round(self.predicted_s(m), 3),
+                }
+                for m, st in self._stats.items()
+            },
+        }
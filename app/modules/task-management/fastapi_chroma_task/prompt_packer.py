@@ -0,0 +1,190 @@
+import re
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+# =========================
+# Token-budgeted prompt packer (Ollama path only)
+# Tokens are estimated (~4 chars/token, no tokenizer needed). Pieces are
+# ranked and added greedily until the budget is used:
+#   the CORE_TASK_BLOCKS most urgent TASKS_CONTEXT blocks > rules (retrieval
+#   order) > other TASKS_CONTEXT blocks (by urgency) > last history turn pair
+#   > retrieved tasks (by distance) > older history
+# Retrieved tasks are deduped against the TASKS_CONTEXT blocks that were KEPT
+# (packed before them), so a task whose block was dropped for budget can
+# still reach the prompt through retrieval.
+# System prompt, section headers and the user question are always kept.
+# Kept pieces are rendered back in their original order and format.
+# =========================
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4  # role + separators per chat message
+RECENT_HISTORY_MESSAGES = 2
+CORE_TASK_BLOCKS = 5
+
+_TITLE_RE = re.compile(r"^Title:\s*(.+?)\s*$", re.MULTILINE)
+
+# tier -> packing order (lower = packed first)
+_TIER_CORE_TASKS, _TIER_RULES, _TIER_TASKS, _TIER_RECENT, _TIER_RETRIEVED, _TIER_HISTORY = range(6)
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text or "") + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def messages_tokens(messages: Sequence[Dict[str, str]]) -> int:
+    return sum(estimate_tokens(m.get("content", "")) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def prompt_budget(num_ctx: int, num_predict: int, ratio: float) -> int:
+    """Prompt tokens allowed: a share of num_ctx that still leaves room for the reply."""
+    return max(256, min(int(num_ctx * ratio), num_ctx - num_predict))
+
+
+class _Piece(NamedTuple):
+    tier: int
+    section: str
+    index: int  # position in its section (render order)
+    text: str
+    rank: Tuple[Any, ...]
+    tokens: int
+
+
+class PackedPrompt(NamedTuple):
+    messages: List[Dict[str, str]]
+    tokens_before: int
+    tokens_after: int
+    budget: int
+    dropped: Dict[str, int]
+
+
+def _render_user_payload(
+    rules: List[str],
+    task_blocks: List[str],
+    tasks_omitted: int,
+    retrieved: List[str],
+    user_text: str,
+) -> str:
+    rules_text = "\n".join(f"- {r}".strip() for r in rules) or "No rules found."
+    tasks_context_block = "\n\n".join(task_blocks) or "No TASKS_CONTEXT provided."
+    if tasks_omitted:
+        tasks_context_block += f"\n\n({tasks_omitted} more task(s) not shown)"
+    tasks_text = "\n\n".join(f"- {t}".strip() for t in retrieved) or "No tasks found."
+    return (
+        "RULES:\n"
+        f"{rules_text}\n\n"
+        "TASKS_CONTEXT:\n"
+        f"{tasks_context_block}\n\n"
+        "TASKS (retrieved from Chroma):\n"
+        f"{tasks_text}\n\n"
+        "USER QUESTION:\n"
+        f"{user_text}\n"
+    )
+
+
+def dedupe_retrieved(
+    retrieved: Sequence[Dict[str, Any]], task_titles: Set[str], tasks_context_text: str
+) -> List[Dict[str, Any]]:
+    """Drop retrieved task docs whose task is already in the given TASKS_CONTEXT blocks (or repeated)."""
+    titles = {t.strip().lower() for t in task_titles if t}
+    seen: Set[str] = set()
+    kept: List[Dict[str, Any]] = []
+    for r in retrieved:
+        text = (r.get("text_preview") or "").strip()
+        if not text or text in seen:
+            continue
+        seen.add(text)
+        m = _TITLE_RE.search(text)
+        if m and m.group(1).strip().lower() in titles:
+            continue
+        if text in tasks_context_text:
+            continue
+        kept.append(r)
+    return kept
+
+
+def pack_prompt(
+    system: str,
+    user_text: str,
+    rules: Sequence[str],
+    task_blocks: Sequence[Tuple[Tuple[Any, ...], str]],
+    retrieved: Sequence[Dict[str, Any]],
+    history: Sequence[Dict[str, str]],
+    budget: int,
+) -> PackedPrompt:
+    """
+    task_blocks: (urgency rank, "#N ..." text with a "Title:" line) in TASKS_CONTEXT order.
+    retrieved: _build_retrieved_payload() items (text_preview, distance).
+    history: chat messages, oldest first.
+    """
+    blocks_text = [b for _, b in task_blocks]
+    retrieved_text = [r.get("text_preview", "") for r in retrieved if r.get("text_preview")]
+    full_payload = _render_user_payload(list(rules), blocks_text, 0, retrieved_text, user_text)
+    tokens_before = messages_tokens(
+        [{"role": "system", "content": system}, *history, {"role": "user", "content": full_payload}]
+    )
+
+    pieces: List[_Piece] = []
+    by_urgency = sorted(range(len(task_blocks)), key=lambda i: (task_blocks[i][0], i))
+    for n, i in enumerate(by_urgency):
+        tier = _TIER_CORE_TASKS if n < CORE_TASK_BLOCKS else _TIER_TASKS
+        pieces.append(_Piece(tier, "tasks_context", i, blocks_text[i], (n,), estimate_tokens(blocks_text[i]) + 1))
+    for i, text in enumerate(rules):
+        pieces.append(_Piece(_TIER_RULES, "rules", i, text, (i,), estimate_tokens(text) + 1))
+    n_hist = len(history)
+    for i, m in enumerate(history):
+        tier = _TIER_RECENT if i >= n_hist - RECENT_HISTORY_MESSAGES else _TIER_HISTORY
+        pieces.append(_Piece(
+            tier, "history", i, m["content"], (-i,), estimate_tokens(m["content"]) + MESSAGE_OVERHEAD_TOKENS
+        ))
+
+    # always sent: system, headers/fallback lines, question
+    used = messages_tokens([
+        {"role": "system", "content": system},
+        {"role": "user", "content": _render_user_payload([], [], 0, [], user_text)},
+    ])
+    kept: Dict[str, List[int]] = {"tasks_context": [], "rules": [], "retrieved": [], "history": []}
+
+    def _pack(candidates: List[_Piece]) -> None:
+        nonlocal used
+        for p in sorted(candidates, key=lambda p: (p.tier, p.rank)):
+            if used + p.tokens <= budget:
+                used += p.tokens
+                kept[p.section].append(p.index)
+
+    def _keep(section: str, items: Sequence[Any]) -> List[Any]:
+        return [items[i] for i in sorted(kept[section])]
+
+    # every tier above the retrieved tasks first, then dedupe against what made it in
+    _pack([p for p in pieces if p.tier < _TIER_RETRIEVED])
+    kept_blocks = _keep("tasks_context", blocks_text)
+    kept_titles = {m.group(1) for b in kept_blocks for m in [_TITLE_RE.search(b)] if m}
+    unique = dedupe_retrieved(retrieved, kept_titles, "\n\n".join(kept_blocks))
+    for i, r in enumerate(unique):
+        dist = r.get("distance")
+        pieces.append(_Piece(
+            _TIER_RETRIEVED, "retrieved", i, r["text_preview"],
+            (dist if dist is not None else 9e9, i), estimate_tokens(r["text_preview"]) + 1,
+        ))
+    _pack([p for p in pieces if p.tier >= _TIER_RETRIEVED])
+
+    kept_history = _keep("history", list(history))
+    payload = _render_user_payload(
+        _keep("rules", list(rules)),
+        kept_blocks,
+        len(blocks_text) - len(kept_blocks),
+        [r["text_preview"] for r in _keep("retrieved", unique)],
+        user_text,
+    )
+    messages = [{"role": "system", "content": system}, *kept_history, {"role": "user", "content": payload}]
+
+    dropped = {
+        "tasks_context": len(blocks_text) - len(kept_blocks),
+        "rules": len(rules) - len(kept["rules"]),
+        "retrieved_duplicates": len(retrieved_text) - len(unique),
+        "retrieved": len(unique) - len(kept["retrieved"]),
+        "history": n_hist - len(kept_history),
+    }
+    return PackedPrompt(messages, tokens_before, messages_tokens(messages), budget, dropped)
+
+
+def split_task_blocks(tasks_context: Optional[str]) -> List[str]:
+    """v1 tasksContext text -> blocks separated by blank lines (kept in client order)."""
+    return [b.strip() for b in re.split(r"\n\s*\n", (tasks_context or "").strip()) if b.strip()]
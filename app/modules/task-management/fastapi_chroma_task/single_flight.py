@@ -0,0 +1,73 @@
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+# =========================
+# Single-flight for identical concurrent calls
+# The first caller for a key starts the work as its own task; callers that
+# arrive while it runs attach to it and get the same result (or exception).
+# Callers are reference-counted: a cancelled caller (client gone) only
+# detaches, the shared work is cancelled when the LAST caller leaves.
+# =========================
+
+
+def request_key(*parts: Any) -> str:
+    blob = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.blake2b(blob.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: "asyncio.Task[Any]"):
+        self.task = task
+        self.waiters = 0
+
+
+def _consume_result(task: "asyncio.Task[Any]") -> None:
+    # avoid "exception was never retrieved" when every caller already left
+    if not task.cancelled():
+        task.exception()
+
+
+class SingleFlight:
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self.started = 0
+        self.joined = 0
+        self.cancelled = 0
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        flight: Optional[_Flight] = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(fn()))
+            flight.task.add_done_callback(_consume_result)
+            flight.task.add_done_callback(lambda _t, k=key, f=flight: self._forget(k, f))
+            self._flights[key] = flight
+            self.started += 1
+        else:
+            self.joined += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # last interested caller is gone -> stop the shared work
+                flight.task.cancel()
+                self._forget(key, flight)
+                self.cancelled += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": len(self._flights),
+            "started": self.started,
+            "joined": self.joined,
+            "cancelled": self.cancelled,
+        }
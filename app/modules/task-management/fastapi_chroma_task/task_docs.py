@@ -0,0 +1,182 @@
+import hashlib
+import json
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+from pydantic import BaseModel
+
+# =========================
+# Task documents (type=task) for Chroma retrieval
+# Records are streamed in, cut into batches, and each batch costs, per
+# target collection (one, or one per user shard touched; see shards.py):
+#   1 collection.get (stored contentHash) + 1 collection.upsert
+#   + 1 collection.delete (completed tasks)
+# plus 1 embed call for the batch's CHANGED docs only.
+# Record fields: userId, id, title, details, priority, startDate, dueDate
+# (YYYY-MM-DD), completed.
+# =========================
+TASK_MODULE = "task-management"
+TASK_DOC_TYPE = "task"
+DEFAULT_BATCH_SIZE = 128
+
+
+class TaskDocRecord(BaseModel):
+    # one NDJSON line of /tasks/bulk_upsert and Insert_Tasks.py
+    userId: str
+    id: str
+    title: str = ""
+    details: Optional[str] = None
+    priority: int = 0
+    startDate: Optional[str] = None  # YYYY-MM-DD
+    dueDate: Optional[str] = None  # YYYY-MM-DD
+    completed: bool = False  # True = delete the task document
+
+
+def parse_record(line: Union[str, bytes]) -> Dict[str, Any]:
+    """One NDJSON line -> validated record dict (ValueError / TypeError if it is not a TaskDocRecord)."""
+    return TaskDocRecord(**json.loads(line)).dict()
+
+
+def task_doc_id(user_id: str, task_id: str) -> str:
+    return f"task::{user_id}::{task_id}"
+
+
+def task_document(record: Dict[str, Any]) -> str:
+    # same field names as TASKS_CONTEXT so retrieved previews read the same way
+    return (
+        f"Title: {record.get('title') or 'Untitled'}\n"
+        f"Details: {record.get('details') or '-'}\n"
+        f"PriorityScore: {record.get('priority') or 0}\n"
+        f"Start: {record.get('startDate') or '-'} | Due: {record.get('dueDate') or '-'}"
+    )
+
+
+def content_hash(document: str, user_id: str) -> str:
+    return hashlib.blake2b(f"{user_id}\x00{document}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+def batched(records: Iterable[Dict[str, Any]], batch_size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch: List[Dict[str, Any]] = []
+    for r in records:
+        batch.append(r)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class BulkStats:
+    def __init__(self):
+        self.received = 0
+        self.upserted = 0
+        self.unchanged = 0
+        self.deleted = 0
+        self.batches = 0
+        self._t0 = time.perf_counter()
+
+    def as_dict(self) -> Dict[str, Any]:
+        seconds = time.perf_counter() - self._t0
+        return {
+            "received": self.received,
+            "upserted": self.upserted,
+            "unchanged": self.unchanged,
+            "deleted": self.deleted,
+            "batches": self.batches,
+            "seconds": round(seconds, 3),
+            "docs_per_sec": round(self.received / seconds, 1) if seconds > 0 else None,
+        }
+
+
+class TaskDocLoader:
+    def __init__(
+        self,
+        collection: Any,
+        embed_fn: Callable[[List[str]], Any],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        collection_for: Optional[Callable[[str], Any]] = None,
+    ):
+        # collection_for(userId) -> collection routes each user to a shard (see shards.py);
+        # default: every document goes to `collection`
+        self.collection = collection
+        self._collection_for = collection_for or (lambda _user_id: collection)
+        self._embed_fn = embed_fn
+        self.batch_size = batch_size
+
+    def load_batch(self, records: List[Dict[str, Any]], stats: Optional[BulkStats] = None) -> BulkStats:
+        stats = stats or BulkStats()
+        stats.received += len(records)
+        stats.batches += 1
+
+        # last record wins if the same task appears twice in one batch
+        live: Dict[str, Dict[str, Any]] = {}
+        dead: Dict[str, str] = {}  # doc id -> userId
+        for r in records:
+            doc_id = task_doc_id(r["userId"], r["id"])
+            if r.get("completed"):
+                dead[doc_id] = r["userId"]
+                live.pop(doc_id, None)
+            else:
+                live[doc_id] = r
+                dead.pop(doc_id, None)
+
+        # one get / upsert / delete per collection, one embed call for the whole batch
+        collections: Dict[int, Any] = {}
+        live_by: Dict[int, List[str]] = {}
+        dead_by: Dict[int, List[str]] = {}
+        for doc_id, r in live.items():
+            coll = self._collection_for(r["userId"])
+            collections[id(coll)] = coll
+            live_by.setdefault(id(coll), []).append(doc_id)
+        for doc_id, user_id in dead.items():
+            coll = self._collection_for(user_id)
+            collections[id(coll)] = coll
+            dead_by.setdefault(id(coll), []).append(doc_id)
+
+        for key, doc_ids in dead_by.items():
+            collections[key].delete(ids=doc_ids)
+            stats.deleted += len(doc_ids)
+
+        changed: List[Any] = []  # (collection key, doc id, document, metadata)
+        for key, doc_ids in live_by.items():
+            existing = collections[key].get(ids=doc_ids, include=["metadatas"])
+            stored_hash = {
+                i: (m or {}).get("contentHash")
+                for i, m in zip(existing.get("ids") or [], existing.get("metadatas") or [])
+            }
+            for doc_id in doc_ids:
+                r = live[doc_id]
+                document = task_document(r)
+                h = content_hash(document, r["userId"])
+                if stored_hash.get(doc_id) == h:
+                    stats.unchanged += 1
+                    continue
+                changed.append((key, doc_id, document, {
+                    "module": TASK_MODULE,
+                    "type": TASK_DOC_TYPE,
+                    "userId": r["userId"],
+                    "taskId": r["id"],
+                    "contentHash": h,
+                }))
+
+        if not changed:
+            return stats
+
+        embeddings = self._embed_fn([c[2] for c in changed])
+        upserts: Dict[int, Dict[str, List[Any]]] = {}
+        for (key, doc_id, document, meta), emb in zip(changed, embeddings):
+            u = upserts.setdefault(key, {"ids": [], "documents": [], "metadatas": [], "embeddings": []})
+            u["ids"].append(doc_id)
+            u["documents"].append(document)
+            u["metadatas"].append(meta)
+            u["embeddings"].append(emb)
+        for key, u in upserts.items():
+            collections[key].upsert(**u)
+            stats.upserted += len(u["ids"])
+        return stats
+
+    def load(self, records: Iterable[Dict[str, Any]]) -> BulkStats:
+        stats = BulkStats()
+        for batch in batched(records, self.batch_size):
+            self.load_batch(batch, stats)
+        return stats
@@ -0,0 +1,193 @@
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from tasks_context import ParsedTask
+
+# =========================
+# Per-user task index (SQLite) with versioned delta sync
+# The app pushes add/update/delete deltas once (/tasks/sync) and /chat_rag
+# only sends taskIndexVersion. Due dates are stored as absolute YYYY-MM-DD
+# so DaysUntilDue is recomputed for "today" on every read.
+# Parsed task lists are kept in memory per (user, version, day).
+# Several API workers may share the file: apply() takes SQLite's write lock
+# (BEGIN IMMEDIATE) before reading the version, so versions stay linear.
+# doc_version(user) is a second counter for the user's type=task docs in
+# Chroma: bumped by every bulk upsert that touches the user, read by the
+# exact-search cache (user_vectors.py) to know when its matrix is stale.
+# =========================
+
+
+class VersionConflict(Exception):
+    def __init__(self, server_version: int):
+        super().__init__(f"task index is at version {server_version}")
+        self.server_version = server_version
+
+
+def _display_date(iso: Optional[str]) -> Optional[str]:
+    # same DD/MM/YYYY format the app uses in tasksContext
+    if not iso:
+        return None
+    try:
+        return date.fromisoformat(iso).strftime("%d/%m/%Y")
+    except ValueError:
+        return None
+
+
+def _days_until(iso: Optional[str], today: date) -> Optional[int]:
+    if not iso:
+        return None
+    try:
+        return (date.fromisoformat(iso) - today).days
+    except ValueError:
+        return None
+
+
+class TaskIndex:
+    def __init__(self, path: str = "./task_index.sqlite3", max_cached_users: int = 1024):
+        self.path = path
+        self.max_cached_users = max_cached_users
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS task_index_users (
+                user_id TEXT PRIMARY KEY,
+                version INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS task_index_tasks (
+                user_id TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                position INTEGER NOT NULL DEFAULT 0,
+                title TEXT NOT NULL,
+                details TEXT,
+                priority INTEGER NOT NULL DEFAULT 0,
+                start_date TEXT,
+                due_date TEXT,
+                PRIMARY KEY (user_id, task_id)
+            );
+            CREATE TABLE IF NOT EXISTS task_doc_versions (
+                user_id TEXT PRIMARY KEY,
+                version INTEGER NOT NULL
+            );
+            """
+        )
+        self._db.commit()
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, Tuple[int, date, List[ParsedTask]]]" = OrderedDict()
+
+    def _version_locked(self, user_id: str) -> int:
+        row = self._db.execute("SELECT version FROM task_index_users WHERE user_id = ?", (user_id,)).fetchone()
+        return int(row[0]) if row else 0
+
+    def version(self, user_id: str) -> int:
+        with self._lock:
+            return self._version_locked(user_id)
+
+    def doc_version(self, user_id: str) -> int:
+        with self._lock:
+            row = self._db.execute("SELECT version FROM task_doc_versions WHERE user_id = ?", (user_id,)).fetchone()
+        return int(row[0]) if row else 0
+
+    def bump_doc_versions(self, user_ids: Iterable[str]) -> None:
+        with self._lock, self._db:
+            self._db.executemany(
+                """
+                INSERT INTO task_doc_versions (user_id, version) VALUES (?, 1)
+                ON CONFLICT(user_id) DO UPDATE SET version = version + 1
+                """,
+                [(user_id,) for user_id in set(user_ids)],
+            )
+
+    def apply(
+        self,
+        user_id: str,
+        base_version: int,
+        upserts: Iterable[Dict[str, Any]],
+        deletes: Iterable[str],
+        reset: bool = False,
+    ) -> int:
+        """Apply one delta batch on top of base_version. Returns the new version."""
+        with self._lock, self._db:
+            self._db.execute("BEGIN IMMEDIATE")
+            current = self._version_locked(user_id)
+            if not reset and base_version != current:
+                raise VersionConflict(current)
+
+            new_version = current + 1
+            if reset:
+                self._db.execute("DELETE FROM task_index_tasks WHERE user_id = ?", (user_id,))
+            self._db.executemany(
+                "DELETE FROM task_index_tasks WHERE user_id = ? AND task_id = ?",
+                [(user_id, task_id) for task_id in deletes],
+            )
+            self._db.executemany(
+                """
+                INSERT OR REPLACE INTO task_index_tasks
+                    (user_id, task_id, position, title, details, priority, start_date, due_date)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                [
+                    (
+                        user_id,
+                        u["id"],
+                        u.get("position") or 0,
+                        u.get("title") or "Untitled",
+                        u.get("details"),
+                        u.get("priority") or 0,
+                        u.get("startDate"),
+                        u.get("dueDate"),
+                    )
+                    for u in upserts
+                ],
+            )
+            self._db.execute(
+                "INSERT OR REPLACE INTO task_index_users (user_id, version) VALUES (?, ?)",
+                (user_id, new_version),
+            )
+            self._cache.pop(user_id, None)
+            return new_version
+
+    def tasks(self, user_id: str, expected_version: int, today: Optional[date] = None) -> List[ParsedTask]:
+        """Parsed tasks for user_id; raises VersionConflict if the client is on another version."""
+        today = today or date.today()
+        with self._lock:
+            cached = self._cache.get(user_id)
+            if cached is not None and cached[0] == expected_version and cached[1] == today:
+                self._cache.move_to_end(user_id)
+                return cached[2]
+
+            current = self._version_locked(user_id)
+            if current != expected_version:
+                raise VersionConflict(current)
+
+            rows = self._db.execute(
+                """
+                SELECT title, details, priority, start_date, due_date
+                FROM task_index_tasks WHERE user_id = ?
+                ORDER BY position, rowid
+                """,
+                (user_id,),
+            ).fetchall()
+
+            tasks: List[ParsedTask] = []
+            for title, details, priority, start_date, due_date in rows:
+                days_until_due = _days_until(due_date, today)
+                tasks.append(ParsedTask(
+                    title=title,
+                    details=details,
+                    priority=priority,
+                    daysUntilDue=days_until_due,
+                    start=_display_date(start_date),
+                    due=_display_date(due_date),
+                    overdue=days_until_due is not None and days_until_due < 0,
+                    raw=None,
+                ))
+
+            self._cache[user_id] = (current, today, tasks)
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > self.max_cached_users:
+                self._cache.popitem(last=False)
+            return tasks
@@ -0,0 +1,173 @@
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+# =========================
+# Parse tasksContext -> structured tasks (MOST IMPORTANT)
+# Your TaskDashboard already sends tasksContext with:
+#  Title: ...
+#  PriorityScore: ...
+#  DaysUntilDue: ...
+#  Start/Due etc.
+# Two block layouts are read:
+#  "TASK" header, "Start: <date>" and "Due: <date>" lines (buildTasksContextForAI)
+#  "#N" header, "Start: <date> | Due: <date>" line (format_tasks_context)
+#
+# Single pass over the lines: every line is matched against ONE precompiled
+# pattern (picked by its "Key:" prefix) instead of running six re.search
+# calls over every block.
+# =========================
+class ParsedTask(Dict[str, Any]):
+    pass
+
+
+_HEADER_RE = re.compile(r"#\d+")
+_PRIORITY_RE = re.compile(r"\d+")
+_DAYS_RE = re.compile(r"[-\d]+|null")
+_START_DUE_RE = re.compile(r"(.+?)\s*\|\s*Due:\s*(.+)")
+
+# field name -> index in the per-block slot list
+_TITLE, _DETAILS, _PRIORITY, _DAYS, _START, _DUE, _OVERDUE = range(7)
+
+
+def _build_task(lines: List[str], slots: List[Optional[str]]) -> Optional[ParsedTask]:
+    raw = "\n".join(lines).strip()
+    if not raw:
+        return None
+
+    prio = int(slots[_PRIORITY]) if slots[_PRIORITY] is not None else 0
+
+    days_raw = slots[_DAYS]
+    days_until_due: Optional[int] = None
+    if days_raw and days_raw != "null":
+        try:
+            days_until_due = int(days_raw)
+        except ValueError:
+            days_until_due = None
+
+    overdue_raw = slots[_OVERDUE]
+    overdue = (overdue_raw == "yes") if overdue_raw else (days_until_due is not None and days_until_due < 0)
+
+    return ParsedTask(
+        title=slots[_TITLE] or "Untitled",
+        details=slots[_DETAILS],
+        priority=prio,
+        daysUntilDue=days_until_due,
+        start=slots[_START],
+        due=slots[_DUE],
+        overdue=overdue,
+        raw=raw,
+    )
+
+
+def parse_tasks_context(tasks_context: str) -> List[ParsedTask]:
+    s = (tasks_context or "").strip()
+    if not s or "No active tasks" in s:
+        return []
+
+    tasks: List[ParsedTask] = []
+    block: List[str] = []
+    slots: List[Optional[str]] = [None] * 7
+
+    for line in s.split("\n"):
+        stripped = line.strip()
+
+        # "TASK" / "#<num>" header closes the current block
+        if stripped == "TASK" or (stripped[:1] == "#" and _HEADER_RE.fullmatch(stripped)):
+            task = _build_task(block, slots)
+            if task is not None:
+                tasks.append(task)
+            block = []
+            slots = [None] * 7
+            continue
+
+        block.append(line)
+
+        key, sep, value = stripped.partition(":")
+        if not sep:
+            continue
+
+        # first valid line wins for every field (same as re.search per field).
+        # An empty value stays empty: the old `Key:\s*(.+)` patterns ran on
+        # into the next line ("Details: " -> details="DaysUntilDue: 3").
+        if key == "Title":
+            if slots[_TITLE] is None and value.strip():
+                slots[_TITLE] = value.strip()
+        elif key == "Details":
+            if slots[_DETAILS] is None and value.strip():
+                slots[_DETAILS] = value.strip()
+        elif key == "PriorityScore":
+            if slots[_PRIORITY] is None:
+                m = _PRIORITY_RE.match(value.lstrip())
+                if m:
+                    slots[_PRIORITY] = m.group(0)
+        elif key == "DaysUntilDue":
+            if slots[_DAYS] is None:
+                v = value.strip()
+                if _DAYS_RE.fullmatch(v):
+                    slots[_DAYS] = v
+        elif key == "Start":
+            if slots[_START] is None:
+                v = value.strip()
+                m = _START_DUE_RE.fullmatch(v)
+                if m:
+                    slots[_START] = m.group(1).strip()
+                    if slots[_DUE] is None:
+                        slots[_DUE] = m.group(2).strip()
+                elif v:
+                    slots[_START] = v
+        elif key == "Due":
+            if slots[_DUE] is None and value.strip():
+                slots[_DUE] = value.strip()
+        elif key == "Overdue":
+            if slots[_OVERDUE] is None:
+                v = value.strip()
+                if v == "yes" or v == "no":
+                    slots[_OVERDUE] = v
+
+    task = _build_task(block, slots)
+    if task is not None:
+        tasks.append(task)
+
+    # keep only tasks that have at least title
+    return tasks
+
+
+# =========================
+# v2 requests: typed task list -> ParsedTask (no text parsing)
+# =========================
+def tasks_from_items(items: Iterable[Any]) -> List[ParsedTask]:
+    """Build ParsedTask dicts straight from ChatRequest.tasks (TaskItem models)."""
+    tasks: List[ParsedTask] = []
+    for it in items:
+        days_until_due = it.daysUntilDue
+        overdue = it.overdue if it.overdue is not None else (days_until_due is not None and days_until_due < 0)
+        tasks.append(ParsedTask(
+            title=(it.title or "").strip() or "Untitled",
+            details=it.details,
+            priority=it.priority or 0,
+            daysUntilDue=days_until_due,
+            start=it.start,
+            due=it.due,
+            overdue=overdue,
+            raw=None,
+        ))
+    return tasks
+
+
+def format_task_block(number: int, t: ParsedTask) -> str:
+    """One "#N" block of the TASKS_CONTEXT text."""
+    d = t.get("daysUntilDue")
+    return (
+        f"#{number}\n"
+        f"Title: {t['title']}\n"
+        f"Details: {t.get('details') or '-'}\n"
+        f"PriorityScore: {t.get('priority', 0)}\n"
+        f"DaysUntilDue: {'null' if d is None else d}\n"
+        f"Start: {t.get('start') or '-'} | Due: {t.get('due') or '-'}\n"
+        f"Overdue: {'yes' if t.get('overdue') else 'no'}"
+    )
+
+
+def format_tasks_context(tasks: List[ParsedTask]) -> str:
+    """Render tasks back into the "#N" text block format (only needed for the LLM prompt)."""
+    return "\n\n".join(format_task_block(i, t) for i, t in enumerate(tasks, start=1))
@@ -0,0 +1,155 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+# =========================
+# Exact per-user task search
+# A student has a few hundred task docs at most. For that few, one
+# matrix-vector product over the user's own embeddings beats a filtered HNSW
+# query and is exact. Users with more than max_docs docs go back to the ANN
+# index (the caller's collection.query).
+# The user's docs are fetched once (1 collection.get) and kept as a contiguous
+# float32 matrix under the user's doc version (TaskIndex.doc_version, bumped
+# by every write). A matrix is reloaded only when that version moves, and
+# dropped LRU once all matrices together pass max_bytes.
+# get() / load() let the caller coalesce concurrent loads of one user;
+# search() does both for synchronous callers.
+# Distances use the collection's own space (hnsw:space, default l2) so the
+# exact results rank and read like the ANN ones.
+# =========================
+Fetch = Callable[[int], Dict[str, Any]]  # limit -> collection.get(...) result
+MISS = object()  # get(): nothing cached at this version -> load()
+
+
+class _UserMatrix:
+    __slots__ = ("ids", "documents", "metadatas", "matrix", "sq_norms", "space", "version")
+
+    def __init__(self, page: Dict[str, Any], space: str, version: int):
+        self.ids = list(page.get("ids") or [])
+        self.documents = list(page.get("documents") or [None] * len(self.ids))
+        self.metadatas = list(page.get("metadatas") or [None] * len(self.ids))
+        embeddings = page.get("embeddings")
+        if not self.ids or embeddings is None:
+            self.matrix = np.zeros((0, 0), dtype=np.float32)
+        else:
+            self.matrix = np.ascontiguousarray(np.asarray(embeddings, dtype=np.float32).reshape(len(self.ids), -1))
+        self.sq_norms = np.einsum("ij,ij->i", self.matrix, self.matrix)
+        self.space = space
+        self.version = version
+
+    @property
+    def nbytes(self) -> int:
+        return self.matrix.nbytes + self.sq_norms.nbytes
+
+
+class _TooLarge:
+    __slots__ = ("version",)
+    nbytes = 0
+
+    def __init__(self, version: int):
+        self.version = version
+
+
+class UserVectors:
+    def __init__(self, max_docs: int = 10000, max_bytes: int = 64 * 1024 * 1024):
+        self.max_docs = max_docs
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[str, Any]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.exact = 0
+        self.ann = 0
+        self.loads = 0
+
+    def search(
+        self, user_id: str, fetch: Fetch, query_embedding: Any, n_results: int, space: str = "l2", version: int = 0
+    ) -> Optional[Dict[str, Any]]:
+        """collection.query-shaped result, or None = more than max_docs docs, use the ANN index."""
+        entry = self.get(user_id, version)
+        if entry is MISS:
+            entry = self.load(user_id, version, fetch, space)
+        return self.top_k(entry, query_embedding, n_results)
+
+    def get(self, user_id: str, version: int) -> Any:
+        """Cached matrix, None (too large -> ANN) or MISS."""
+        with self._lock:
+            entry = self._data.get(user_id)
+            if entry is None or entry.version != version:
+                return MISS
+            self._data.move_to_end(user_id)
+            return entry if isinstance(entry, _UserMatrix) else None
+
+    def load(self, user_id: str, version: int, fetch: Fetch, space: str) -> Optional[_UserMatrix]:
+        # one bounded get: max_docs + 1 rows tell "small enough" from "too large"
+        page = fetch(self.max_docs + 1)
+        self.loads += 1
+        if len(page.get("ids") or []) > self.max_docs:
+            entry = _TooLarge(version)
+        else:
+            entry = _UserMatrix(page, space, version)
+        with self._lock:
+            self._drop(user_id)
+            self._data[user_id] = entry
+            self._bytes += entry.nbytes
+            while self._bytes > self.max_bytes and len(self._data) > 1:
+                self._drop(next(iter(self._data)))
+        return entry if isinstance(entry, _UserMatrix) else None
+
+    def top_k(self, entry: Optional[_UserMatrix], query_embedding: Any, n_results: int) -> Optional[Dict[str, Any]]:
+        if entry is None:
+            self.ann += 1
+            return None
+        self.exact += 1
+        return _top_k(entry, query_embedding, n_results)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            matrices = [e for e in self._data.values() if isinstance(e, _UserMatrix)]
+        return {
+            "users": len(matrices),
+            "large_users": len(self._data) - len(matrices),
+            "docs": sum(len(e.ids) for e in matrices),
+            "bytes": self._bytes,
+            "max_docs": self.max_docs,
+            "exact": self.exact,
+            "ann": self.ann,
+            "loads": self.loads,
+        }
+
+    def _drop(self, user_id: str) -> None:
+        entry = self._data.pop(user_id, None)
+        if entry is not None:
+            self._bytes -= entry.nbytes
+
+
+def _top_k(entry: _UserMatrix, query_embedding: Any, n_results: int) -> Dict[str, Any]:
+    k = min(n_results, len(entry.ids))
+    if k <= 0:
+        return {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
+
+    q = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+    dots = entry.matrix @ q
+    if entry.space == "cosine":
+        denom = np.sqrt(entry.sq_norms) * float(np.linalg.norm(q))
+        dist = 1.0 - dots / np.maximum(denom, 1e-12)
+    elif entry.space == "ip":
+        dist = 1.0 - dots
+    else:  # l2: Chroma reports the squared distance
+        dist = entry.sq_norms - 2.0 * dots + float(q @ q)
+
+    top = np.argpartition(dist, k - 1)[:k] if k < len(dist) else np.arange(len(dist))
+    top = top[np.argsort(dist[top], kind="stable")]
+    idx: List[int] = top.tolist()
+    return {
+        "ids": [[entry.ids[i] for i in idx]],
+        "documents": [[entry.documents[i] for i in idx]],
+        "metadatas": [[entry.metadatas[i] for i in idx]],
+        "distances": [dist[top].tolist()],
+    }
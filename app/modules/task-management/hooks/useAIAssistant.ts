@@ -1,8 +1,15 @@
 import { useState, useCallback, useRef } from "react";
 import { getAuth } from "firebase/auth";
 import { RAG_API_HOST } from "../config/api";
-import { TaskType, ChatMsg } from "../utils/types";
-import { formatDate, calculateDaysUntilDue } from "../utils/taskUtils";
+import { TaskType, ChatMsg, AITaskPayload, AITaskDelta } from "../utils/types";
+import {
+  formatDate,
+  calculateDaysUntilDue,
+  toIsoDate,
+} from "../utils/taskUtils";
+
+// The backend only reads the last 8 turns
+const HISTORY_TURNS_SENT = 8;
 
 export const useAIAssistant = (activeTasks: TaskType[]) => {
   const auth = getAuth();
@@ -13,6 +20,14 @@ export const useAIAssistant = (activeTasks: TaskType[]) => {
   const [aiLoading, setAiLoading] = useState(false);
   const [chatHistory, setChatHistory] = useState<ChatMsg[]>([]);
   const aiScrollRef = useRef<any>(null);
+  // question -> last ETag + answer, so /chat_rag can reply 304 Not Modified
+  const etagCacheRef = useRef<Map<string, { etag: string; answer: string }>>(
+    new Map()
+  );
+  // Last state pushed to the server task index: version + task id -> JSON
+  const taskIndexRef = useRef<{ version: number; tasks: Map<string, string> }>(
+    { version: 0, tasks: new Map() }
+  );
 
   const buildTasksContextForAI = useCallback(() => {
     if (activeTasks.length === 0) return "No active tasks.";
@@ -39,6 +54,91 @@ export const useAIAssistant = (activeTasks: TaskType[]) => {
       .join("\n");
   }, [activeTasks]);
 
+  // Typed task list for /chat_rag v2 (backend skips text parsing)
+  const buildTasksForAI = useCallback((): AITaskPayload[] => {
+    return activeTasks.slice(0, 30).map((t) => {
+      const daysUntilDue = calculateDaysUntilDue(t.dueDate ?? undefined);
+      return {
+        title: t.taskName,
+        priority: t.priorityScore ?? 0,
+        daysUntilDue,
+        start: t.startDate ? formatDate(t.startDate) : null,
+        due: t.dueDate ? formatDate(t.dueDate) : null,
+        overdue: daysUntilDue !== null && daysUntilDue < 0,
+        ...(t.details ? { details: t.details } : {}),
+      };
+    });
+  }, [activeTasks]);
+
+  // Push only changed tasks to /tasks/sync (full snapshot on first sync or
+  // when the server asks to resync). Returns the index version to send with
+  // /chat_rag, or null if the sync is unavailable.
+  const syncTaskIndex = useCallback(
+    async (uid: string, forceReset = false): Promise<number | null> => {
+      const current = new Map<string, string>();
+      const deltas: AITaskDelta[] = activeTasks
+        .slice(0, 30)
+        .map((t, position) => {
+          const delta: AITaskDelta = {
+            id: t.id,
+            title: t.taskName,
+            priority: t.priorityScore ?? 0,
+            startDate: toIsoDate(t.startDate),
+            dueDate: toIsoDate(t.dueDate),
+            position,
+            ...(t.details ? { details: t.details } : {}),
+          };
+          current.set(t.id, JSON.stringify(delta));
+          return delta;
+        });
+
+      const push = (reset: boolean) => {
+        const synced = taskIndexRef.current;
+        return fetch(RAG_API_HOST + "/tasks/sync", {
+          method: "POST",
+          headers: { "Content-Type": "application/json" },
+          body: JSON.stringify({
+            userId: uid,
+            baseVersion: synced.version,
+            upserts: reset
+              ? deltas
+              : deltas.filter(
+                  (d) => synced.tasks.get(d.id) !== current.get(d.id)
+                ),
+            deletes: reset
+              ? []
+              : Array.from(synced.tasks.keys()).filter(
+                  (id) => !current.has(id)
+                ),
+            reset,
+          }),
+        });
+      };
+
+      const synced = taskIndexRef.current;
+      const reset = forceReset || synced.version === 0;
+      const unchanged =
+        synced.tasks.size === current.size &&
+        Array.from(current.entries()).every(
+          ([id, json]) => synced.tasks.get(id) === json
+        );
+      if (!reset && unchanged) return synced.version;
+
+      try {
+        let res = await push(reset);
+        if (res.status === 409 && !reset) res = await push(true);
+        if (!res.ok) return null;
+        const data = await res.json();
+        taskIndexRef.current = { version: data.version, tasks: current };
+        return data.version;
+      } catch (err) {
+        console.log("Task index sync failed:", err);
+        return null;
+      }
+    },
+    [activeTasks]
+  );
+
   const handleAskPriorityAI = async (customQuestion?: string) => {
     const q = (customQuestion ?? aiQuestion).trim();
     if (!q) return;
@@ -103,31 +203,62 @@ ${q}
         { role: "user", content: q },
       ];
 
-      const response = await fetch(RAG_API_HOST + "/chat_rag", {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        signal: controller.signal,
-        body: JSON.stringify({
-          model: "deepseek-r1:7b",
-          text: q,
-          userId: uid,
-          history: updatedHistory,
-          tasksContext,
-          n_results: 4,
-          temperature: 0.2,
-          num_ctx: 4096,
-          num_predict: 360,
-        }),
-      });
+      const cachedEntry = etagCacheRef.current.get(q);
+      const headers: Record<string, string> = {
+        "Content-Type": "application/json",
+      };
+      if (cachedEntry) headers["If-None-Match"] = cachedEntry.etag;
 
-      if (!response.ok) {
-        const errorBody = await response.text();
-        console.log("RAG error body:", errorBody);
-        throw new Error(`Error ${response.status}: ${response.statusText}`);
+      // Synced: send only the index version, else fall back to typed tasks
+      const postChat = (taskIndexVersion: number | null) =>
+        fetch(RAG_API_HOST + "/chat_rag", {
+          method: "POST",
+          headers,
+          signal: controller.signal,
+          body: JSON.stringify({
+            model: "deepseek-r1:7b",
+            text: q,
+            userId: uid,
+            history: updatedHistory.slice(-HISTORY_TURNS_SENT),
+            version: 2,
+            ...(taskIndexVersion !== null
+              ? { taskIndexVersion }
+              : { tasks: buildTasksForAI() }),
+            n_results: 4,
+            temperature: 0.2,
+            num_ctx: 4096,
+            num_predict: 360,
+          }),
+        });
+
+      let response = await postChat(await syncTaskIndex(uid));
+      if (response.status === 409) {
+        // server index moved (other device / restart) -> resync once and retry
+        response = await postChat(await syncTaskIndex(uid, true));
       }
 
-      const data = await response.json();
-      const cleaned = data.model_answer?.trim() || "";
+      let cleaned: string;
+      if (response.status === 304 && cachedEntry) {
+        cleaned = cachedEntry.answer;
+      } else {
+        if (response.status === 429) {
+          const retryAfter = response.headers.get("Retry-After") ?? "a few";
+          throw new Error(
+            `AI assistant is busy. Please try again in ${retryAfter} seconds.`
+          );
+        }
+        if (!response.ok) {
+          const errorBody = await response.text();
+          console.log("RAG error body:", errorBody);
+          throw new Error(`Error ${response.status}: ${response.statusText}`);
+        }
+
+        const data = await response.json();
+        cleaned = data.model_answer?.trim() || "";
+
+        const etag = response.headers.get("ETag");
+        if (etag) etagCacheRef.current.set(q, { etag, answer: cleaned });
+      }
 
       setAiAnswer(cleaned);
 
@@ -59,6 +59,17 @@ export const formatDate = (timestamp?: number): string => {
   });
 };
 
+/**
+ * Formats a timestamp as a local YYYY-MM-DD date (server task index format)
+ */
+export const toIsoDate = (timestamp?: number | null): string | null => {
+  if (!timestamp) return null;
+  const d = new Date(timestamp);
+  const mm = String(d.getMonth() + 1).padStart(2, "0");
+  const dd = String(d.getDate()).padStart(2, "0");
+  return `${d.getFullYear()}-${mm}-${dd}`;
+};
+
 /**
  * Checks if a task's due date is overdue
  */
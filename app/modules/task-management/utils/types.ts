@@ -19,6 +19,28 @@ export type ViewMode = "all" | "assignedToMe" | "ai";
 
 export type ChatMsg = { role: "user" | "assistant"; content: string };
 
+// Typed task sent to /chat_rag (request version 2)
+export type AITaskPayload = {
+  title: string;
+  priority: number;
+  daysUntilDue: number | null;
+  start: string | null;
+  due: string | null;
+  overdue: boolean;
+  details?: string;
+};
+
+// Task delta pushed to /tasks/sync (server-side task index)
+export type AITaskDelta = {
+  id: string;
+  title: string;
+  priority: number;
+  startDate: string | null; // YYYY-MM-DD
+  dueDate: string | null; // YYYY-MM-DD
+  details?: string;
+  position: number;
+};
+
 export type CommentType = {
   id: string;
   text: string;
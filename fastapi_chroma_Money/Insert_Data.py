@@ -1,18 +1,27 @@
-import chromadb
+import os
+import sys
+
+# fastapi_chroma_shared/ (repo root): helpers shared with the task service
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi_chroma_shared.shards import MODULE_MONEY, MODULE_TASKS, rules_collection_name, sharded
+from fastapi_chroma_shared.vector_store import make_client
 
 
 """Insert (or reset + insert) ONLY task-assistant rule documents into ChromaDB.
 
 Why this exists:
-- Your RAG endpoint (/search_rag_model) retrieves from ChromaDB.
+- Your RAG endpoints (/search_vectors, /search_rag_model with debug=true) retrieve from ChromaDB.
 - If you insert demo data (e.g., US presidents), the model will keep mentioning it.
 
 Run this file once whenever you want to reset your vector DB content.
 """
 
 
-PERSIST_PATH = "./vectordb"
-COLLECTION_NAME = "my_data"
+PERSIST_PATH = os.getenv("MONEY_VECTORDB_PATH", "./vectordb")  # same store as api.py
+# VECTOR_LAYOUT=sharded: task and money rules each get their own collection (see shards.py)
+COLLECTION_NAME = rules_collection_name(MODULE_TASKS) if sharded() else "my_data"
+MONEY_COLLECTION_NAME = rules_collection_name(MODULE_MONEY) if sharded() else COLLECTION_NAME
 
 # Set True to remove any old/demo content (Obama/Trump/etc.)
 RESET_COLLECTION = False
@@ -22,16 +31,18 @@ INSERT_MONEY_RULES = True
 
 
 def main() -> None:
-    chroma_client = chromadb.PersistentClient(path=PERSIST_PATH)
+    chroma_client = make_client(PERSIST_PATH)  # CHROMA_MODE=http -> the running Chroma server
 
     if RESET_COLLECTION:
-        try:
-            chroma_client.delete_collection(name=COLLECTION_NAME)
-            print(f"✅ Deleted old collection: {COLLECTION_NAME}")
-        except Exception as e:
-            print("(ok) No existing collection to delete:", e)
+        for name in dict.fromkeys([COLLECTION_NAME, MONEY_COLLECTION_NAME]):
+            try:
+                chroma_client.delete_collection(name=name)
+                print(f"✅ Deleted old collection: {name}")
+            except Exception as e:
+                print("(ok) No existing collection to delete:", e)
 
     collection = chroma_client.get_or_create_collection(name=COLLECTION_NAME)
+    money_collection = chroma_client.get_or_create_collection(name=MONEY_COLLECTION_NAME)
 
     # -----------------------------
     # ✅ Existing Task Assistant Docs (KEEP EXACTLY)
@@ -129,7 +140,7 @@ Keep response <= 200 words unless user asks for details.
         ]
 
         # Non-breaking: this only adds new ids/docs to same collection
-        collection.add(ids=money_ids, documents=money_docs)
+        money_collection.add(ids=money_ids, documents=money_docs)
         print(f"✅ Added money coach docs: {len(money_docs)}")
 
     # -----------------------------
@@ -143,7 +154,7 @@ Keep response <= 200 words unless user asks for details.
 
     # ✅ NEW optional sanity test for money
     if INSERT_MONEY_RULES:
-        money_test = collection.query(
+        money_test = money_collection.query(
             query_texts=["I spent more than I earned this month. What should I do?"],
             n_results=3,
         )
@@ -1,241 +1,250 @@
-from fastapi import FastAPI
+from fastapi import APIRouter, FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-import chromadb
+from starlette.background import BackgroundTask
+import asyncio
 import json
-import re
-
-# Initialize ChromaDB
+import logging
+import os
+import random
+import sys
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+
+# fastapi_chroma_shared/ (repo root): helpers shared with the task service
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi_chroma_shared.embedding_cache import shared_cache
+from fastapi_chroma_shared.metrics import CONTENT_TYPE, Registry
+from fastapi_chroma_shared.rules_snapshot import RulesSnapshot
+from fastapi_chroma_shared.shards import MODULE_MONEY, VECTOR_LAYOUT, rules_collection_name, sharded
+from fastapi_chroma_shared.vector_store import EMBEDDING_MODEL, VectorStore, embed_texts
+from money_advice import build_rule_based_advice, parse_money_summary, summary_from_model
+from retrieval_debug import DebugResults
+
+# Initialize ChromaDB in the background (see vector_store.py): the rule-based advice
+# does not need it, so the app answers while Chroma + the embedding model load.
+# Several workers (uvicorn --workers N): set CHROMA_MODE=http and run one Chroma server.
 # NOTE: Use get_or_create_collection so your server won't crash
 # even if the DB was reset or is empty.
-chroma_client = chromadb.PersistentClient(path="./vectordb")
-collection = chroma_client.get_or_create_collection(name="my_data")
+vector_store = VectorStore(path=os.getenv("MONEY_VECTORDB_PATH", "./vectordb"), collection_name="my_data")
+VECTOR_STORE_WAIT_S = float(os.getenv("VECTOR_STORE_WAIT_S", "5"))
 
-# FastAPI App
-app = FastAPI()
+# VECTOR_LAYOUT=sharded: money docs live in their own rules_money collection (see shards.py)
+VECTOR_SHARDED = sharded()
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=False,
-    allow_methods=["*"],
-    allow_headers=["*"],
+
+def _money_collection():
+    # collection the money routes search; the shard handle is looked up every call,
+    # so one that migrate_shards or Insert_Data.py deleted and re-created is followed
+    if not VECTOR_SHARDED:
+        return vector_store.require()
+    vector_store.require()
+    return vector_store.client.get_or_create_collection(name=rules_collection_name(MODULE_MONEY))
+
+
+def _money_rules_collection():
+    # fresh handle every check, so a reset / re-insert is noticed (see rules_snapshot.py)
+    if VECTOR_SHARDED:
+        vector_store.require()
+        return vector_store.client.get_collection(name=rules_collection_name(MODULE_MONEY))
+    return vector_store.get_collection()
+
+
+# Query embeddings are cached (memory LRU + on-disk float32 store), same model as the collection
+embedding_cache = shared_cache(
+    embed_fn=embed_texts,
+    path=os.getenv("EMBEDDING_CACHE_DIR", "./embedding_cache"),
+    model=EMBEDDING_MODEL,
+)
+
+# Metrics (GET /metrics, Prometheus text format; see metrics.py)
+metrics = Registry()
+STAGE_SECONDS = metrics.histogram("money_stage_seconds", "Time per /search_rag_model stage", ("stage",))
+REQUESTS_TOTAL = metrics.counter("money_requests_total", "Requests by endpoint", ("endpoint",))
+FALLBACKS_TOTAL = metrics.counter("money_fallbacks_total", "Fallback / error paths taken", ("kind",))
+metrics.gauge("money_vector_store_ready", "1 once Chroma + embedding model are loaded", lambda: int(vector_store.ready))
+
+# /search_rag_model with debug=true: retrieval runs after the response, fetched
+# later from /search_rag_model/{request_id}/debug (see retrieval_debug.py)
+debug_results = DebugResults(
+    max_entries=int(os.getenv("MONEY_DEBUG_MAX_ENTRIES", "256")),
+    ttl_seconds=float(os.getenv("MONEY_DEBUG_TTL_S", "300")),
 )
 
+# Debug retrieval query when a v2 request carries no prompt text
+MONEY_RULES_QUERY_TEXT = "money coach rules / budgeting / cashflow / savings / spending caps"
+
+# Request logs: one JSON line for a sampled fraction of requests (never the prompt itself)
+LOG_SAMPLE_RATE = float(os.getenv("MONEY_LOG_SAMPLE_RATE", "0.01"))
+log = logging.getLogger("money_api")
+if not log.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(_handler)
+    log.setLevel(logging.INFO)
+    log.propagate = False
+
+
+def _log_sampled(event: str, **fields: Any) -> None:
+    if LOG_SAMPLE_RATE > 0 and random.random() < LOG_SAMPLE_RATE:
+        log.info(json.dumps({"event": event, "ts": round(time.time(), 3), **fields}, ensure_ascii=False))
+
+
+# Money coach rule docs inserted by Insert_Data.py (INSERT_MONEY_RULES)
+MONEY_RULE_IDS = [
+    "money_rules_v1",
+    "money_cashflow_v1",
+    "money_weekly_cap_v1",
+    "money_emergency_fund_v1",
+    "money_patterns_v1",
+    "money_growth_v1",
+    "money_output_format_v1",
+]
+
+
+def _load_money_rules(coll):
+    got = coll.get(ids=MONEY_RULE_IDS)
+    return tuple(
+        {"id": doc_id, "text_preview": (doc or "")[:400]}
+        for doc_id, doc in zip(got.get("ids") or [], got.get("documents") or [])
+    )
+
+
+# Rule docs only change when Insert_Data.py runs -> load once, rebuild when they change
+money_rules_snapshot = RulesSnapshot(
+    get_collection=_money_rules_collection,
+    loader=_load_money_rules,
+    select={"ids": MONEY_RULE_IDS},
+)
+
+
+async def _init_vector_store():
+    await vector_store.start()
+    if not vector_store.ready:
+        print(f"❌ Vector store failed after {vector_store.init_s:.2f}s: {vector_store.error}")
+        return
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, money_rules_snapshot.refresh, True)
+    except Exception as e:
+        print(f"(ok) Money rules snapshot not built yet: {e}")
+    print(f"✅ Vector store ready in {vector_store.init_s:.2f}s")
+
+
+@asynccontextmanager
+async def lifespan(_app):
+    store_task = asyncio.create_task(_init_vector_store())  # startup does not wait
+    yield
+    store_task.cancel()
+    embedding_cache.flush()
+
+
+# Routes live on `router`; `app` (end of file) serves them standalone and
+# fastapi_chroma_all mounts the same router + lifespan next to the task service
+router = APIRouter()
+
+
 # Request model
+class MoneySummary(BaseModel):
+    # v2: the `analysis` numbers of FinancialAdvice.tsx (last 30 days), sent as-is
+    transactionsCount: Optional[int] = None
+    income: Optional[float] = None  # RM
+    expenses: Optional[float] = None  # RM
+    cashflow: Optional[float] = None  # RM
+    savingsRate: Optional[float] = None  # % of income, null = no income recorded
+    topAccount: Optional[str] = None
+    topCategory: Optional[str] = None
+    smallPurchasesCount: Optional[int] = None  # expenses <= RM10, all time
+
+
 class QueryRequest(BaseModel):
     # ✅ Use the same model name as TaskDashboard: deepseek-r1:7b
     # Make sure this model is available in your Ollama / DeepSeek setup.
     model: str = "deepseek-r1:7b"
 
-    text: str
+    text: str = ""  # v1: prompt from buildAiPrompt() (old clients); /search_vectors query
     n_results: int = 2
+    version: int = 1  # 2 = typed `summary` below, text is not parsed
+    summary: Optional[MoneySummary] = None
+    # /search_rag_model only: True = retrieve rule docs in the background, see request_id
+    debug: bool = False
 
 
 # Root endpoint
-@app.get("/")
+@router.get("/")
 def root():
     return {"message": "FastAPI + ChromaDB backend is running"}
 
 
-# Search vectors only
-@app.post("/search_vectors")
-def search_vectors(request: QueryRequest):
-    results = collection.query(
-        query_texts=[request.text],
-        n_results=request.n_results
+# Readiness: 200 once Chroma + the embedding model are loaded, 503 while starting / failed
+@router.get("/ready")
+def ready():
+    return Response(
+        content=json.dumps({**vector_store.stats(), "layout": VECTOR_LAYOUT}),
+        status_code=200 if vector_store.ready else 503,
+        media_type="application/json",
     )
 
-    return {
-        "ids": results.get("ids", []),
-        "documents": results.get("documents", []),
-        "distances": results.get("distances", [])
-    }
-
-
-def _parse_money_summary(prompt: str):
-    """Extract key numbers from the structured prompt sent by FinancialAdvice.tsx."""
-    text = prompt or ""
 
-    def _num(pattern: str):
-        m = re.search(pattern, text, flags=re.MULTILINE)
-        if not m:
-            return None
+# Money coach rule docs (in-memory snapshot, no embedding / HNSW search)
+@router.get("/money_rules")
+def money_rules():
+    if vector_store.ready and money_rules_snapshot.needs_check():
         try:
-            return float(m.group(1))
-        except ValueError:
-            return None
-
-    def _int(pattern: str):
-        m = re.search(pattern, text, flags=re.MULTILINE)
-        if not m:
-            return None
-        try:
-            return int(m.group(1))
-        except ValueError:
-            return None
-
-    def _str(pattern: str):
-        m = re.search(pattern, text, flags=re.MULTILINE)
-        if not m:
-            return None
-        return m.group(1).strip()
-
-    transactions = _int(r"TransactionsCount:\s*(\d+)")
-    income = _num(r"Income:\s*RM\s*([\-0-9\.]+)")
-    expenses = _num(r"Expenses:\s*RM\s*([\-0-9\.]+)")
-    cashflow = _num(r"Cashflow:\s*RM\s*([\-0-9\.]+)")
-    savings_rate = _num(r"SavingsRate:\s*([0-9\.]+)%")
-    top_account = _str(r"TopAccount:\s*(.+)")
-    top_category = _str(r"TopCategory:\s*(.+?)\s*\(RM")
-    small_purchases = _int(r"SmallPurchasesCount.*?:\s*(\d+)")
-
-    if top_account in ("-", "null", "None"):
-        top_account = None
-    if top_category in ("-", "null", "None"):
-        top_category = None
+            money_rules_snapshot.refresh()
+        except Exception:
+            pass
+    return {"rules": list(money_rules_snapshot.value)}
 
-    return {
-        "transactions": transactions,
-        "income": income,
-        "expenses": expenses,
-        "cashflow": cashflow,
-        "savings_rate": savings_rate,
-        "top_account": top_account,
-        "top_category": top_category,
-        "small_purchases": small_purchases,
-    }
 
+@router.get("/embedding_cache/stats")
+def embedding_cache_stats():
+    return embedding_cache.stats()
 
-def _build_rule_based_advice(summary):
-    """Create a short 3‑section advice text based on numeric summary only."""
-    income = summary.get("income")
-    expenses = summary.get("expenses")
-    cashflow = summary.get("cashflow")
-    savings_rate = summary.get("savings_rate")
-    top_category = summary.get("top_category")
-    small_purchases = summary.get("small_purchases") or 0
 
-    lines = []
+@router.get("/metrics")
+def metrics_endpoint():
+    return Response(content=metrics.render(), media_type=CONTENT_TYPE)
 
-    # 1) What's happening
-    lines.append("1) What's happening")
 
-    if income is None or expenses is None or cashflow is None:
-        lines.append(
-            "- I don't have full numbers yet, but you already have some "
-            "transactions recorded. Once income and expenses are filled in, I "
-            "can summarise your cashflow more precisely."
-        )
-    else:
-        if cashflow < 0:
-            lines.append(
-                f"- Your last 30 days show a NEGATIVE cashflow of RM {abs(cashflow):.2f} "
-                f"(income RM {income:.2f}, expenses RM {expenses:.2f})."
-            )
-        elif cashflow == 0:
-            lines.append(
-                f"- Your cashflow is roughly breakeven (income RM {income:.2f}, "
-                f"expenses RM {expenses:.2f})."
-            )
-        else:
-            lines.append(
-                f"- You have a POSITIVE cashflow of RM {cashflow:.2f} over the last "
-                f"30 days (income RM {income:.2f}, expenses RM {expenses:.2f})."
-            )
-
-        if savings_rate is not None:
-            lines.append(
-                f"- Your estimated savings rate is about {savings_rate:.1f}% of income."
-            )
-
-        if top_category:
-            lines.append(f"- Your highest spending category is {top_category}.")
-
-        if small_purchases >= 10:
-            lines.append(
-                f"- You also have {small_purchases} small purchases (≤ RM10) which can "
-                "quietly increase your monthly spending."
-            )
-
-    # 2) What to do this week
-    lines.append("")
-    lines.append("2) What to do this week (with RM targets)")
-
-    if cashflow is not None and cashflow < 0:
-        target = abs(cashflow) + 50
-        lines.append(
-            f"- Aim to reduce this month's expenses by at least RM {target:.0f} to "
-            "turn your cashflow positive (start with wants, not needs)."
-        )
-    elif cashflow is not None and cashflow >= 0:
-        save_target = max(50, cashflow * 0.4)
-        lines.append(
-            f"- Move at least RM {save_target:.0f} into savings or a separate "
-            "account so it is not spent by accident."
-        )
-
-    if top_category:
-        lines.append(
-            f"- Pick ONE rule for {top_category} (for example: cap it by RM 50–100 "
-            "less than this month) and track it inside the app."
-        )
-    else:
-        lines.append(
-            "- Identify one category you feel is 'leaking' money and set a simple "
-            "weekly cap for it (e.g. snacks, rides, subscriptions)."
+# Search vectors only
+@router.post("/search_vectors")
+def search_vectors(request: QueryRequest):
+    REQUESTS_TOTAL.inc("search_vectors")
+    if not request.text.strip():
+        raise HTTPException(status_code=400, detail="text is required")
+    # sync route -> runs in the threadpool, so blocking on the store is fine here
+    if not vector_store.wait_sync(VECTOR_STORE_WAIT_S):
+        raise HTTPException(
+            status_code=503,
+            detail=f"Vector store is {vector_store.status}",
+            headers={"Retry-After": "5"},
         )
-
-    if small_purchases >= 10:
-        lines.append(
-            "- For the next 7 days, group small purchases and limit them to a fixed "
-            "amount (for example RM 20–30 total)."
+    with STAGE_SECONDS.time("embed_query"):
+        query_embeddings = embedding_cache.embed([request.text])
+    with STAGE_SECONDS.time("chroma_query"):
+        results = _money_collection().query(
+            query_embeddings=query_embeddings,
+            n_results=request.n_results
         )
 
-    lines.append(
-        "- Log every expense in the app this week so future advice reflects your "
-        "real behaviour."
-    )
-
-    # 3) Longer‑term plan
-    lines.append("")
-    lines.append("3) Longer‑term plan")
-
-    lines.append(
-        "- Build a simple monthly budget: split income into needs, wants, and "
-        "savings, and review it at the end of each month."
-    )
-    lines.append(
-        "- Once you can consistently save each month, set a target emergency fund "
-        "of at least 3 months of essential expenses."
-    )
-    lines.append(
-        "- Revisit this Money Coach every few weeks to adjust RM targets based "
-        "on how your income and spending change."
-    )
-
-    return "\n".join(lines)
-
-
-# RAG endpoint: now returns a deterministic, rule‑based answer using the numbers
-# encoded into the prompt sent from FinancialAdvice.tsx. No external LLM is used.
-@app.post("/search_rag_model")
-def search_rag_model(request: QueryRequest):
-    print("🔍 Received request data:")
-    print(request)
+    return {
+        "ids": results.get("ids", []),
+        "documents": results.get("documents", []),
+        "distances": results.get("distances", [])
+    }
 
-    summary = _parse_money_summary(request.text)
-    answer = _build_rule_based_advice(summary)
 
-    # Optional: still query Chroma so you can show retrieved rules in debug,
-    # but they are not needed to build the answer.
-    try:
-        results = collection.query(
-            query_texts=[request.text],
-            n_results=request.n_results,
-        )
-    except Exception:
-        results = {"documents": [[]], "metadatas": [[]], "distances": [[]]}
+def _retrieve_payload(text: str, n_results: int) -> List[Dict[str, Any]]:
+    # runs after the response is sent (BackgroundTask), so it may wait for the store
+    if not vector_store.wait_sync(VECTOR_STORE_WAIT_S):
+        FALLBACKS_TOTAL.inc("vector_store_not_ready")
+        vector_store.require()  # raises StoreNotReady -> stored as the debug error
+    with STAGE_SECONDS.time("embed_query"):
+        query_embeddings = embedding_cache.embed([text])
+    with STAGE_SECONDS.time("chroma_query"):
+        results = _money_collection().query(query_embeddings=query_embeddings, n_results=n_results)
 
     docs = (results.get("documents") or [[]])[0]
     metas = (results.get("metadatas") or [[None] * len(docs)])[0]
@@ -251,9 +260,78 @@ def search_rag_model(request: QueryRequest):
                 "text_preview": (doc or "")[:400],
             }
         )
+    return payload
 
-    return {
-        "results": payload,
+
+# RAG endpoint: now returns a deterministic, rule‑based answer using the numbers
+# sent from FinancialAdvice.tsx: typed `summary` (version 2) or scraped from the
+# prompt text (version 1). No external LLM is used.
+# Chroma is not on this path: with debug=true the retrieved rules come from
+# /search_rag_model/{request_id}/debug (request_id is null otherwise).
+# async def: pure CPU work of a few µs, no threadpool hop
+@router.post("/search_rag_model")
+async def search_rag_model(request: QueryRequest):
+    REQUESTS_TOTAL.inc("search_rag_model")
+    typed = request.version >= 2 and request.summary is not None
+    t0 = time.perf_counter()
+    summary = summary_from_model(request.summary) if typed else parse_money_summary(request.text)
+    t1 = time.perf_counter()
+    answer = build_rule_based_advice(summary)
+    t2 = time.perf_counter()
+    STAGE_SECONDS.observe(t1 - t0, "typed_summary" if typed else "parse_summary")
+    STAGE_SECONDS.observe(t2 - t1, "advice")
+    unparsed = all(v is None for v in summary.values())
+    if unparsed:
+        FALLBACKS_TOTAL.inc("summary_unparsed")
+
+    request_id = None
+    background = None
+    if request.debug:
+        request_id = debug_results.new()
+        query_text = request.text if request.text.strip() else MONEY_RULES_QUERY_TEXT  # v2 sends no prompt
+        background = BackgroundTask(
+            debug_results.run, request_id, lambda: _retrieve_payload(query_text, request.n_results)
+        )
+
+    # serialized here (not by FastAPI) so the "serialize" stage can be measured
+    t3 = time.perf_counter()
+    body = json.dumps({
         "model_answer": answer.strip(),
         "ollama_error": None,
-    }
+        "request_id": request_id,
+    }, ensure_ascii=False).encode("utf-8")
+    t4 = time.perf_counter()
+    STAGE_SECONDS.observe(t4 - t3, "serialize")
+    STAGE_SECONDS.observe(t4 - t0, "total")
+    _log_sampled(
+        "search_rag_model",
+        version=2 if typed else 1,
+        text_len=len(request.text),
+        unparsed=unparsed,
+        debug=request.debug,
+        request_id=request_id,
+        server_ms=round((t4 - t0) * 1000, 3),
+    )
+    return Response(content=body, media_type="application/json", background=background)
+
+
+@router.get("/search_rag_model/{request_id}/debug")
+def search_rag_model_debug(request_id: str):
+    """Retrieved rule docs for a debug=true request: status pending | done | error."""
+    entry = debug_results.get(request_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired request_id")
+    return {"request_id": request_id, **entry}
+
+
+# FastAPI App (standalone: uvicorn api:app --port 8002)
+app = FastAPI(lifespan=lifespan)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=False,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+app.include_router(router)
@@ -0,0 +1,197 @@
+import re
+
+# =========================
+# Money coach: numbers from the FinancialAdvice.tsx prompt -> rule-based advice
+# (no FastAPI / Chroma imports, so benchmarks can load it directly)
+# v1 clients send the prompt text (parse_money_summary scrapes it back),
+# v2 clients send the numbers typed (summary_from_model, no regex).
+# =========================
+_EMPTY_NAMES = ("", "-", "null", "None")
+
+
+def _name(value):
+    value = (value or "").strip()
+    return None if value in _EMPTY_NAMES else value
+
+
+def _rm(value):
+    # to the cent, like rm() in the app (and so like the prompt text)
+    return None if value is None else round(value, 2)
+
+
+def summary_from_model(summary):
+    """Same dict as parse_money_summary, from a v2 `summary` (any object with MoneySummary's fields)."""
+    return {
+        "transactions": summary.transactionsCount,
+        "income": _rm(summary.income),
+        "expenses": _rm(summary.expenses),
+        "cashflow": _rm(summary.cashflow),
+        "savings_rate": summary.savingsRate,
+        "top_account": _name(summary.topAccount),
+        "top_category": _name(summary.topCategory),
+        "small_purchases": summary.smallPurchasesCount,
+    }
+
+
+def parse_money_summary(prompt: str):
+    """Extract key numbers from the structured prompt sent by FinancialAdvice.tsx."""
+    text = prompt or ""
+
+    def _num(pattern: str):
+        m = re.search(pattern, text, flags=re.MULTILINE)
+        if not m:
+            return None
+        try:
+            return float(m.group(1))
+        except ValueError:
+            return None
+
+    def _int(pattern: str):
+        m = re.search(pattern, text, flags=re.MULTILINE)
+        if not m:
+            return None
+        try:
+            return int(m.group(1))
+        except ValueError:
+            return None
+
+    def _str(pattern: str):
+        m = re.search(pattern, text, flags=re.MULTILINE)
+        if not m:
+            return None
+        return m.group(1).strip()
+
+    transactions = _int(r"TransactionsCount:\s*(\d+)")
+    income = _num(r"Income:\s*RM\s*([\-0-9\.]+)")
+    expenses = _num(r"Expenses:\s*RM\s*([\-0-9\.]+)")
+    cashflow = _num(r"Cashflow:\s*RM\s*([\-0-9\.]+)")
+    savings_rate = _num(r"SavingsRate:\s*([0-9\.]+)%")
+    top_account = _str(r"TopAccount:\s*(.+)")
+    top_category = _str(r"TopCategory:\s*(.+?)\s*\(RM")
+    small_purchases = _int(r"SmallPurchasesCount.*?:\s*(\d+)")
+
+    if top_account in _EMPTY_NAMES:
+        top_account = None
+    if top_category in _EMPTY_NAMES:
+        top_category = None
+
+    return {
+        "transactions": transactions,
+        "income": income,
+        "expenses": expenses,
+        "cashflow": cashflow,
+        "savings_rate": savings_rate,
+        "top_account": top_account,
+        "top_category": top_category,
+        "small_purchases": small_purchases,
+    }
+
+
+def build_rule_based_advice(summary):
+    """Create a short 3‑section advice text based on numeric summary only."""
+    income = summary.get("income")
+    expenses = summary.get("expenses")
+    cashflow = summary.get("cashflow")
+    savings_rate = summary.get("savings_rate")
+    top_category = summary.get("top_category")
+    small_purchases = summary.get("small_purchases") or 0
+
+    lines = []
+
+    # 1) What's happening
+    lines.append("1) What's happening")
+
+    if income is None or expenses is None or cashflow is None:
+        lines.append(
+            "- I don't have full numbers yet, but you already have some "
+            "transactions recorded. Once income and expenses are filled in, I "
+            "can summarise your cashflow more precisely."
+        )
+    else:
+        if cashflow < 0:
+            lines.append(
+                f"- Your last 30 days show a NEGATIVE cashflow of RM {abs(cashflow):.2f} "
+                f"(income RM {income:.2f}, expenses RM {expenses:.2f})."
+            )
+        elif cashflow == 0:
+            lines.append(
+                f"- Your cashflow is roughly breakeven (income RM {income:.2f}, "
+                f"expenses RM {expenses:.2f})."
+            )
+        else:
+            lines.append(
+                f"- You have a POSITIVE cashflow of RM {cashflow:.2f} over the last "
+                f"30 days (income RM {income:.2f}, expenses RM {expenses:.2f})."
+            )
+
+        if savings_rate is not None:
+            lines.append(
+                f"- Your estimated savings rate is about {savings_rate:.1f}% of income."
+            )
+
+        if top_category:
+            lines.append(f"- Your highest spending category is {top_category}.")
+
+        if small_purchases >= 10:
+            lines.append(
+                f"- You also have {small_purchases} small purchases (≤ RM10) which can "
+                "quietly increase your monthly spending."
+            )
+
+    # 2) What to do this week
+    lines.append("")
+    lines.append("2) What to do this week (with RM targets)")
+
+    if cashflow is not None and cashflow < 0:
+        target = abs(cashflow) + 50
+        lines.append(
+            f"- Aim to reduce this month's expenses by at least RM {target:.0f} to "
+            "turn your cashflow positive (start with wants, not needs)."
+        )
+    elif cashflow is not None and cashflow >= 0:
+        save_target = max(50, cashflow * 0.4)
+        lines.append(
+            f"- Move at least RM {save_target:.0f} into savings or a separate "
+            "account so it is not spent by accident."
+        )
+
+    if top_category:
+        lines.append(
+            f"- Pick ONE rule for {top_category} (for example: cap it by RM 50–100 "
+            "less than this month) and track it inside the app."
+        )
+    else:
+        lines.append(
+            "- Identify one category you feel is 'leaking' money and set a simple "
+            "weekly cap for it (e.g. snacks, rides, subscriptions)."
+        )
+
+    if small_purchases >= 10:
+        lines.append(
+            "- For the next 7 days, group small purchases and limit them to a fixed "
+            "amount (for example RM 20–30 total)."
+        )
+
+    lines.append(
+        "- Log every expense in the app this week so future advice reflects your "
+        "real behaviour."
+    )
+
+    # 3) Longer‑term plan
+    lines.append("")
+    lines.append("3) Longer‑term plan")
+
+    lines.append(
+        "- Build a simple monthly budget: split income into needs, wants, and "
+        "savings, and review it at the end of each month."
+    )
+    lines.append(
+        "- Once you can consistently save each month, set a target emergency fund "
+        "of at least 3 months of essential expenses."
+    )
+    lines.append(
+        "- Revisit this Money Coach every few weeks to adjust RM targets based "
+        "on how your income and spending change."
+    )
+
+    return "\n".join(lines)
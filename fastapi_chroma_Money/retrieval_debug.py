@@ -0,0 +1,62 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# =========================
+# Background retrieval for /search_rag_model debug
+# The advice is built from the prompt numbers only; the retrieved rule docs
+# are just for a debug view. With debug on, the route answers first and the
+# Chroma query runs after the response is sent; its result is kept here under
+# a request id for GET /search_rag_model/{id}/debug.
+# Entries: pending -> done | error, dropped after ttl_seconds or LRU.
+# =========================
+STATUS_PENDING = "pending"
+STATUS_DONE = "done"
+STATUS_ERROR = "error"
+
+
+class DebugResults:
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def new(self) -> str:
+        request_id = uuid.uuid4().hex
+        self._put(request_id, {"status": STATUS_PENDING, "results": []})
+        return request_id
+
+    def get(self, request_id: str) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(request_id)
+            if item is None:
+                return None
+            expires_at, value = item
+            if now >= expires_at:
+                del self._data[request_id]
+                return None
+            return value
+
+    def run(self, request_id: str, retrieve: Callable[[], List[Dict[str, Any]]]) -> None:
+        """Call retrieve() and store its result (or error) under request_id."""
+        t0 = time.perf_counter()
+        try:
+            value = {"status": STATUS_DONE, "results": retrieve()}
+        except Exception as e:
+            value = {"status": STATUS_ERROR, "results": [], "error": str(e)}
+        value["seconds"] = round(time.perf_counter() - t0, 4)
+        self._put(request_id, value)
+
+    def _put(self, request_id: str, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._data[request_id] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(request_id)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,96 @@
+import importlib.util
+import os
+import sys
+from contextlib import AsyncExitStack, asynccontextmanager
+
+from fastapi import FastAPI, Response
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+
+# =========================
+# Task + money services in ONE process
+#     uvicorn api:app --port 8001
+# Both routers share one embedding model, one Chroma client per vectordb
+# path (see vector_store.py), one query-embedding cache and one runtime.
+# Each router keeps its own vectordb:
+#     TASK_VECTORDB_PATH   default ../app/modules/task-management/fastapi_chroma_task/vectordb
+#     MONEY_VECTORDB_PATH  default ../fastapi_chroma_Money/vectordb
+# Same routes as the two standalone services, so the app only needs both hosts
+# pointed at this port. /ready, /metrics, /embedding_cache/stats and / are
+# answered here for both services.
+# =========================
+HERE = os.path.dirname(os.path.abspath(__file__))
+TASK_DIR = os.path.abspath(os.path.join(HERE, "..", "app", "modules", "task-management", "fastapi_chroma_task"))
+MONEY_DIR = os.path.abspath(os.path.join(HERE, "..", "fastapi_chroma_Money"))
+
+os.environ.setdefault("TASK_VECTORDB_PATH", os.path.join(TASK_DIR, "vectordb"))
+os.environ.setdefault("MONEY_VECTORDB_PATH", os.path.join(MONEY_DIR, "vectordb"))
+
+
+def _load_service(name: str, directory: str):
+    """Import <directory>/api.py as module `name` (both services have flat sibling imports)."""
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    spec = importlib.util.spec_from_file_location(name, os.path.join(directory, "api.py"))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+# Both services import the shared helpers from fastapi_chroma_shared (one copy), so
+# they get the same module objects and so the same Chroma client / model / cache
+task_api = _load_service("task_api", TASK_DIR)
+money_api = _load_service("money_api", MONEY_DIR)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with AsyncExitStack() as stack:
+        await stack.enter_async_context(task_api.lifespan(app))
+        await stack.enter_async_context(money_api.lifespan(app))
+        yield
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],  # ok for dev
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=["ETag"],
+)
+
+
+# Registered before the service routers, so these answer for both services
+@app.get("/")
+def root():
+    return {"message": "FastAPI + ChromaDB backend is running (task + money)"}
+
+
+@app.get("/ready")
+def ready():
+    stores = {"task": task_api.vector_store, "money": money_api.vector_store}
+    all_ready = all(s.ready for s in stores.values())
+    return JSONResponse(
+        {name: s.stats() for name, s in stores.items()},
+        status_code=200 if all_ready else 503,
+    )
+
+
+@app.get("/metrics")
+def metrics_endpoint():
+    return Response(
+        content=task_api.metrics.render() + money_api.metrics.render(),
+        media_type=task_api.CONTENT_TYPE,
+    )
+
+
+@app.get("/embedding_cache/stats")
+def embedding_cache_stats():
+    return task_api.embedding_cache.stats()  # same object as money_api.embedding_cache
+
+
+app.include_router(task_api.router)
+app.include_router(money_api.router)
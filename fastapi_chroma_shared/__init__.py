@@ -0,0 +1,8 @@
+# =========================
+# Helpers shared by fastapi_chroma_task, fastapi_chroma_Money and
+# fastapi_chroma_all: vector store, query-embedding cache, metrics, rules
+# snapshot, collection sharding (+ migrate_shards).
+# The services run from their own folders (uvicorn api:app), so each entry
+# point puts the repo root on sys.path before importing this package. One copy
+# of the code; in the combined process both routers get the same modules.
+# =========================
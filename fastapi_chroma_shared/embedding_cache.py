@@ -0,0 +1,267 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:  # POSIX
+    msvcrt = None
+
+# =========================
+# Query-embedding cache
+# Key = hash of the normalized text. Two levels:
+#  1) bounded in-memory LRU
+#  2) on-disk ring of float32 vectors (np.memmap) that survives restarts
+# Files in <path>/: vectors.f32, keys.bin, meta.json, owner.lock
+# One process per directory owns the disk level (flock on owner.lock, or
+# msvcrt.locking on Windows); other API workers sharing the directory fall
+# back to the memory LRU only, and so does every process when neither lock
+# exists (never several writers on one memmap).
+# meta.json records the embedding model; a store built by another model is
+# wiped on open. New vectors go into the memmap at once, but the flush +
+# meta.json rewrite run at most every flush_interval_s (and from flush() at
+# shutdown), not on every miss.
+# =========================
+KEY_BYTES = 16
+
+_shared: Dict[str, "EmbeddingCache"] = {}
+_shared_lock = threading.Lock()
+
+
+def normalize_text(text: str) -> str:
+    return " ".join((text or "").split())
+
+
+def text_key(text: str) -> bytes:
+    return hashlib.blake2b(normalize_text(text).encode("utf-8"), digest_size=KEY_BYTES).digest()
+
+
+class EmbeddingCache:
+    def __init__(
+        self,
+        embed_fn: Callable[[List[str]], Any],
+        path: str = "./embedding_cache",
+        model: str = "",
+        max_memory_entries: int = 2048,
+        max_disk_entries: int = 20000,
+        flush_interval_s: float = 5.0,
+    ):
+        self._embed_fn = embed_fn
+        self.path = path
+        self.model = model
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.flush_interval_s = flush_interval_s
+
+        self._memory: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._disk_index: Dict[bytes, int] = {}
+        self._vectors: Optional[np.memmap] = None
+        self._keys: Optional[np.memmap] = None
+        self._dim: Optional[int] = None
+        self._next_row = 0
+        self._dirty = False
+        self._flushed_at = time.monotonic()
+        self._lock = threading.Lock()
+
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+
+        self._owner_lock: Optional[Any] = None
+        self.disk_enabled = self._lock_disk()
+        if self.disk_enabled:
+            self._open_disk()
+
+    # ---------- disk store ----------
+    def _lock_disk(self) -> bool:
+        if fcntl is None and msvcrt is None:
+            print("(ok) Embedding cache on disk disabled: no file lock on this platform, memory only")
+            return False
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            f = open(os.path.join(self.path, "owner.lock"), "a")
+        except OSError as e:
+            print(f"(ok) Embedding cache on disk disabled: {e}")
+            return False
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            f.close()
+            print(f"(ok) Embedding cache {self.path} is owned by another worker, memory only")
+            return False
+        self._owner_lock = f  # held (open) for the life of the process
+        return True
+
+    def _meta_path(self) -> str:
+        return os.path.join(self.path, "meta.json")
+
+    def _open_disk(self) -> None:
+        if not os.path.exists(self._meta_path()):
+            return
+        try:
+            with open(self._meta_path(), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("model", "") != self.model:
+                print(f"(ok) Embedding cache {self.path} holds {meta.get('model')!r} vectors, wiped for {self.model!r}")
+                self._wipe_disk()
+                return
+            if int(meta["capacity"]) != self.max_disk_entries:
+                return  # capacity changed -> start a fresh store on first write
+            self._map(int(meta["dim"]), mode="r+")
+            self._next_row = int(meta.get("next_row", 0))
+            empty = bytes(KEY_BYTES)
+            for row in range(self.max_disk_entries):
+                k = self._keys[row].tobytes()
+                if k != empty:
+                    self._disk_index[k] = row
+        except (OSError, ValueError, KeyError) as e:
+            print(f"(ok) Embedding cache on disk ignored: {e}")
+            self._vectors = self._keys = None
+            self._dim = None
+            self._disk_index.clear()
+
+    def _wipe_disk(self) -> None:
+        for name in ("meta.json", "vectors.f32", "keys.bin"):
+            try:
+                os.remove(os.path.join(self.path, name))
+            except FileNotFoundError:
+                pass
+
+    def _map(self, dim: int, mode: str) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        self._dim = dim
+        self._vectors = np.memmap(
+            os.path.join(self.path, "vectors.f32"), dtype=np.float32, mode=mode,
+            shape=(self.max_disk_entries, dim),
+        )
+        self._keys = np.memmap(
+            os.path.join(self.path, "keys.bin"), dtype=np.uint8, mode=mode,
+            shape=(self.max_disk_entries, KEY_BYTES),
+        )
+
+    def _write_meta(self) -> None:
+        tmp = self._meta_path() + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "model": self.model,
+                "dim": self._dim,
+                "capacity": self.max_disk_entries,
+                "next_row": self._next_row,
+            }, f)
+        os.replace(tmp, self._meta_path())
+
+    def _disk_put(self, key: bytes, vec: np.ndarray) -> None:
+        if not self.disk_enabled:
+            return
+        if self._vectors is None:
+            self._map(int(vec.shape[0]), mode="w+")
+        if vec.shape[0] != self._dim:
+            return
+        row = self._next_row
+        old_key = self._keys[row].tobytes()
+        self._disk_index.pop(old_key, None)
+        self._vectors[row] = vec
+        self._keys[row] = np.frombuffer(key, dtype=np.uint8)
+        self._disk_index[key] = row
+        self._next_row = (row + 1) % self.max_disk_entries
+
+    # ---------- memory LRU ----------
+    def _memory_put(self, key: bytes, vec: np.ndarray) -> None:
+        self._memory[key] = vec
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    # ---------- public ----------
+    def embed(self, texts: List[str]) -> List[np.ndarray]:
+        """Embeddings for texts (same order); only cache misses go to the model, in one batch."""
+        keys = [text_key(t) for t in texts]
+        out: List[Optional[np.ndarray]] = [None] * len(texts)
+        missing: Dict[bytes, List[int]] = {}
+
+        with self._lock:
+            for i, k in enumerate(keys):
+                vec = self._memory.get(k)
+                if vec is not None:
+                    self._memory.move_to_end(k)
+                    self.hits_memory += 1
+                    out[i] = vec
+                    continue
+                row = self._disk_index.get(k)
+                if row is not None:
+                    vec = np.array(self._vectors[row], dtype=np.float32)
+                    self._memory_put(k, vec)
+                    self.hits_disk += 1
+                    out[i] = vec
+                    continue
+                missing.setdefault(k, []).append(i)
+
+        if missing:
+            miss_texts = [normalize_text(texts[idxs[0]]) for idxs in missing.values()]
+            new_vecs = self._embed_fn(miss_texts)
+            with self._lock:
+                for (k, idxs), raw in zip(missing.items(), new_vecs):
+                    vec = np.asarray(raw, dtype=np.float32)
+                    self.misses += len(idxs)
+                    self._memory_put(k, vec)
+                    self._disk_put(k, vec)
+                    for i in idxs:
+                        out[i] = vec
+                if self._vectors is not None:
+                    self._dirty = True
+                    if time.monotonic() - self._flushed_at >= self.flush_interval_s:
+                        self._flush_locked()
+
+        return out  # type: ignore[return-value]
+
+    def flush(self) -> None:
+        """Write pending disk entries + meta.json now (called at shutdown)."""
+        with self._lock:
+            if self._dirty:
+                self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        self._vectors.flush()
+        self._keys.flush()
+        self._write_meta()
+        self._dirty = False
+        self._flushed_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits_memory + self.hits_disk + self.misses
+        return {
+            "hits_memory": self.hits_memory,
+            "hits_disk": self.hits_disk,
+            "misses": self.misses,
+            "hit_rate": round((self.hits_memory + self.hits_disk) / lookups, 4) if lookups else None,
+            "memory_entries": len(self._memory),
+            "memory_capacity": self.max_memory_entries,
+            "disk_enabled": self.disk_enabled,
+            "disk_entries": len(self._disk_index),
+            "disk_capacity": self.max_disk_entries,
+        }
+
+
+def shared_cache(embed_fn: Callable[[List[str]], Any], path: str = "./embedding_cache", model: str = "") -> EmbeddingCache:
+    """One EmbeddingCache per directory per process (the first caller's embed_fn / model are used,
+    so pass vector_store.embed_texts + EMBEDDING_MODEL, never one store's embed)."""
+    key = os.path.abspath(path)
+    with _shared_lock:
+        if key not in _shared:
+            _shared[key] = EmbeddingCache(embed_fn=embed_fn, path=path, model=model)
+        return _shared[key]
@@ -0,0 +1,95 @@
+import argparse
+from collections import Counter
+from typing import Any, Dict, List
+
+from .shards import LEGACY_COLLECTION, TASK_BUCKETS, ShardRouter, route
+from .vector_store import make_client
+
+"""
+Copy an existing single-collection vectordb (my_data) into sharded collections
+(rules_<module>, tasks_<bucket>; see shards.py). Stored embeddings are copied,
+nothing is re-embedded. Safe to re-run (upsert). my_data is kept unless
+--drop-legacy is given and every document was routed.
+
+Run from the repo root, once per service vectordb:
+    python -m fastapi_chroma_shared.migrate_shards --path app/modules/task-management/fastapi_chroma_task/vectordb
+    python -m fastapi_chroma_shared.migrate_shards --path fastapi_chroma_Money/vectordb
+    python -m fastapi_chroma_shared.migrate_shards --path fastapi_chroma_Money/vectordb --dry-run
+
+Stop the API first (or use CHROMA_MODE=http), then start it with
+VECTOR_LAYOUT=sharded and the same TASK_BUCKETS.
+"""
+
+PAGE_SIZE = 1000
+
+
+def migrate(client: Any, legacy: Any, buckets: int, page_size: int, dry_run: bool) -> Dict[str, Any]:
+    router = ShardRouter(client, buckets)
+    per_shard: Counter = Counter()
+    skipped: List[str] = []
+
+    offset = 0
+    while True:
+        page = legacy.get(limit=page_size, offset=offset, include=["documents", "metadatas", "embeddings"])
+        ids = page.get("ids") or []
+        if not ids:
+            break
+        groups: Dict[str, Dict[str, List[Any]]] = {}
+        for doc_id, doc, meta, emb in zip(ids, page["documents"], page["metadatas"], page["embeddings"]):
+            target = route(doc_id, meta, buckets)
+            if target is None:
+                skipped.append(doc_id)
+                continue
+            name, shard_meta = target
+            g = groups.setdefault(name, {"ids": [], "documents": [], "metadatas": [], "embeddings": []})
+            g["ids"].append(doc_id)
+            g["documents"].append(doc)
+            g["metadatas"].append(shard_meta)
+            g["embeddings"].append(emb)
+        for name, g in groups.items():
+            if not dry_run:
+                router.collection(name).upsert(**g)
+            per_shard[name] += len(g["ids"])
+        offset += len(ids)
+        print(f"... {offset} documents read")
+
+    return {"read": offset, "per_shard": dict(sorted(per_shard.items())), "skipped": skipped}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Copy my_data into sharded collections")
+    parser.add_argument("--path", required=True, help="vectordb directory of the service")
+    parser.add_argument("--buckets", type=int, default=TASK_BUCKETS, help="task buckets (TASK_BUCKETS)")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="only report where documents would go")
+    parser.add_argument("--drop-legacy", action="store_true", help="delete my_data afterwards")
+    args = parser.parse_args()
+
+    client = make_client(args.path)  # CHROMA_MODE=http -> the running Chroma server
+    try:
+        legacy = client.get_collection(name=LEGACY_COLLECTION)
+    except Exception as e:  # the error type depends on the chromadb version
+        print(f"(ok) Nothing to migrate, no {LEGACY_COLLECTION} collection: {e}")
+        return
+    result = migrate(client, legacy, args.buckets, args.page_size, args.dry_run)
+
+    task_shards = sum(1 for name in result["per_shard"] if name.startswith("tasks_"))
+    print(f"✅ {'Would copy' if args.dry_run else 'Copied'} {result['read'] - len(result['skipped'])} "
+          f"of {result['read']} documents ({task_shards} task bucket(s) used of {args.buckets})")
+    for name, n in result["per_shard"].items():
+        if not name.startswith("tasks_"):
+            print(f"   {name}: {n}")
+    if result["skipped"]:
+        print(f"(ok) Left in {LEGACY_COLLECTION} (not a rule or task doc): {', '.join(result['skipped'][:10])}"
+              + (" ..." if len(result["skipped"]) > 10 else ""))
+
+    if args.drop_legacy and not args.dry_run:
+        if result["skipped"]:
+            print(f"❌ Not dropping {LEGACY_COLLECTION}: {len(result['skipped'])} document(s) were not routed")
+        else:
+            client.delete_collection(name=LEGACY_COLLECTION)
+            print(f"✅ Deleted {LEGACY_COLLECTION}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# =========================
+# Rules snapshot
+# Rule docs only change when Insert_Data.py runs, so the rule retrieval is
+# computed once and kept in memory. The version is taken from the rule docs
+# alone (select = collection.get filter: where on type=rule, or their ids):
+# collection id + a hash of their ids, documents and metadata. Task-doc
+# writes to the same collection do not trigger a rebuild; a rule edited in
+# place (same count) does.
+# A failed check (Chroma down) keeps the last good snapshot and is retried
+# after retry_s, doubling per failure up to check_interval_s, so requests
+# never run a collection.get each while the store is unreachable.
+# =========================
+
+
+def rules_version(collection: Any, select: Dict[str, Any]) -> Tuple[str, str]:
+    got = collection.get(include=["documents", "metadatas"], **select)
+    rows = sorted(zip(got.get("ids") or [], got.get("documents") or [], got.get("metadatas") or []), key=lambda r: r[0])
+    blob = json.dumps(rows, sort_keys=True, ensure_ascii=False, default=str)
+    return (str(collection.id), hashlib.blake2b(blob.encode("utf-8"), digest_size=16).hexdigest())
+
+
+class RulesSnapshot:
+    def __init__(
+        self,
+        get_collection: Callable[[], Any],
+        loader: Callable[[Any], Any],
+        select: Optional[Dict[str, Any]] = None,
+        check_interval_s: float = 30.0,
+        retry_s: float = 1.0,
+        empty: Any = (),
+    ):
+        self._get_collection = get_collection
+        self._loader = loader
+        self.select = select or {}
+        self.check_interval_s = check_interval_s
+        self.retry_s = retry_s
+        self._value: Any = empty
+        self._version: Optional[Tuple[str, str]] = None
+        self._next_check_at = 0.0
+        self._failures = 0
+        self.error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def value(self) -> Any:
+        return self._value
+
+    @property
+    def version(self) -> Optional[Tuple[str, str]]:
+        return self._version
+
+    def needs_check(self) -> bool:
+        return time.monotonic() >= self._next_check_at
+
+    def refresh(self, force: bool = False) -> bool:
+        """Rebuild the snapshot if the rule docs changed. Returns True if rebuilt.
+        Raises if Chroma fails; the next check is then pushed back (see above)."""
+        with self._lock:
+            if not force and not self.needs_check():
+                return False  # another request checked while this one waited for the lock
+            try:
+                coll = self._get_collection()
+                version = rules_version(coll, self.select)
+                rebuilt = force or version != self._version
+                if rebuilt:
+                    self._value = self._loader(coll)
+                    self._version = version
+            except Exception as e:
+                self._failures += 1
+                self.error = f"{type(e).__name__}: {e}"
+                backoff = min(self.check_interval_s, self.retry_s * 2 ** (self._failures - 1))
+                self._next_check_at = time.monotonic() + backoff
+                raise
+            self._failures = 0
+            self.error = None
+            self._next_check_at = time.monotonic() + self.check_interval_s
+            return rebuilt
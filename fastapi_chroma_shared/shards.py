@@ -0,0 +1,91 @@
+import hashlib
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+# =========================
+# Sharded collections
+# With everything in one "my_data" collection, every filtered HNSW search
+# ($and on module/type/userId) walks everybody's vectors. VECTOR_LAYOUT=sharded
+# stores documents in:
+#   rules_<module>   rule docs, one collection per module (queried with no filter)
+#   tasks_<bucket>   type=task docs; a user always hashes to the same one of
+#                    TASK_BUCKETS buckets (queried with a userId filter only)
+# VECTOR_LAYOUT=single (default) keeps the old my_data layout.
+# migrate_shards.py copies an existing my_data into the shards (no re-embedding):
+#   python -m fastapi_chroma_shared.migrate_shards --path <service>/vectordb
+# =========================
+LAYOUT_SINGLE = "single"
+LAYOUT_SHARDED = "sharded"
+
+VECTOR_LAYOUT = os.getenv("VECTOR_LAYOUT", LAYOUT_SINGLE)
+TASK_BUCKETS = int(os.getenv("TASK_BUCKETS", "64"))
+
+LEGACY_COLLECTION = "my_data"
+MODULE_TASKS = "task-management"
+MODULE_MONEY = "money"
+RULE_USER_ID = "__global__"
+
+# Rule docs that fastapi_chroma_Money/Insert_Data.py adds without metadata
+_TASK_RULE_IDS = ("task_rules_v1", "priority_rules_v1", "relevance_rules_v1")
+_MONEY_RULE_PREFIX = "money_"
+
+
+def sharded() -> bool:
+    if VECTOR_LAYOUT not in (LAYOUT_SINGLE, LAYOUT_SHARDED):
+        raise ValueError(f"VECTOR_LAYOUT must be {LAYOUT_SINGLE!r} or {LAYOUT_SHARDED!r}, got {VECTOR_LAYOUT!r}")
+    return VECTOR_LAYOUT == LAYOUT_SHARDED
+
+
+def rules_collection_name(module: str) -> str:
+    return f"rules_{module}"
+
+
+def user_bucket(user_id: str, buckets: int = TASK_BUCKETS) -> int:
+    # stable across processes and restarts (unlike hash())
+    digest = hashlib.blake2b(user_id.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % buckets
+
+
+def task_collection_name(bucket: int) -> str:
+    return f"tasks_{bucket:04d}"
+
+
+def route(doc_id: str, metadata: Optional[Dict[str, Any]], buckets: int = TASK_BUCKETS) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """(shard collection name, metadata) for a my_data document; None = not a rule or task doc."""
+    m = dict(metadata or {})
+    if m.get("type") == "task" and m.get("userId"):
+        return task_collection_name(user_bucket(str(m["userId"]), buckets)), m
+    if m.get("type") == "rule" and m.get("module"):
+        return rules_collection_name(str(m["module"])), m
+    if doc_id.startswith(_MONEY_RULE_PREFIX):
+        module = MODULE_MONEY
+    elif doc_id in _TASK_RULE_IDS:
+        module = MODULE_TASKS
+    else:
+        return None
+    m.update({"module": module, "type": "rule", "userId": RULE_USER_ID})
+    return rules_collection_name(module), m
+
+
+class ShardRouter:
+    """Collection handles by shard name, created on first use."""
+
+    def __init__(self, client: Any, buckets: int = TASK_BUCKETS):
+        self.client = client
+        self.buckets = buckets
+        self._collections: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def collection(self, name: str) -> Any:
+        with self._lock:
+            coll = self._collections.get(name)
+            if coll is None:
+                coll = self._collections[name] = self.client.get_or_create_collection(name=name)
+            return coll
+
+    def rules(self, module: str) -> Any:
+        return self.collection(rules_collection_name(module))
+
+    def tasks(self, user_id: str) -> Any:
+        return self.collection(task_collection_name(user_bucket(user_id, self.buckets)))
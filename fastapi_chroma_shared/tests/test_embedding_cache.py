@@ -0,0 +1,32 @@
+import os
+
+import numpy as np
+import pytest
+
+from fastapi_chroma_shared import embedding_cache
+from fastapi_chroma_shared.embedding_cache import EmbeddingCache
+
+
+def _embed(texts):
+    return [np.full(4, len(t), dtype=np.float32) for t in texts]
+
+
+def test_disk_off_without_a_file_lock(tmp_path, monkeypatch):
+    monkeypatch.setattr(embedding_cache, "fcntl", None)
+    monkeypatch.setattr(embedding_cache, "msvcrt", None)
+
+    cache = EmbeddingCache(embed_fn=_embed, path=str(tmp_path / "cache"), flush_interval_s=0.0)
+    assert not cache.disk_enabled
+
+    assert cache.embed(["hello"])[0].tolist() == [5.0] * 4
+    cache.flush()
+    assert cache.stats()["disk_entries"] == 0
+    assert not os.path.exists(tmp_path / "cache" / "vectors.f32")
+
+
+@pytest.mark.skipif(embedding_cache.fcntl is None, reason="flock only")
+def test_second_process_on_the_directory_is_memory_only(tmp_path):
+    owner = EmbeddingCache(embed_fn=_embed, path=str(tmp_path), flush_interval_s=0.0)
+    other = EmbeddingCache(embed_fn=_embed, path=str(tmp_path), flush_interval_s=0.0)
+    assert owner.disk_enabled
+    assert not other.disk_enabled
@@ -0,0 +1,86 @@
+import pytest
+
+from fastapi_chroma_shared import rules_snapshot
+from fastapi_chroma_shared.rules_snapshot import RulesSnapshot
+
+
+class _Collection:
+    id = "rules"
+
+    def __init__(self):
+        self.down = False
+        self.gets = 0
+        self.docs = ["Rule one"]
+
+    def get(self, **kwargs):
+        self.gets += 1
+        if self.down:
+            raise ConnectionError("chroma is down")
+        return {
+            "ids": [f"r{i}" for i in range(len(self.docs))],
+            "documents": list(self.docs),
+            "metadatas": [None] * len(self.docs),
+        }
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rules_snapshot.time, "monotonic", lambda: now[0])
+    return now
+
+
+def _snapshot(coll):
+    return RulesSnapshot(
+        get_collection=lambda: coll,
+        loader=lambda c: tuple(c.get()["documents"]),
+        check_interval_s=30.0,
+        retry_s=1.0,
+    )
+
+
+def test_failed_refresh_keeps_snapshot_and_backs_off(clock):
+    coll = _Collection()
+    snap = _snapshot(coll)
+    assert snap.refresh(force=True)
+    assert snap.value == ("Rule one",)
+
+    clock[0] += 30.0
+    coll.down = True
+    assert snap.needs_check()
+    with pytest.raises(ConnectionError):
+        snap.refresh()
+    assert snap.value == ("Rule one",)  # last good snapshot still served
+    assert snap.error.startswith("ConnectionError")
+
+    # no retry (and no collection.get) until the backoff has passed
+    gets = coll.gets
+    assert not snap.needs_check()
+    assert snap.refresh() is False
+    assert coll.gets == gets
+
+    clock[0] += 1.0
+    assert snap.needs_check()
+    with pytest.raises(ConnectionError):
+        snap.refresh()
+    clock[0] += 1.0
+    assert not snap.needs_check()  # second failure: 2 s
+    clock[0] += 1.0
+    assert snap.needs_check()
+
+    coll.down = False
+    coll.docs = ["Rule one", "Rule two"]
+    assert snap.refresh()
+    assert snap.value == ("Rule one", "Rule two")
+    assert snap.error is None
+    assert not snap.needs_check()
+
+
+def test_first_build_failure_backs_off_too(clock):
+    coll = _Collection()
+    coll.down = True
+    snap = _snapshot(coll)
+    with pytest.raises(ConnectionError):
+        snap.refresh(force=True)
+    assert snap.value == ()
+    assert not snap.needs_check()
@@ -0,0 +1,179 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# =========================
+# Lazily initialized vector store
+# Importing chromadb, opening the PersistentClient, get_or_create_collection
+# and the first embedding call (loads the ONNX model) take seconds, so they
+# run in a worker thread started from the app lifespan, not at import time.
+# Routes that need retrieval wait on it (or degrade), the rest answer at once.
+#
+# CHROMA_MODE=persistent  this process opens ./vectordb itself (one worker only:
+#                         the SQLite file + HNSW segment are not multi-process safe)
+# CHROMA_MODE=http        one Chroma server owns ./vectordb and every API worker
+#                         connects with chromadb.HttpClient:
+#                           chroma run --path ./vectordb --port 8010
+#                           CHROMA_MODE=http uvicorn api:app --port 8001 --workers 4
+# =========================
+STATUS_STARTING = "starting"
+STATUS_READY = "ready"
+STATUS_FAILED = "failed"
+
+MODE_PERSISTENT = "persistent"
+MODE_HTTP = "http"
+
+# what shared_embedding_fn() loads (chromadb's DefaultEmbeddingFunction, ONNX);
+# recorded by the query-embedding cache so vectors of another model are never reused
+EMBEDDING_MODEL = "chromadb-default/all-MiniLM-L6-v2"
+
+CHROMA_MODE = os.getenv("CHROMA_MODE", MODE_PERSISTENT)
+CHROMA_HOST = os.getenv("CHROMA_HOST", "localhost")
+CHROMA_PORT = int(os.getenv("CHROMA_PORT", "8010"))
+
+
+def make_client(path: str, mode: Optional[str] = None, host: Optional[str] = None, port: Optional[int] = None) -> Any:
+    """chromadb client for the configured mode (defaults from CHROMA_MODE / CHROMA_HOST / CHROMA_PORT)."""
+    import chromadb
+
+    mode = mode or CHROMA_MODE
+    if mode == MODE_HTTP:
+        return chromadb.HttpClient(host=host or CHROMA_HOST, port=port or CHROMA_PORT)
+    if mode == MODE_PERSISTENT:
+        return chromadb.PersistentClient(path=path)
+    raise ValueError(f"CHROMA_MODE must be {MODE_PERSISTENT!r} or {MODE_HTTP!r}, got {mode!r}")
+
+
+# One client per store location and one embedding model per process, shared by
+# every VectorStore (fastapi_chroma_all runs the task and money routers together)
+_shared_lock = threading.Lock()
+_clients: Dict[Tuple[str, str], Any] = {}
+_embedding_fn: Any = None
+
+
+def shared_client(path: str, mode: Optional[str] = None, host: Optional[str] = None, port: Optional[int] = None) -> Any:
+    mode = mode or CHROMA_MODE
+    where = f"{host or CHROMA_HOST}:{port or CHROMA_PORT}" if mode == MODE_HTTP else os.path.abspath(path)
+    with _shared_lock:
+        if (mode, where) not in _clients:
+            _clients[(mode, where)] = make_client(path, mode, host, port)
+        return _clients[(mode, where)]
+
+
+def shared_embedding_fn() -> Any:
+    global _embedding_fn
+    with _shared_lock:
+        if _embedding_fn is None:
+            from chromadb.utils import embedding_functions
+
+            embedding_fn = embedding_functions.DefaultEmbeddingFunction()
+            embedding_fn(["warm up"])  # load the model now, not on the first query
+            _embedding_fn = embedding_fn
+        return _embedding_fn
+
+
+def embed_texts(texts: List[str]) -> Any:
+    """Embed with the process-wide model (loaded on first use), whatever state any VectorStore is in.
+    For the query-embedding cache, which both services share in one process."""
+    return shared_embedding_fn()(texts)
+
+
+class StoreNotReady(Exception):
+    def __init__(self, status: str, error: Optional[str] = None):
+        super().__init__(f"Vector store is {status}" + (f": {error}" if error else ""))
+        self.status = status
+        self.error = error
+
+
+class VectorStore:
+    def __init__(
+        self,
+        path: str,
+        collection_name: str,
+        mode: Optional[str] = None,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+    ):
+        self.path = path
+        self.collection_name = collection_name
+        self.mode = mode or CHROMA_MODE
+        self.host = host or CHROMA_HOST
+        self.port = port or CHROMA_PORT
+        if self.mode not in (MODE_PERSISTENT, MODE_HTTP):
+            raise ValueError(f"CHROMA_MODE must be {MODE_PERSISTENT!r} or {MODE_HTTP!r}, got {self.mode!r}")
+
+        self.status = STATUS_STARTING
+        self.error: Optional[str] = None
+        self.init_s: Optional[float] = None
+        self.client: Any = None
+        self.collection: Any = None
+        self.embedding_fn: Any = None
+
+        self._done = threading.Event()
+        self._future: Optional["asyncio.Future[None]"] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == STATUS_READY
+
+    def _init(self) -> None:
+        t0 = time.perf_counter()
+        try:
+            client = shared_client(self.path, self.mode, self.host, self.port)
+            collection = client.get_or_create_collection(name=self.collection_name)
+            embedding_fn = shared_embedding_fn()
+
+            self.client, self.collection, self.embedding_fn = client, collection, embedding_fn
+            self.status = STATUS_READY
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            self.status = STATUS_FAILED
+        finally:
+            self.init_s = time.perf_counter() - t0
+            self._done.set()
+
+    def start(self) -> "asyncio.Future[None]":
+        """Begin initializing in a worker thread (idempotent); await the result to wait for it."""
+        if self._future is None:
+            self._future = asyncio.get_running_loop().run_in_executor(None, self._init)
+        return self._future
+
+    async def wait(self, timeout_s: float) -> bool:
+        """Wait up to timeout_s for the store -> True if ready (False if still starting or failed)."""
+        if self._future is not None and not self._done.is_set():
+            try:
+                await asyncio.wait_for(asyncio.shield(self._future), timeout_s)
+            except asyncio.TimeoutError:
+                pass
+        return self.ready
+
+    def wait_sync(self, timeout_s: float) -> bool:
+        """wait() for sync routes / worker threads (never call it on the event loop)."""
+        self._done.wait(timeout_s)
+        return self.ready
+
+    def require(self) -> Any:
+        """-> the collection; raises StoreNotReady while starting or after a failed init."""
+        if not self.ready:
+            raise StoreNotReady(self.status, self.error)
+        return self.collection
+
+    def get_collection(self) -> Any:
+        self.require()
+        return self.client.get_collection(name=self.collection_name)
+
+    def embed(self, texts: List[str]) -> Any:
+        self.require()
+        return self.embedding_fn(texts)
+
+    def stats(self) -> dict:
+        return {
+            "status": self.status,
+            "error": self.error,
+            "init_s": round(self.init_s, 3) if self.init_s is not None else None,
+            "mode": self.mode,
+            "path": self.path if self.mode == MODE_PERSISTENT else f"http://{self.host}:{self.port}",
+            "collection": self.collection_name,
+        }